@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import json
@@ -49,6 +49,18 @@ async def execute_query(query_request: QueryRequest):
     print(query_request.consulta)
     return execute_consulta(query_request.consulta)
 
+@app.post("/query/stream")
+async def execute_query_stream(query_request: QueryRequest):
+    """Ejecutar una consulta SQL devolviendo las filas a medida que se producen (NDJSON)"""
+    print(query_request.consulta)
+    lines = (json.dumps(part, default=str) + "\n" for part in stream_consulta(query_request.consulta))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@app.get("/buffer-pool")
+async def buffer_pool_stats():
+    """Estadísticas del buffer pool (para dimensionarlo según el working set)"""
+    return get_buffer_pool_stats()
+
 @app.get("/audio")
 async def get_audio(file_name: str):
     file_path = Utils.build_path("sounds", file_name)
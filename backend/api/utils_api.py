@@ -12,10 +12,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".
 from backend.database.global_utils import Utils
 from backend.database.fancytypes.column_types import QueryResult
 from backend.api.mock import *
-from backend.database.yarasca import Parser, query_run
+from backend.database.yarasca import Parser, query_run, query_stream
 
 from backend.database.scanner import Scanner
 from backend.database.visitor import RunVisitor
+from dbmanager import DBManager  # mismo módulo que usa el visitor (mismo buffer pool)
 import time
 
 
@@ -178,57 +179,78 @@ def detect_type(value):
     else:
         return "UNKNOWN"
     
+def columns_info(columns, rows):
+    """Tipo de cada columna según su primer valor no nulo en ``rows``."""
+    info = []
+    for i, col in enumerate(columns):
+        first_valid = next((row[i] for row in rows if row[i] is not None), "")
+        info.append({
+            "field_name": col,
+            "type": detect_type(first_valid)
+        })
+    return info
+
+
+def stream_consulta(consulta: str):
+    """
+    Ejecuta la consulta y la devuelve por partes, a medida que se producen:
+    primero {"columns": [...]}, luego un {"rows": [...]} por lote de filas y
+    al final {"message", "count_rows", "time_execution"}. Si la consulta
+    falla, la parte final trae "error" en lugar de "message"; count_rows son
+    las filas enviadas antes del error (el resultado quedó truncado). Un
+    SELECT se consume directamente del pipeline de operadores, sin armar un
+    DataFrame.
+    """
+    start = time.time()
+    query_result: QueryResult = query_stream(consulta)
+    pipeline = query_result.stream
+    message = query_result.message
+    error = None if query_result.success else message
+    count = 0
+
+    if pipeline is not None:
+        try:
+            for batch in pipeline:
+                rows = batch.rows()  # aquí recién se pasa de columnas NumPy a objetos Python
+                if count == 0:
+                    yield {"columns": columns_info(pipeline.columns, rows)}
+                count += len(rows)
+                yield {"rows": [dict(zip(pipeline.columns, row)) for row in rows]}
+            message = f"Selected {count} records from table '{pipeline.table_name}'."
+        except Exception as e:
+            error = f"There was an error while selecting records: {str(e)}"
+    elif query_result.data is not None and not query_result.data.empty:
+        df = query_result.data
+        yield {"columns": columns_info(list(df.columns), df.where(df.notna(), None).values.tolist())}
+        count = len(df)
+        yield {"rows": df.to_dict(orient="records")}
+
+    final = {"message": message} if error is None else {"error": error}
+    final["count_rows"] = count
+    final["time_execution"] = round((time.time() - start) * 1000)
+    yield final
+
+
 def execute_consulta(consulta:str):
+    """Respuesta completa de una consulta, armada con las partes de stream_consulta.
+    Si falló, trae "error" (y el mismo texto en "message") y ninguna fila, aunque
+    el pipeline haya llegado a producir algunas antes del error."""
+    response = {"columns": [], "rows": []}
+    for part in stream_consulta(consulta):
+        if "rows" in part:
+            response["rows"].extend(part["rows"])
+        elif "error" in part:
+            response.update(columns=[], rows=[], count_rows=0, message=part["error"],
+                            error=part["error"], time_execution=part["time_execution"])
+        else:
+            response.update(part)
+    return response
 
-    start = time.time()
 
-    # Supongamos que esta función ya hace todo lo necesario y te da un QueryResult válido
-    """
-    query_result:QueryResult=QueryResult(
-        success=True,
-        message="Consulta ejecutada correctamente.",
-        data=pd.DataFrame(rows)
-    )
-    """
-    """
-    runVisitor = RunVisitor()
-    scanner = Scanner(consulta)
-    parser = Parser(scanner)
-    program = parser.parse_program()
-    query_result: QueryResult = runVisitor.visit_program(program)
-    """
-    query_result:QueryResult= query_run(consulta)
-    end = time.time()
-    
-    df = query_result.data
-
-    if df is not None and not df.empty:
-        # Detectar tipos de columnas
-        columns_info = []
-        for col in df.columns:
-            first_valid = df[col].dropna().iloc[0] if not df[col].dropna().empty else ""
-            col_type = detect_type(first_valid)
-            columns_info.append({
-                "field_name": col,
-                "type": col_type
-            })
-
-
-        return {
-            "columns": columns_info,
-            "rows": df.to_dict(orient="records"),
-            "message": query_result.message,
-            "count_rows": len(df),
-            "time_execution": round((end - start) * 1000)
-        }
-    else:
-        return {
-            "columns": [],
-            "rows": [],
-            "message": query_result.message,
-            "count_rows": 0,
-            "time_execution": round((end - start) * 1000)
-        }
+def get_buffer_pool_stats():
+    """Contadores del buffer pool compartido (hits, misses, desalojos...)."""
+    return DBManager.buffer_pool_stats()
+
 
 if __name__ == "__main__":
     result = execute_consulta("")
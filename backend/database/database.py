@@ -12,6 +12,7 @@ from typing import List, Tuple, Optional, Union
 from collections import Counter, defaultdict
 
 from storage.HeapFile import HeapFile
+from storage.TableRegistry import TableRegistry
 from storage.Record import Record
 from storage.Sound import Sound
 from storage.HistogramFile import HistogramFile
@@ -53,8 +54,7 @@ def get_table_schema(table_name: str):
     if not check_table_exists(table_name):
         raise Exception(f"Table {table_name} does not exist")
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)  # TODO: load schema from file instead of creating heapfile
-    return heap.schema
+    return TableRegistry.schema(table_path)
 
 
 # =============================================================================
@@ -62,11 +62,18 @@ def get_table_schema(table_name: str):
 # =============================================================================
 
 
-def create_table(table_name: str, schema: List[Tuple[str, str]], primary_key: str) -> None:
+def create_table(
+    table_name: str,
+    schema: List[Tuple[str, str]],
+    primary_key: str,
+    storage: str = "heap",
+    compression: Optional[dict] = None,
+) -> None:
     for field_name, field_type in schema:
         if field_type.upper() == "SOUND":
             HistogramFile.build_file(_table_path(table_name), field_name)
-    HeapFile.build_file(_table_path(table_name), schema, primary_key)
+    HeapFile.build_file(_table_path(table_name), schema, primary_key, storage, compression)
+    TableRegistry.invalidate(_table_path(table_name))
 
 def create_table_with_btree_pk(
     table_name: str,
@@ -95,9 +102,12 @@ def drop_table(table_name: str) -> None:
         schema = get_table_schema(table_name)
         for field_name, field_type in schema:
             if field_type.lower() == "text":
-                txt_path = f"{table_path}.{field_name}.text"
-                if os.path.exists(txt_path):
-                    os.remove(txt_path)
+                for ext in (".text", ".ztext", ".ztext.map", ".ztext.dict"):
+                    txt_path = f"{table_path}.{field_name}{ext}"
+                    if os.path.exists(txt_path):
+                        os.remove(txt_path)
+            if os.path.exists(f"{table_path}.{field_name}.bloom"):
+                os.remove(f"{table_path}.{field_name}.bloom")
     except Exception:
         # Si no existe la tabla o no se puede cargar el esquema, dejamos que
         # el flujo siga para lanzar el error correspondiente más abajo
@@ -112,13 +122,16 @@ def drop_table(table_name: str) -> None:
         raise FileNotFoundError(f"La tabla '{table_name}' no existe.")
     os.remove(dat_path)
 
-    # Eliminar el archivo principal de la tabla
-    os.remove(f"{table_path}.dat")
+    # Eliminar el bitmap de registros vivos y el mapa de zonas
+    for ext in (".live", ".zone", ".stats.json"):
+        if os.path.exists(f"{table_path}{ext}"):
+            os.remove(f"{table_path}{ext}")
 
     if not os.path.exists(f"{table_path}.schema.json"):
         raise FileNotFoundError(f"El archivo de esquema de la tabla '{table_name}' no existe.")
 
     os.remove(f"{table_path}.schema.json")
+    TableRegistry.invalidate(table_path)
 
     print(f"Tabla '{table_name}' eliminada correctamente.")
 
@@ -130,7 +143,7 @@ def drop_table(table_name: str) -> None:
 
 def insert_record(table_name: str, record: Record) -> int:
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
 
     values = list(record.values)
     for i, (field_name, field_type) in enumerate(record.schema):
@@ -150,13 +163,13 @@ def insert_record(table_name: str, record: Record) -> int:
 def insert_record_free(table_name: str, record: Record) -> int:
     """Esto es de testing (no usar en frontend)"""
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
     return heap.insert_record_free(record)
 
 
 def insert_record_hash_pk(table_name: str, record: Record) -> int:
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
 
     if heap.primary_key is None:
         raise ValueError(f"La tabla '{table_name}' no tiene clave primaria.")
@@ -175,7 +188,7 @@ def insert_record_hash_pk(table_name: str, record: Record) -> int:
 
 def insert_record_btree_pk(table_name: str, record: Record) -> int:
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
 
     if heap.primary_key is None:
         raise ValueError(f"La tabla '{table_name}' no tiene clave primaria.")
@@ -195,7 +208,7 @@ def insert_record_btree_pk(table_name: str, record: Record) -> int:
 
 def insert_record_rtree_pk(table_name: str, record: Record) -> int:
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
 
     if heap.primary_key is None:
         raise ValueError(f"La tabla '{table_name}' no tiene clave primaria.")
@@ -215,7 +228,7 @@ def insert_record_rtree_pk(table_name: str, record: Record) -> int:
 
 def delete_record(table_name: str, pk_value):
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
     ok, offset, old_rec = heap.delete_by_pk(pk_value)
     if not ok:
         return False
@@ -229,50 +242,50 @@ def delete_record(table_name: str, pk_value):
 
 
 def search_by_field(table_name: str, field_name: str, value, crude_data=False) -> List[Record]:
-    return HeapFile(_table_path(table_name)).search_by_field(field_name, value, crude_data)
+    return TableRegistry.heap(_table_path(table_name)).search_by_field(field_name, value, crude_data)
 
 
 def search_seq_idx(table_name: str, field_name: str, field_value):
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
-    seq_idx = SequentialIndex(table_path, field_name)
+    heap = TableRegistry.heap(table_path)
+    seq_idx = TableRegistry.sequential_index(table_path, field_name)
     return [heap.fetch_record_by_offset(r.offset) for r in seq_idx.search_record(field_value)]
 
 
 def search_btree_idx(table_name: str, field_name: str, field_value):
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
-    btree = BPlusTreeIndexWrapper(table_path, field_name)
+    heap = TableRegistry.heap(table_path)
+    btree = TableRegistry.btree_index(table_path, field_name)
     offsets = btree.search(field_value)
     return [heap.fetch_record_by_offset(off) for off in offsets] if offsets else []
 
 
 def search_btree_idx_range(table_name: str, field_name: str, start_value, end_value):
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
-    btree = BPlusTreeIndexWrapper(table_path, field_name)
+    heap = TableRegistry.heap(table_path)
+    btree = TableRegistry.btree_index(table_path, field_name)
     offsets = btree.range_search(start_value, end_value)
     return [heap.fetch_record_by_offset(off) for off in offsets] if offsets else []
 
 
 def search_hash_idx(table_name: str, field_name: str, field_value):
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
-    hidx = ExtendibleHashIndex(table_path, field_name)
+    heap = TableRegistry.heap(table_path)
+    hidx = TableRegistry.hash_index(table_path, field_name)
     return [heap.fetch_record_by_offset(r.offset) for r in hidx.search_record(field_value)]
 
 
 def search_seq_idx_range(table_name: str, field_name: str, start_value, end_value):
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
-    idx = SequentialIndex(table_path, field_name)
+    heap = TableRegistry.heap(table_path)
+    idx = TableRegistry.sequential_index(table_path, field_name)
     records = idx.search_range(start_value, end_value)
     return [heap.fetch_record_by_offset(rec.offset) for rec in records]
 
 
 def search_rtree_record(table_name: str, field_name: str, point: Tuple[Union[int, float], ...]) -> List[Record]:
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
     rtree = RTreeIndex(table_path, field_name)
     records = rtree.search_record(point)
     return [heap.fetch_record_by_offset(rec.offset) for rec in records]
@@ -285,7 +298,7 @@ def search_rtree_bounds(
     upper_bound: Tuple[Union[int, float], ...],
 ) -> List[Record]:
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
     rtree = RTreeIndex(table_path, field_name)
     records = rtree.search_bounds(lower_bound, upper_bound)
     return [heap.fetch_record_by_offset(rec.offset) for rec in records]
@@ -298,7 +311,7 @@ def search_rtree_radius(
     radius: float,
 ) -> List[Record]:
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
     rtree = RTreeIndex(table_path, field_name)
     records = rtree.search_radius(point, radius)
     return [heap.fetch_record_by_offset(rec.offset) for rec in records]
@@ -306,7 +319,7 @@ def search_rtree_radius(
 
 def search_rtree_knn(table_name: str, field_name: str, point: Tuple[Union[int, float], ...], k: int) -> List[Record]:
     table_path = _table_path(table_name)
-    heap = HeapFile(table_path)
+    heap = TableRegistry.heap(table_path)
     rtree = RTreeIndex(table_path, field_name)
     records = rtree.search_knn(point, k)
     return [heap.fetch_record_by_offset(rec.offset) for rec in records]
@@ -372,25 +385,25 @@ def _remove_from_secondary_indexes(table_path: str, record: Optional[Record], of
 # TODO: allow for index_name
 def create_seq_idx(table_name: str, field_name: str):
     path = _table_path(table_name)
-    SequentialIndex.build_index(path, HeapFile(path).extract_index, field_name)
+    SequentialIndex.build_index(path, TableRegistry.heap(path).extract_index, field_name)
     print(f"Índice secuencial creado para '{field_name}' en la tabla '{table_name}'.")
 
 
 def create_btree_idx(table_name: str, field_name: str):
     path = _table_path(table_name)
-    BPlusTreeIndex.build_index(path, HeapFile(path).extract_index, field_name)
+    BPlusTreeIndex.build_index(path, TableRegistry.heap(path).extract_index, field_name)
     print(f"Índice B+ Tree creado para '{field_name}' en la tabla '{table_name}'.")
 
 
 def create_hash_idx(table_name: str, field_name: str):
     path = _table_path(table_name)
-    ExtendibleHashIndex.build_index(path, HeapFile(path).extract_index, field_name)
+    ExtendibleHashIndex.build_index(path, TableRegistry.heap(path).extract_index, field_name)
     print(f"Índice Extendible Hash creado para '{field_name}' en la tabla '{table_name}'.")
 
 
 def create_rtree_idx(table_name: str, field_name: str):
     path = _table_path(table_name)
-    RTreeIndex.build_index(path, HeapFile(path).extract_index, field_name)
+    RTreeIndex.build_index(path, TableRegistry.heap(path).extract_index, field_name)
     print(f"Índice R-Tree creado para '{field_name}' en la tabla '{table_name}'.")
 
 
@@ -459,7 +472,7 @@ def drop_all_indexes_for_field(table_name: str, field_name: str) -> None:
 
 def drop_all_indexes(table_name: str) -> None:
     path = _table_path(table_name)
-    heap = HeapFile(path)
+    heap = TableRegistry.heap(path)
     fields = [name for name, _ in heap.schema]
     for field in fields:
         drop_all_indexes_for_field(table_name, field)
@@ -502,7 +515,7 @@ def check_inverted_idx(table_name: str, field_name: str) -> bool:
 
 
 def print_table(table_name: str):
-    HeapFile(_table_path(table_name)).print_all()
+    TableRegistry.heap(_table_path(table_name)).print_all()
 
 
 def print_seq_idx(table_name: str, field_name: str):
@@ -549,7 +562,7 @@ def build_acoustic_model(table_name: str, field_name: str, num_clusters: int):
         field_name (str): Nombre del campo de tipo SOUND.
         num_clusters (int): Número de clusters para K-Means.
     """
-    heap_file = HeapFile(_table_path(table_name))
+    heap_file = TableRegistry.heap(_table_path(table_name))
 
     # 1. Construir el codebook
     from multimedia.codebook import build_codebook
@@ -602,7 +615,7 @@ def knn_search(table_name: str, field_name: str, query_audio_path: str, k: int)
     Logger.log_debug("Starting sequential audio KNN")
     from multimedia.knn import knn_sequential_search
 
-    heap_file = HeapFile(_table_path(table_name))
+    heap_file = TableRegistry.heap(_table_path(table_name))
     return knn_sequential_search(query_audio_path, heap_file, field_name, k)
 
 
@@ -626,7 +639,7 @@ def knn_search_index(table_name: str, field_name: str, query_audio_path: str, k:
     if query_histogram is None:
         return []
 
-    N = HeapFile(_table_path(table_name)).heap_size
+    N = TableRegistry.heap(_table_path(table_name)).heap_size
     query_tfidf = np.zeros(len(codebook["centroids"]))
     for i, count in enumerate(query_histogram):
         if count > 0:
@@ -638,8 +651,10 @@ def knn_search_index(table_name: str, field_name: str, query_audio_path: str, k:
     relevant_docs = set()
 
     # 3. Buscar términos en el índice acústico
-    acoustic_index = HeapFile(_table_path(f"{table_name}.{field_name}.idx"))
-    hash_idx = ExtendibleHashIndex(_table_path(f"{table_name}.{field_name}.idx"), "term")
+    acoustic_index = TableRegistry.heap(_table_path(f"{table_name}.{field_name}.idx"))
+    hash_idx = TableRegistry.hash_index(_table_path(f"{table_name}.{field_name}.idx"), "term")
+    norms_table = TableRegistry.heap(_table_path(f"{table_name}.{field_name}.idx_norms"))
+    hash_idx_norms = TableRegistry.hash_index(_table_path(f"{table_name}.{field_name}.idx_norms"), "doc_id")
     #acoustic_index.print_all()
     for term_id, tfidf_query in enumerate(query_tfidf):
         if tfidf_query > 0:
@@ -663,8 +678,6 @@ def knn_search_index(table_name: str, field_name: str, query_audio_path: str, k:
                 relevant_docs.add(doc_id)
 
                 if doc_id not in doc_norms:
-                    norms_table = HeapFile(_table_path(f"{table_name}.{field_name}.idx_norms"))
-                    hash_idx_norms = ExtendibleHashIndex(_table_path(f"{table_name}.{field_name}.idx_norms"), "doc_id")
                     norm_records = hash_idx_norms.search_record(doc_id)
                     if norm_records:
                         record = norms_table.fetch_record_by_offset(norm_records[0].offset)
@@ -690,7 +703,7 @@ def knn_search_index(table_name: str, field_name: str, query_audio_path: str, k:
 
     # 6. Recuperar registros completos
     results = []
-    source_table = HeapFile(_table_path(table_name))
+    source_table = TableRegistry.heap(_table_path(table_name))
 
     for doc_id, score in top_k:
         matching_recs = source_table.search_offsets_by_field("id", doc_id)
@@ -747,8 +760,9 @@ def search_text(table_name: str, query: str, k: int = 5) -> set[int]:
     relevant_docs = set()
 
     # 4. Buscar términos en índice invertido
-    inverted_index = HeapFile(_table_path("inverted_index"))
-    hash_idx = ExtendibleHashIndex(_table_path("inverted_index"), "term")
+    inverted_index = TableRegistry.heap(_table_path("inverted_index"))
+    hash_idx = TableRegistry.hash_index(_table_path("inverted_index"), "term")
+    norms_table = TableRegistry.heap(_table_path("inverted_index_norms"))
 
     for term in unique_query_terms:
         # 4.1 Buscar término usando índice hash
@@ -776,7 +790,6 @@ def search_text(table_name: str, query: str, k: int = 5) -> set[int]:
             # Almacenar norma si no está cargada
             if doc_id not in doc_norms:
                 # Buscar norma para este doc (implementación optimizada)
-                norms_table = HeapFile(_table_path("inverted_index_norms"))
                 norm_records = norms_table.search_by_field("doc_id", doc_id)
                 if norm_records:
                     doc_norms[doc_id] = norm_records[0].values[1]  # values[1] = norm
@@ -795,7 +808,7 @@ def search_text(table_name: str, query: str, k: int = 5) -> set[int]:
     top_k = scored_docs[:k]
 
     # 7. Recuperar registros completos
-    heap_file = HeapFile(_table_path(table_name))
+    heap_file = TableRegistry.heap(_table_path(table_name))
     offsets: set[int] = {heap_file.search_offsets_by_field("id", doc_id)[0] for doc_id, _ in top_k}
     Logger.log_debug(f"Obtained offsets: {offsets}")
 
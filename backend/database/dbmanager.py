@@ -2,11 +2,18 @@ import os
 import glob
 import time
 
-from typing import List, Tuple, Optional, Union, Set
+from typing import Callable, List, Tuple, Optional, Union, Set
 
+import numpy as np
 import pandas as pd
 from storage.HeapFile import HeapFile
+from storage.TableRegistry import TableRegistry
 from storage.Record import Record
+from storage.BufferPool import BufferPool
+from storage.WriteAheadLog import WriteAheadLog
+from storage.ZoneMap import COUNT_FIELD, ZONE_SLOTS
+from storage.BloomFilter import BloomFilter, DEFAULT_FP_RATE
+from storage.TableStats import TableStats
 from indexing.SequentialIndex import SequentialIndex
 from indexing.ExtendibleHashIndex import ExtendibleHashIndex
 from indexing.BPlusTreeIndex import BPlusTreeIndex, BPlusTreeIndexWrapper
@@ -52,6 +59,9 @@ class DBManager:
         if hasattr(self, "_initialized") and self._initialized:  # gpt
             return
         self._initialized = True
+        # replay whatever a previous run left committed in the log
+        if WriteAheadLog.get() is None:
+            WriteAheadLog.recover(DBManager.wal_path())
 
     # region Helper methods
     @staticmethod
@@ -79,14 +89,41 @@ class DBManager:
     @staticmethod
     def get_table_schema(table_name: str):
         DBManager.verify_table_exists(table_name)
-        schema_path = DBManager.table_path(table_name) + ".schema.json"
-        heapfile = HeapFile(DBManager.table_path(table_name))
-        return heapfile.schema
+        return TableRegistry.schema(DBManager.table_path(table_name))
 
     @staticmethod
-    def get_table_heap(table_name: str) -> HeapFile:
+    def get_table_heap(table_name: str, use_mmap: bool = False) -> HeapFile:
         DBManager.verify_table_exists(table_name)
-        return HeapFile(DBManager.table_path(table_name))
+        return TableRegistry.heap(DBManager.table_path(table_name), use_mmap=use_mmap)
+
+    @staticmethod
+    def buffer_pool_stats() -> dict:
+        """Hit/miss counters and occupancy of the shared page buffer pool."""
+        stats = BufferPool.get().stats()
+        wal = WriteAheadLog.get()
+        stats["wal"] = wal.stats() if wal is not None else None
+        return stats
+
+    @staticmethod
+    def wal_path() -> str:
+        return os.path.join(DBManager.tables_dir, "yarasca.wal")
+
+    @staticmethod
+    def end_statement() -> None:
+        """Closes a statement: persists the statistics it changed, then commits it to
+        the write-ahead log (so both land in the same log transaction)."""
+        TableRegistry.save_stats()
+        WriteAheadLog.commit()
+
+    @staticmethod
+    def configure_durability(durability: Optional[str], group_ms: int = 10) -> None:
+        """durability: "statement" (fsync per statement), "group" (fsync every group_ms ms)
+        or "off" (log without fsync, for bulk loads) turn the write-ahead log on and the
+        buffer pool to write-back. None turns it off (checkpoint, back to write-through)."""
+        if durability is None:
+            WriteAheadLog.disable()
+        else:
+            WriteAheadLog.enable(DBManager.wal_path(), durability, group_ms)
 
     @staticmethod
     def get_field_format(table_name: str, field_name: str) -> str:
@@ -227,7 +264,7 @@ class DBManager:
         if type not in (ColumnType.INT, ColumnType.FLOAT, ColumnType.VARCHAR):
             raise ValueError(f"Unsupported index for field {field_name} of type {type} in table {table_name}.")
         path = DBManager.table_path(table_name)
-        SequentialIndex.build_index(path, HeapFile(path).extract_index, field_name)
+        SequentialIndex.build_index(path, TableRegistry.heap(path).extract_index, field_name)
 
     @staticmethod
     def create_hash_idx(table_name: str, field_name: str) -> None:
@@ -235,7 +272,7 @@ class DBManager:
         if type not in (ColumnType.INT, ColumnType.VARCHAR):
             raise ValueError(f"Unsupported hash index for field {field_name} of type {type} in table {table_name}.")
         path = DBManager.table_path(table_name)
-        ExtendibleHashIndex.build_index(path, HeapFile(path).extract_index, field_name)
+        ExtendibleHashIndex.build_index(path, TableRegistry.heap(path).extract_index, field_name)
 
     @staticmethod
     def create_btree_idx(table_name: str, field_name: str) -> None:
@@ -243,7 +280,7 @@ class DBManager:
         if type not in (ColumnType.INT, ColumnType.FLOAT, ColumnType.VARCHAR):
             raise ValueError(f"Índice B+Tree no soportado para el campo {field_name} de tipo {type} en la tabla {table_name}.")
         path = DBManager.table_path(table_name)
-        BPlusTreeIndex.build_index(path, HeapFile(path).extract_index, field_name)
+        BPlusTreeIndex.build_index(path, TableRegistry.heap(path).extract_index, field_name)
 
     @staticmethod
     def create_rtree_idx(table_name: str, field_name: str) -> None:
@@ -251,7 +288,19 @@ class DBManager:
         if type not in (ColumnType.POINT2D, ColumnType.POINT3D):
             raise ValueError(f"Índice R-Tree no soportado para el campo {field_name} de tipo {type} en la tabla {table_name}.")
         path = DBManager.table_path(table_name)
-        RTreeIndex.build_index(path, HeapFile(path).extract_index, field_name)
+        RTreeIndex.build_index(path, TableRegistry.heap(path).extract_index, field_name)
+
+    @staticmethod
+    def create_bloom_filter(table_name: str, field_name: str, fp_rate: float = DEFAULT_FP_RATE) -> None:
+        """Per-block Bloom filter on a column, sized for `fp_rate`. Not an index:
+        equality scans use it to skip blocks that can't hold the value."""
+        fmt = dict(DBManager.get_table_schema(table_name)).get(field_name)
+        if fmt is None or not BloomFilter.supports(fmt):
+            raise ValueError(f"Filtro de Bloom no soportado para el campo {field_name} en la tabla {table_name}.")
+        path = DBManager.table_path(table_name)
+        heap = TableRegistry.heap(path)
+        BloomFilter.build_file(f"{path}.{field_name}.bloom", fmt, fp_rate, heap.to_numpy()[field_name], heap.live_mask())
+        TableRegistry.invalidate(path)  # reopen the heap so it maintains the new filter
 
     @staticmethod
     def create_spimi_idx(table_name: str) -> None:
@@ -276,7 +325,7 @@ class DBManager:
     @staticmethod
     def check_hash_idx(table_name: str, field: str) -> bool:
         table_path = DBManager.table_path(table_name)
-        index_paths = (f"{table_path}.{field}.btree.{ext}" for ext in ("idx", "db", "tree"))
+        index_paths = (f"{table_path}.{field}.hash.{ext}" for ext in ("idx", "db", "tree"))
         return all(os.path.exists(index_path) for index_path in index_paths)
 
     @staticmethod
@@ -285,6 +334,10 @@ class DBManager:
         index_path = f"{table_path}.{field}.btree.idx"
         return os.path.exists(index_path)
 
+    @staticmethod
+    def check_bloom_filter(table_name: str, field: str) -> bool:
+        return os.path.exists(f"{DBManager.table_path(table_name)}.{field}.bloom")
+
     @staticmethod
     def check_rtree_idx(table_name: str, field: str) -> bool:
         table_path = DBManager.table_path(table_name)
@@ -304,7 +357,7 @@ class DBManager:
     @staticmethod
     def drop_hash_idx(table_name: str, field) -> None:
         table_path = DBManager.table_path(table_name)
-        index_paths = (f"{table_path}.{field}.btree.{ext}" for ext in ("idx", "db", "tree"))
+        index_paths = (f"{table_path}.{field}.hash.{ext}" for ext in ("idx", "db", "tree"))
         for index_path in index_paths:
             if not os.path.exists(index_path):
                 raise FileNotFoundError(f"Índice Hash para {field} en la tabla {table_name} no existe.")
@@ -330,6 +383,17 @@ class DBManager:
             os.remove(index_path)
         Logger.log_dbmanager(f"Índice R-Tree para {field} en la tabla {table_name} eliminado con éxito.")
 
+    @staticmethod
+    def drop_bloom_filter(table_name: str, field) -> None:
+        table_path = DBManager.table_path(table_name)
+        bloom_path = f"{table_path}.{field}.bloom"
+        if not os.path.exists(bloom_path):
+            raise FileNotFoundError(f"Filtro de Bloom para {field} en la tabla {table_name} no existe.")
+        os.remove(bloom_path)
+        BufferPool.get().invalidate(bloom_path)
+        TableRegistry.invalidate(table_path)
+        Logger.log_dbmanager(f"Filtro de Bloom para {field} en la tabla {table_name} eliminado con éxito.")
+
     @staticmethod
     def drop_all_indexes_field(table_name: str, field: str) -> None:
         if DBManager.check_seq_idx(table_name, field):
@@ -340,6 +404,8 @@ class DBManager:
             DBManager.drop_btree_idx(table_name, field)
         if DBManager.check_rtree_idx(table_name, field):
             DBManager.drop_rtree_idx(table_name, field)
+        if DBManager.check_bloom_filter(table_name, field):
+            DBManager.drop_bloom_filter(table_name, field)
 
     @staticmethod
     def drop_all_indexes_table(table_name: str) -> None:
@@ -351,7 +417,15 @@ class DBManager:
     # region Index update
     @staticmethod
     def update_secondary_indexes(table_path: str, record: Record, offset: int) -> None:
-        schema = record.schema
+        DBManager.update_secondary_indexes_many(table_path, [record], [offset])
+
+    @staticmethod
+    def update_secondary_indexes_many(table_path: str, records: List[Record], offsets: List[int]) -> None:
+        """Globs the index files once and opens each index once for the whole batch."""
+        if not records:
+            return
+        schema = records[0].schema
+        names = [n for n, _ in schema]
         for idx_file in glob.glob(f"{table_path}.*.*.idx"):
             parts = os.path.basename(idx_file).split(".")
             if len(parts) < 4:
@@ -360,18 +434,19 @@ class DBManager:
             field_type = next((fmt for name, fmt in schema if name == field_name), None)
             if field_type is None:
                 continue
-            value = record.values[[n for n, _ in schema].index(field_name)]
-            idx_rec = IndexRecord(field_type, value, offset)
             if idx_type == "seq":
-                SequentialIndex(table_path, field_name).insert_record(idx_rec)
+                index = SequentialIndex(table_path, field_name)
             elif idx_type == "hash":
-                ExtendibleHashIndex(table_path, field_name).insert_record(idx_rec)
+                index = ExtendibleHashIndex(table_path, field_name)
             elif idx_type == "btree":
-                start = time.time()
-                BPlusTreeIndexWrapper(table_path, field_name).insert_record(idx_rec)
-                end = time.time()
+                index = BPlusTreeIndexWrapper(table_path, field_name)
             elif idx_type == "rtree":
-                RTreeIndex(table_path, field_name).insert_record(idx_rec)
+                index = RTreeIndex(table_path, field_name)
+            else:
+                continue
+            pos = names.index(field_name)
+            for record, offset in zip(records, offsets):
+                index.insert_record(IndexRecord(field_type, record.values[pos], offset))
 
     @staticmethod
     def remove_from_secondary_indexes(table_path: str, record: Optional[Record], offset: int) -> None:
@@ -396,15 +471,99 @@ class DBManager:
             elif idx_type == "rtree":
                 RTreeIndex(table_path, field_name).delete_record(value, offset)
 
+    # region Statistics
+    @staticmethod
+    def get_table_stats(table_name: str) -> Optional[TableStats]:
+        """Statistics collected by ANALYZE (kept up to date on insert/delete), or None."""
+        return TableRegistry.stats(DBManager.table_path(table_name))
+
+    @staticmethod
+    def update_table_stats(table_path: str, schema: list, inserted: list | None = None, deleted: int = 0) -> None:
+        """Incremental refresh after a write, kept in memory until end_statement();
+        a no-op for tables never analyzed."""
+        stats = TableRegistry.stats(table_path)
+        if stats is None:
+            return
+        if inserted:
+            stats.record_insert(schema, inserted)
+        if deleted:
+            stats.record_delete(deleted)
+
+    @staticmethod
+    def estimate_selectivity(table_name: str, field: str, op: OperationType, value) -> float | None:
+        """Estimated fraction of rows with `field <op> value`, or None without statistics."""
+        stats = DBManager.get_table_stats(table_name)
+        if stats is None:
+            return None
+        ops = {
+            OperationType.EQUAL: "=",
+            OperationType.NOT_EQUAL: "!=",
+            OperationType.GREATER_THAN: ">",
+            OperationType.LESS_THAN: "<",
+            OperationType.GREATER__EQUAL: ">=",
+            OperationType.LESS__EQUAL: "<=",
+            OperationType.BETWEEN: "between",
+        }
+        if op not in ops:
+            return None
+        return stats.selectivity(field, ops[op], value)
+
+    # region Index rebuild
+    @staticmethod
+    def rebuild_secondary_indexes(table_path: str) -> None:
+        """Rebuilds every seq/hash/btree/rtree index of the table from a single heap scan.
+        Used after VACUUM, when all the offsets stored in the indexes changed."""
+        prefix = os.path.basename(table_path) + "."
+        indexes = []
+        for idx_file in glob.glob(f"{table_path}.*.*.idx"):
+            parts = os.path.basename(idx_file)[len(prefix) : -len(".idx")].split(".")
+            if len(parts) == 2 and parts[1] in ("seq", "hash", "btree", "rtree"):
+                indexes.append((parts[0], parts[1]))
+        if not indexes:
+            return
+
+        heap = TableRegistry.heap(table_path)
+        names = [n for n, _ in heap.schema]
+        fields = {field for field, _ in indexes if field in names}
+        entries = {field: [] for field in fields}
+        positions = [(field, names.index(field)) for field in fields]
+        for offset, values in heap._scan():
+            for field, pos in positions:
+                entries[field].append((values[pos], offset))
+
+        def extract(field):
+            return list(entries[field])
+
+        pool = BufferPool.get()
+        for field, idx_type in indexes:
+            if field not in entries:
+                continue
+            base = f"{table_path}.{field}"
+            if idx_type == "seq":
+                SequentialIndex.build_index(table_path, extract, field)
+            elif idx_type == "hash":
+                for path in (f"{base}.hash.db", f"{base}.hash.tree"):
+                    if os.path.exists(path):
+                        os.remove(path)
+                    pool.invalidate(path)
+                ExtendibleHashIndex.build_index(table_path, extract, field)
+            elif idx_type == "btree":
+                os.remove(f"{base}.btree.idx")
+                pool.invalidate(f"{base}.btree.idx")
+                BPlusTreeIndex.build_index(table_path, extract, field)
+            elif idx_type == "rtree":
+                RTreeIndex.build_index(table_path, extract, field)
+            Logger.log_dbmanager(f"Índice {idx_type} para {field} reconstruido.")
+
     # region Index search
     @staticmethod
     def search_by_field(table_name: str, field_name: str, value):
-        return HeapFile(DBManager.table_path(table_name)).search_by_field(field_name, value)
+        return TableRegistry.heap(DBManager.table_path(table_name)).search_by_field(field_name, value)
 
     @staticmethod
     def search_seq_idx(table_name: str, field_name: str, value: Union[int, float, str]) -> Set[int]:
         table_path = DBManager.table_path(table_name)
-        idx = SequentialIndex(table_path, field_name)
+        idx = TableRegistry.sequential_index(table_path, field_name)
         return {r.offset for r in idx.search_record(value)}
 
     @staticmethod
@@ -414,19 +573,19 @@ class DBManager:
         range: Tuple[Union[int, float, str], Union[int, float, str]],
     ) -> Set[int]:
         table_path = DBManager.table_path(table_name)
-        idx = SequentialIndex(table_path, field_name)
+        idx = TableRegistry.sequential_index(table_path, field_name)
         return {r.offset for r in idx.search_range(range[0], range[1])}
 
     @staticmethod
     def search_hash_idx(table_name: str, field_name: str, value: Union[int, str]) -> Set[int]:
         table_path = DBManager.table_path(table_name)
-        idx = ExtendibleHashIndex(table_path, field_name)
+        idx = TableRegistry.hash_index(table_path, field_name)
         return {r.offset for r in idx.search_record(value)}
 
     @staticmethod
     def search_btree_idx(table_name: str, field_name: str, field_value) -> Set[int]:
         table_path = DBManager.table_path(table_name)
-        idx = BPlusTreeIndexWrapper(table_path, field_name)
+        idx = TableRegistry.btree_index(table_path, field_name)
         return set(idx.search(field_value))
 
     @staticmethod
@@ -436,7 +595,7 @@ class DBManager:
         range: Tuple[Union[int, float, str], Union[int, float, str]],
     ) -> Set[int]:
         table_path = DBManager.table_path(table_name)
-        idx = BPlusTreeIndexWrapper(table_path, field_name)
+        idx = TableRegistry.btree_index(table_path, field_name)
         return set(idx.range_search(range[0], range[1]))
 
     @staticmethod
@@ -481,8 +640,11 @@ class DBManager:
         table_name: str,
         schema: List[Tuple[str, str]],
         primary_key: Optional[str] = None,
+        storage: str = "heap",
+        compression: Optional[dict] = None,
     ) -> None:
-        HeapFile.build_file(DBManager.table_path(table_name), schema, primary_key)  # "text" might be sent here
+        HeapFile.build_file(DBManager.table_path(table_name), schema, primary_key, storage, compression)  # "text" might be sent here
+        TableRegistry.invalidate(DBManager.table_path(table_name))
         Logger.log_dbmanager(f"Tabla {table_name} creada con éxito.")
 
     @staticmethod
@@ -491,11 +653,30 @@ class DBManager:
         table_path = DBManager.table_path(table_name)
         os.remove(f"{table_path}.dat")
         os.remove(f"{table_path}.schema.json")
+        for ext in (".live", ".zone", ".stats.json"):
+            if os.path.exists(f"{table_path}{ext}"):
+                os.remove(f"{table_path}{ext}")
+            BufferPool.get().invalidate(f"{table_path}{ext}")
+        TableRegistry.invalidate(table_path)
+
+    @staticmethod
+    def vacuum_table_aux(table_name: str) -> Tuple[int, int]:
+        """Compacts the heap and its text/sound/histogram files, then rebuilds the indexes.
+        SPIMI postings are keyed by primary key, so they survive the offset change as is.
+        Returns (live records, reclaimed slots)."""
+        table_path = DBManager.table_path(table_name)
+        heap = TableRegistry.heap(table_path)
+        before = heap.heap_size
+        moved = heap.vacuum()
+        TableRegistry.invalidate(table_path)
+        DBManager.rebuild_secondary_indexes(table_path)
+        Logger.log_dbmanager(f"Tabla {table_name} compactada: {before} -> {len(moved)} slots.")
+        return len(moved), before - len(moved)
 
     @staticmethod
     def insert_record(table_name: str, record: Record) -> int:
         table_path = DBManager.table_path(table_name)
-        heap = HeapFile(table_path)
+        heap = TableRegistry.heap(table_path)
 
         values = list(record.values)
         for i, (field_name, field_type) in enumerate(record.schema):
@@ -508,25 +689,58 @@ class DBManager:
         record.values = list(values)
         offset = heap.insert_record(record)
         DBManager.update_secondary_indexes(table_path, record, offset)
+        DBManager.update_table_stats(table_path, heap.schema, inserted=[record.values])
+        DBManager.end_statement()
         return offset
 
+    @staticmethod
+    def insert_many(table_name: str, records: List[Record]) -> List[int]:
+        """Bulk insert: one heap append/header write and one index maintenance pass."""
+        table_path = DBManager.table_path(table_name)
+        heap = TableRegistry.heap(table_path)
+        offsets = heap.insert_many(records)
+        DBManager.update_secondary_indexes_many(table_path, records, offsets)
+        DBManager.update_table_stats(table_path, heap.schema, inserted=[r.values for r in records])
+        DBManager.end_statement()
+        return offsets
+
     @staticmethod
     def delete_record(table_name: str, pk_value):
         table_path = DBManager.table_path(table_name)
-        heap = HeapFile(table_path)
+        heap = TableRegistry.heap(table_path)
         ok, offset, old_rec = heap.delete_by_pk(pk_value)
         if not ok:
             return False
         DBManager.remove_from_secondary_indexes(table_path, old_rec, offset)
+        DBManager.update_table_stats(table_path, heap.schema, deleted=1)
+        DBManager.end_statement()
+        return True
+
+    @staticmethod
+    def delete_record_at(table_name: str, offset: int) -> bool:
+        """Deletes by slot offset, so it also works on tables without a primary key."""
+        table_path = DBManager.table_path(table_name)
+        heap = TableRegistry.heap(table_path)
+        ok, offset, old_rec = heap.delete_by_offset(offset)
+        if not ok:
+            return False
+        DBManager.remove_from_secondary_indexes(table_path, old_rec, offset)
+        DBManager.update_table_stats(table_path, heap.schema, deleted=1)
+        DBManager.end_statement()
         return True
 
     # region Parser helpers
 
-    def create_table(self, table_name: str, columns: list[CreateColumnDefinition]) -> None:
+    def create_table(self, table_name: str, columns: list[CreateColumnDefinition], storage: str = "heap") -> None:
         DBManager.verify_table_not_exists(table_name)
         schema: SchemaType = []
         pk: str = ""
+        compression: dict = {}
         for column in columns:
+            if column.compression:
+                if column.column_type != ColumnType.TEXT:
+                    raise ValueError(f"Only TEXT columns can be compressed, '{column.column_name}' is {column.column_type}.")
+                compression[column.column_name] = column.compression
             format: str = DBManager.type_to_format(column.column_type, column.varchar_length)
             if column.is_pk:
                 if pk:
@@ -537,13 +751,24 @@ class DBManager:
             if field_type.upper() == "SOUND":
                 HistogramFile.build_file(DBManager.table_path(table_name), field_name)
         Logger.log_dbmanager(f"Tabla '{table_name}' creada con éxito.")
-        DBManager.create_table_aux(table_name, schema, pk)
+        DBManager.create_table_aux(table_name, schema, pk, storage, compression)
 
     def drop_table(self, table_name: str) -> None:
         if not DBManager.check_table_exists(table_name):
             raise ValueError(f"La tabla '{table_name}' no existe.")
         DBManager.drop_table_aux(table_name)
 
+    def analyze_table(self, table_name: str) -> TableStats:
+        DBManager.verify_table_exists(table_name)
+        heap = DBManager.get_table_heap(table_name, use_mmap=True)
+        stats = TableStats.analyze(DBManager.table_path(table_name), heap.schema, heap.to_numpy(), heap.live_mask())
+        Logger.log_dbmanager(f"Tabla {table_name} analizada: {stats.row_count} filas.")
+        return stats
+
+    def vacuum_table(self, table_name: str) -> Tuple[int, int]:
+        DBManager.verify_table_exists(table_name)
+        return DBManager.vacuum_table_aux(table_name)
+
     def create_index(self, table_name: str, field_name: str, index_type: IndexType) -> None:
         DBManager.verify_table_exists(table_name)
         match index_type:
@@ -559,6 +784,8 @@ class DBManager:
                 DBManager.create_spimi_idx(table_name)
             case IndexType.SPIMIAUDIO:
                 DBManager.create_spimi_audio_idx(table_name, field_name)
+            case IndexType.BLOOM:
+                DBManager.create_bloom_filter(table_name, field_name)
             case _:
                 raise ValueError(f"Unknown index type: {index_type}")
 
@@ -573,6 +800,8 @@ class DBManager:
                 DBManager.drop_btree_idx(table_name, field_name)
             case IndexType.RTREE:
                 DBManager.drop_rtree_idx(table_name, field_name)
+            case IndexType.BLOOM:
+                DBManager.drop_bloom_filter(table_name, field_name)
             case _:
                 raise ValueError(f"Unknown index type: {index_type}")
 
@@ -644,26 +873,11 @@ class DBManager:
         # if neither side is a column, eval directly
         if not left_is_col and not right_is_col:
 
-            def cmp():
-                match op:
-                    case OperationType.EQUAL:
-                        return left_value == right_value
-                    case OperationType.NOT_EQUAL:
-                        return left_value != right_value
-                    case OperationType.GREATER_THAN:
-                        return left_value > right_value
-                    case OperationType.LESS_THAN:
-                        return left_value < right_value
-                    case OperationType.GREATER__EQUAL:
-                        return left_value >= right_value
-                    case OperationType.LESS__EQUAL:
-                        return left_value <= right_value
-                    case OperationType.BETWEEN:
-                        return right_value[0] <= left_value <= right_value[1]
-                    case _:
-                        raise ValueError(f"Unsupported operation {op}")
-
-            return self.fetch_all_offsets(table_name) if cmp() else set()
+            return self.fetch_all_offsets(table_name) if DBManager.compare(left_value, op, right_value) else set()
+
+        # two columns of the same row
+        if left_is_col and right_is_col:
+            return self.column_pair_offsets(table_name, left_value[1:].split(".")[1], op, right_value[1:].split(".")[1])
 
         # if left is column use left as field and right as value
         if left_is_col:
@@ -681,69 +895,289 @@ class DBManager:
                 OperationType.LESS__EQUAL: OperationType.GREATER__EQUAL,
             }.get(op, op)
 
+        path = self.index_access_path(table_name, field, op, value)
+        if path is not None:
+            _, search, exact = path
+            offsets = search()
+            return offsets if exact else self.filter_offsets(table_name, offsets, field, op, value)
+
+        return self.scan_condition_offsets(table_name, field, op, value)
+
+    @staticmethod
+    def compare(v, op: OperationType, value) -> bool:
+        """Python evaluation of `v <op> value` (BETWEEN takes a (low, high) pair)."""
+        match op:
+            case OperationType.EQUAL:
+                return v == value
+            case OperationType.NOT_EQUAL:
+                return v != value
+            case OperationType.GREATER_THAN:
+                return v > value
+            case OperationType.LESS_THAN:
+                return v < value
+            case OperationType.GREATER__EQUAL:
+                return v >= value
+            case OperationType.LESS__EQUAL:
+                return v <= value
+            case OperationType.BETWEEN:
+                return value[0] <= v <= value[1]
+            case _:
+                raise ValueError(f"Unsupported operation {op}")
+
+    def index_access_path(
+        self, table_name: str, field: str, op: OperationType, value
+    ) -> tuple[IndexType, Callable[[], set[int]], bool] | None:
+        """
+        First index able to answer `field <op> value`, as (index type, search, exact).
+        Range operators use the B+ tree / sequential range search; the open end
+        of `>`/`<` comes from the zone map, and exclusive bounds are not exact
+        (the caller drops the rows equal to `value`). B+ tree hits are never
+        exact: indexes written before delete followed the leaf chain can hold
+        stale duplicate entries whose slots were reused, so the caller rechecks
+        each fetched row. None: no usable index.
+        """
+        ranges = [
+            (IndexType.BPLUSTREE, self.check_btree_idx, self.search_btree_idx_range),
+            (IndexType.SEQUENTIAL, self.check_seq_idx, self.search_seq_idx_range),
+        ]
         # mega big brain move
         priority_map: dict[OperationType, list[tuple]] = {
             OperationType.EQUAL: [
-                (self.check_hash_idx, self.search_hash_idx),
-                (self.check_btree_idx, self.search_btree_idx),
-                (self.check_seq_idx, self.search_seq_idx),
-                (self.check_rtree_idx, self.search_rtree_record),
-            ],
-            OperationType.GREATER__EQUAL: [
-                (self.check_btree_idx, self.search_btree_idx_range),
-                (self.check_seq_idx, self.search_seq_idx_range),
-            ],
-            OperationType.LESS__EQUAL: [
-                (self.check_btree_idx, self.search_btree_idx_range),
-                (self.check_seq_idx, self.search_seq_idx_range),
-            ],
-            OperationType.GREATER_THAN: [
-                (self.check_btree_idx, self.search_btree_idx_range),
-                (self.check_seq_idx, self.search_seq_idx_range),
-            ],
-            OperationType.LESS_THAN: [
-                (self.check_btree_idx, self.search_btree_idx_range),
-                (self.check_seq_idx, self.search_seq_idx_range),
+                (IndexType.EXTENDIBLEHASH, self.check_hash_idx, self.search_hash_idx),
+                (IndexType.BPLUSTREE, self.check_btree_idx, self.search_btree_idx),
+                (IndexType.SEQUENTIAL, self.check_seq_idx, self.search_seq_idx),
+                (IndexType.RTREE, self.check_rtree_idx, self.search_rtree_record),
             ],
+            OperationType.GREATER__EQUAL: ranges,
+            OperationType.LESS__EQUAL: ranges,
+            OperationType.GREATER_THAN: ranges,
+            OperationType.LESS_THAN: ranges,
+            OperationType.BETWEEN: ranges,
         }
 
         # mucha gracia jesval
-        for check, search in priority_map.get(op, []):
-            if check(table_name, field):
-                return search(table_name, field, value)
-
-        # fallback sequential scan on heap
-        def cmp(v):
-            match op:
-                case OperationType.EQUAL:
-                    return v == value
-                case OperationType.NOT_EQUAL:
-                    return v != value
-                case OperationType.GREATER_THAN:
-                    return v > value
-                case OperationType.LESS_THAN:
-                    return v < value
-                case OperationType.GREATER__EQUAL:
-                    return v >= value
-                case OperationType.LESS__EQUAL:
-                    return v <= value
-                case OperationType.BETWEEN:
-                    return value[0] <= v <= value[1]
-                case _:
-                    raise ValueError(f"Unsupported operation {op} for field {field} in table {table_name}.")
-
-        heap: HeapFile = DBManager.get_table_heap(table_name)
+        for index_type, check, search in priority_map.get(op, []):
+            if not check(table_name, field):
+                continue
+            if op == OperationType.EQUAL:
+                return index_type, lambda: search(table_name, field, value), index_type != IndexType.BPLUSTREE
+            if op == OperationType.BETWEEN:
+                if not isinstance(value, (tuple, list)) or len(value) != 2:
+                    return None
+                bounds, exact = (value[0], value[1]), True
+            else:
+                heap = DBManager.get_table_heap(table_name, use_mmap=True)
+                extent = DBManager.column_extent(heap, field)
+                if extent is None or DBManager.column_mask(extent, op, value) is None:
+                    return None
+                lo, hi = (v.decode("utf-8", errors="replace") if isinstance(v, bytes) else v for v in extent.tolist())
+                bounds = (value, hi) if op in (OperationType.GREATER_THAN, OperationType.GREATER__EQUAL) else (lo, value)
+                exact = op in (OperationType.GREATER__EQUAL, OperationType.LESS__EQUAL)
+            exact = exact and index_type != IndexType.BPLUSTREE
+            return index_type, lambda: search(table_name, field, bounds), exact
+        return None
+
+    @staticmethod
+    def column_extent(heap: HeapFile, field: str) -> np.ndarray | None:
+        """[min, max] of a zone-mapped column over the blocks with live rows
+        (loose after deletes, never too narrow), or None if it can't tell."""
+        if not heap.zones.has_column(field):
+            return None
+        zones = heap.zones.blocks(heap.heap_size)
+        zones = zones[zones[COUNT_FIELD] > 0]
+        if not len(zones):
+            return None
+        return np.array([np.sort(zones[f"{field}.min"])[0], np.sort(zones[f"{field}.max"])[-1]])
+
+    def scan_condition_offsets(self, table_name: str, field: str, op: OperationType, value) -> set[int]:
+        """Heap scan for `field <op> value`, skipping the blocks the zone map
+        and Bloom filters rule out."""
+        heap: HeapFile = DBManager.get_table_heap(table_name, use_mmap=True)
+
+        # zone maps and Bloom filters: only read the blocks that may hold matches
+        ranges = DBManager.block_ranges(heap, field, op, value)
+        if ranges is not None:
+            live = heap.live_mask()
+            result: set[int] = set()
+            for start, end in ranges:
+                mask = DBManager.column_mask(heap.to_numpy_range(start, end)[field], op, value)
+                result.update((np.flatnonzero(mask & live[start:end]) + start).tolist())
+            return result
+
+        # vectorized path: one boolean mask over the whole column
+        arr = heap.to_numpy()
+        mask = DBManager.column_mask(arr[field], op, value)
+        if mask is not None:
+            return set(np.flatnonzero(mask & heap.live_mask()).tolist())
+
         all_pairs: List[Tuple[Union[int, float, str], int]] = heap.extract_index(field)
-        return {off for v, off in all_pairs if cmp(v)}
+        return {off for v, off in all_pairs if DBManager.compare(v, op, value)}
+
+    def column_pair_offsets(self, table_name: str, left: str, op: OperationType, right: str) -> set[int]:
+        """Live rows where `left <op> right` (two columns), one array comparison when both are plain columns."""
+        heap: HeapFile = DBManager.get_table_heap(table_name, use_mmap=True)
+        lob = (ColumnType.TEXT, ColumnType.SOUND)
+        if DBManager.get_field_type(table_name, left) not in lob and DBManager.get_field_type(table_name, right) not in lob:
+            arr = heap.to_numpy()
+            mask = DBManager.columns_mask(arr[left], op, arr[right])
+            if mask is not None:
+                return set(np.flatnonzero(mask & heap.live_mask()).tolist())
+
+        offsets = sorted(self.fetch_all_offsets(table_name))
+        positions = [DBManager.get_column_position(table_name, c) for c in (left, right)]
+        rows = heap.fetch_projection(offsets, positions)
+        return {off for off, (a, b) in zip(offsets, rows) if DBManager.compare(a, op, b)}
+
+    def filter_offsets(self, table_name: str, offsets: set[int], field: str, op: OperationType, value) -> set[int]:
+        """Residual filter: keeps the offsets whose row satisfies `field <op> value`,
+        reading only those slots."""
+        if not offsets:
+            return set()
+        heap: HeapFile = DBManager.get_table_heap(table_name, use_mmap=True)
+        positions = np.fromiter(sorted(offsets), dtype=np.int64, count=len(offsets))
+        mask = None
+        if DBManager.get_field_type(table_name, field) not in (ColumnType.TEXT, ColumnType.SOUND):
+            mask = DBManager.column_mask(heap.take(positions)[field], op, value)
+        if mask is None:
+            pos = DBManager.get_column_position(table_name, field)
+            values = heap.fetch_projection(positions.tolist(), [pos])
+            mask = np.array([DBManager.compare(v[0], op, value) for v in values], dtype=bool)
+        return set(positions[mask].tolist())
+
+    @staticmethod
+    def block_ranges(heap: HeapFile, field: str, op: OperationType, value) -> list[tuple[int, int]] | None:
+        """
+        Slot ranges of the blocks that may hold rows matching `field <op> value`,
+        according to the table's zone map and, for equality, the column's Bloom
+        filter. None when neither can tell (column not mapped, value not
+        comparable): the caller scans everything.
+        """
+        if not heap.zones.has_column(field):
+            return None
+        zones = heap.zones.blocks(heap.heap_size)
+        lo, hi = zones[f"{field}.min"], zones[f"{field}.max"]
+        match op:
+            case OperationType.EQUAL:
+                keep = DBManager.column_mask(lo, OperationType.LESS__EQUAL, value)
+                if keep is not None:
+                    keep &= DBManager.column_mask(hi, OperationType.GREATER__EQUAL, value)
+            case OperationType.NOT_EQUAL:
+                keep = DBManager.column_mask(lo, op, value)
+                if keep is not None:
+                    keep |= DBManager.column_mask(hi, op, value)
+            case OperationType.GREATER_THAN | OperationType.GREATER__EQUAL:
+                keep = DBManager.column_mask(hi, op, value)
+            case OperationType.LESS_THAN | OperationType.LESS__EQUAL:
+                keep = DBManager.column_mask(lo, op, value)
+            case OperationType.BETWEEN:
+                if not isinstance(value, (tuple, list)) or len(value) != 2:
+                    return None
+                keep = DBManager.column_mask(hi, OperationType.GREATER__EQUAL, value[0])
+                if keep is not None:
+                    keep &= DBManager.column_mask(lo, OperationType.LESS__EQUAL, value[1])
+            case _:
+                keep = None
+        if keep is None:
+            return None
+        bloom = heap.blooms.get(field)
+        if bloom is not None and op == OperationType.EQUAL:
+            keep &= bloom.blocks_with(value, (heap.heap_size + ZONE_SLOTS - 1) // ZONE_SLOTS)
+        return heap.zones.ranges(keep & (zones[COUNT_FIELD] > 0), heap.heap_size)
+
+    @staticmethod
+    def column_mask(col: np.ndarray, op: OperationType, value) -> np.ndarray | None:
+        """
+        Evaluates `col <op> value` over a whole heap column.
+        Returns None when the column/value pair can't be compared the same way
+        Python would compare the decoded values (ordered tuples, mixed types...).
+        """
+        if op == OperationType.BETWEEN and (not isinstance(value, (tuple, list)) or len(value) != 2):
+            return None
+        values = value if op == OperationType.BETWEEN else (value,)
+        if col.ndim == 2:
+            # POINT columns: (in)equality of the whole tuple, element-wise
+            if op not in (OperationType.EQUAL, OperationType.NOT_EQUAL) or col.dtype.kind != "f":
+                return None
+            if not isinstance(value, (tuple, list)) or len(value) != col.shape[1]:
+                return None
+            if not all(isinstance(v, (int, float)) for v in value):
+                return None
+            equal = np.all(col.astype(np.float64) == np.array(value, dtype=np.float64), axis=1)
+            return equal if op == OperationType.EQUAL else ~equal
+        if col.ndim != 1:
+            return None
+
+        kind = col.dtype.kind
+        if kind == "S":
+            if not all(isinstance(v, str) for v in values):
+                return None
+            # bytes compare like utf-8 strings; trailing nulls are ignored by numpy
+            values = [v.encode("utf-8") for v in values]
+        elif kind in "iubf":
+            if not all(isinstance(v, (int, float)) for v in values):
+                return None
+            # widen so comparisons match Python's int/float semantics
+            col = col.astype(np.float64 if kind == "f" else np.int64)
+        else:
+            return None
+        return DBManager.compare_arrays(col, op, values)
+
+    COMPARISONS = (  # operators columns_mask can evaluate
+        OperationType.EQUAL,
+        OperationType.NOT_EQUAL,
+        OperationType.GREATER_THAN,
+        OperationType.LESS_THAN,
+        OperationType.GREATER__EQUAL,
+        OperationType.LESS__EQUAL,
+    )
+
+    @staticmethod
+    def columns_mask(left: np.ndarray, op: OperationType, right: np.ndarray) -> np.ndarray | None:
+        """
+        Evaluates `left <op> right` row by row for two columns of the same
+        rows. None when they can't be compared like Python would (VARCHAR
+        against numbers, tuples...).
+        """
+        if op not in DBManager.COMPARISONS or left.ndim != 1 or right.ndim != 1:
+            return None
+        kinds = left.dtype.kind + right.dtype.kind
+        if kinds == "SS":
+            return DBManager.compare_arrays(left, op, (right,))
+        if all(kind in "iubf" for kind in kinds):
+            widen = lambda col: col.astype(np.float64 if col.dtype.kind == "f" else np.int64)
+            return DBManager.compare_arrays(widen(left), op, (widen(right),))
+        return None
+
+    @staticmethod
+    def compare_arrays(col: np.ndarray, op: OperationType, values) -> np.ndarray | None:
+        """`col <op> values[0]` (BETWEEN: values[0] and values[1]) as one array operation;
+        the values may be scalars or arrays of the same length."""
+        match op:
+            case OperationType.EQUAL:
+                return col == values[0]
+            case OperationType.NOT_EQUAL:
+                return col != values[0]
+            case OperationType.GREATER_THAN:
+                return col > values[0]
+            case OperationType.LESS_THAN:
+                return col < values[0]
+            case OperationType.GREATER__EQUAL:
+                return col >= values[0]
+            case OperationType.LESS__EQUAL:
+                return col <= values[0]
+            case OperationType.BETWEEN:
+                return (col >= values[0]) & (col <= values[1])
+            case _:
+                return None
 
     def records_projection(
         self,
         table_name: str,
-        offsets: set[int],
+        offsets: set[int] | list[int],
         columns: list[str] | None,
         as_df: bool = False,
     ) -> list[list] | pd.DataFrame:
-        heap: HeapFile = DBManager.get_table_heap(table_name)
+        heap: HeapFile = DBManager.get_table_heap(table_name, use_mmap=True)
         schema: list[tuple] = DBManager.get_table_schema(table_name)
         names = [name for name, _ in schema]
         if columns:
@@ -752,26 +1186,24 @@ class DBManager:
                     raise ValueError(f"Column '{col}' does not exist in table '{table_name}'.")
         else:
             columns = names
-        positions: list[int] = [DBManager.get_column_position(table_name, col) for col in columns]
-        results: list[list] = []
-        for offset in offsets:
-            record: Record = heap.fetch_record_by_offset(offset)
-            results.append([record.values[pos] for pos in positions])
+        positions: list[int] = [names.index(col) for col in columns]
+        # only the projected TEXT/SOUND columns touch their side files
+        results: list[list] = heap.fetch_projection(offsets, positions)
         return pd.DataFrame(results, columns=columns) if as_df else results
 
-    def fetch_all_offsets(self, table_name: str) -> set[int]:
+    def fetch_all_offsets(self, table_name: str, limit: int | None = None) -> set[int]:
+        """Offsets of the live rows; with `limit`, only the first `limit` of them."""
         DBManager.verify_table_exists(table_name)
-        return HeapFile(DBManager.table_path(table_name)).get_all_offsets()
+        heap = TableRegistry.heap(DBManager.table_path(table_name))
+        if limit is None:
+            return heap.get_all_offsets()
+        return set(np.flatnonzero(heap.live_mask())[:limit].tolist())
 
     def column_to_list(self, table_name: str, column_name: str) -> list:
         offsets = DBManager().fetch_all_offsets(table_name)
         pos = DBManager.get_column_position(table_name, column_name)
-        heap = DBManager.get_table_heap(table_name)
-        values = []
-        for offset in offsets:
-            record = heap.fetch_record_by_offset(offset)
-            values.append(record.values[pos])
-        return values
+        heap = DBManager.get_table_heap(table_name, use_mmap=True)
+        return [row[0] for row in heap.fetch_projection(offsets, [pos])]
 
     def audio_spimi_exists(self, table_name: str, field_name: str) -> bool:
         return os.path.exists(os.path.join(self.tables_dir, f"{table_name}.{field_name}_norms.dat"))
@@ -0,0 +1,374 @@
+import heapq
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from dbmanager import DBManager
+from fancytypes.column_types import ColumnType
+from planner import AccessPath, Mask, MaskCompiler, Planner
+from statement import OrCondition, SelectStatement
+from storage.HeapFile import HeapFile
+from storage.ZoneMap import ZONE_SLOTS
+
+BATCH_ROWS = ZONE_SLOTS  # rows per batch handed out by index scans, sorts and projections
+
+
+# region Batches
+class Selected(dict):
+    """Columns of a batch restricted to its selection, gathered on first use."""
+
+    def __init__(self, columns: dict[str, np.ndarray], selection: np.ndarray):
+        super().__init__()
+        self.columns = columns
+        self.selection = selection
+
+    def __missing__(self, name: str) -> np.ndarray:
+        self[name] = self.columns[name][self.selection]
+        return self[name]
+
+
+class Batch:
+    """
+    A block of rows flowing between operators, column-wise: their heap slots,
+    one NumPy array per column (field views of the slots read by a scan, or
+    loaded on first use) and a selection vector with the indices of the rows
+    still alive. Filters and limits only narrow the selection; the columns
+    are never compacted. Operators below a Sort hand out ascending slots.
+    """
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        columns: dict[str, np.ndarray] | None = None,
+        selection: np.ndarray | None = None,
+    ):
+        self.positions = positions
+        self.columns = columns
+        self.selection = selection  # None: every row of the block
+
+    @staticmethod
+    def of(positions: np.ndarray, block: np.ndarray, selection: np.ndarray | None = None) -> "Batch":
+        return Batch(positions, {name: block[name] for name in block.dtype.names}, selection)
+
+    def __len__(self):
+        return len(self.positions) if self.selection is None else len(self.selection)
+
+    def load(self, heap: HeapFile) -> dict[str, np.ndarray]:
+        if self.columns is None:
+            self.columns = Batch.of(self.positions, heap.take(self.positions)).columns
+        return self.columns
+
+    def selected(self) -> dict[str, np.ndarray]:
+        """name → column of the selected rows (the columns themselves when all are)."""
+        return self.columns if self.selection is None else Selected(self.columns, self.selection)
+
+    def selected_positions(self) -> np.ndarray:
+        return self.positions if self.selection is None else self.positions[self.selection]
+
+    def narrow(self, keep: np.ndarray) -> "Batch":
+        """Keeps the selected rows where `keep` (one bool per selected row) holds."""
+        selection = np.flatnonzero(keep) if self.selection is None else self.selection[keep]
+        return Batch(self.positions, self.columns, selection)
+
+    def head(self, n: int) -> "Batch":
+        if n >= len(self):
+            return self
+        selection = np.arange(n) if self.selection is None else self.selection[:n]
+        return Batch(self.positions, self.columns, selection)
+
+    def split(self, n: int) -> Iterator["Batch"]:
+        """Sub-batches of at most `n` selected rows sharing the same columns."""
+        if len(self) <= n:
+            yield self
+            return
+        selection = np.arange(len(self.positions)) if self.selection is None else self.selection
+        for lo in range(0, len(selection), n):
+            yield Batch(self.positions, self.columns, selection[lo : lo + n])
+
+
+def batches(positions: np.ndarray) -> Iterator[Batch]:
+    for lo in range(0, len(positions), BATCH_ROWS):
+        yield Batch(positions[lo : lo + BATCH_ROWS])
+
+
+class ColumnBatch:
+    """
+    Projected rows: one array per selected column (lists for TEXT/SOUND,
+    whose contents come from the side files). Rows become Python objects
+    only through rows(), at the API boundary.
+    """
+
+    def __init__(self, names: list[str], arrays: list):
+        self.names = names
+        self.arrays = arrays
+
+    def __len__(self):
+        return len(self.arrays[0]) if self.arrays else 0
+
+    @staticmethod
+    def python(values) -> list:
+        if isinstance(values, np.ndarray):
+            if values.ndim == 2:  # POINT2D/POINT3D
+                return [tuple(v) for v in values.tolist()]
+            return values.tolist()
+        return list(values)
+
+    def rows(self) -> list[list]:
+        return [list(row) for row in zip(*(self.python(a) for a in self.arrays))]
+
+
+# endregion
+
+
+# region Operators
+class Operator:
+    """
+    Pull-based (Volcano) operator: iterating it pulls batches from its child
+    only as they are needed, so the first rows come out before the last ones
+    are read, and a LIMIT stops the whole pipeline underneath it.
+    """
+
+    whole_table = False  # every live row, in slot order, unfiltered
+
+    def __iter__(self) -> Iterator[Batch]:
+        raise NotImplementedError
+
+    def offsets(self) -> set[int]:
+        """Drains the operator into a set of heap slots."""
+        parts = [batch.selected_positions() for batch in self]
+        return set(np.concatenate(parts).tolist()) if parts else set()
+
+
+class Scan(Operator):
+    """Live slots of `ranges` (the whole heap by default), SCAN_CHUNK slots at a time;
+    dead slots are left out of the selection, not copied out."""
+
+    def __init__(self, heap: HeapFile, ranges: list[tuple[int, int]] | None = None):
+        self.heap = heap
+        self.whole_table = ranges is None
+        self.ranges = [(0, heap.heap_size)] if ranges is None else ranges
+
+    def merged_ranges(self) -> list[tuple[int, int]]:
+        merged: list[list[int]] = []
+        for start, end in sorted(self.ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return [(start, end) for start, end in merged]
+
+    def __iter__(self) -> Iterator[Batch]:
+        live = self.heap.live_mask()
+        chunk = Planner.SCAN_CHUNK
+        for start, end in self.merged_ranges():
+            for lo in range(start, end, chunk):
+                hi = min(end, lo + chunk)
+                alive = live[lo:hi]
+                if not alive.any():
+                    continue
+                positions = np.arange(lo, hi, dtype=np.int64)
+                yield Batch.of(positions, self.heap.to_numpy_range(lo, hi), np.flatnonzero(alive))
+
+
+class IndexScan(Operator):
+    """Slots returned by an index access path, in slot order."""
+
+    def __init__(self, access: AccessPath):
+        self.access = access
+
+    def __iter__(self) -> Iterator[Batch]:
+        yield from batches(np.array(sorted(self.access.search()), dtype=np.int64))
+
+
+class Filter(Operator):
+    """Rows of the child that pass a compiled condition mask, evaluated over
+    the selected rows of each batch as array operations."""
+
+    def __init__(self, child: Operator, heap: HeapFile, mask: Mask):
+        self.child = child
+        self.heap = heap
+        self.mask = mask
+
+    def __iter__(self) -> Iterator[Batch]:
+        for batch in self.child:
+            batch.load(self.heap)
+            batch = batch.narrow(self.mask(batch.selected(), batch.selected_positions()))
+            if len(batch):
+                yield batch
+
+
+class Union(Operator):
+    """OR of several sources: merged in slot order, each row once."""
+
+    def __init__(self, children: list[Operator]):
+        self.children = children
+
+    @staticmethod
+    def positions(child: Operator) -> Iterator[int]:
+        for batch in child:
+            yield from batch.selected_positions().tolist()
+
+    def __iter__(self) -> Iterator[Batch]:
+        out: list[int] = []
+        last = None
+        for pos in heapq.merge(*(self.positions(c) for c in self.children)):
+            if pos == last:
+                continue
+            last = pos
+            out.append(pos)
+            if len(out) == BATCH_ROWS:
+                yield Batch(np.array(out, dtype=np.int64))
+                out = []
+        if out:
+            yield Batch(np.array(out, dtype=np.int64))
+
+
+class Sort(Operator):
+    """
+    ORDER BY: blocking, it drains its child and hands out the rows in order
+    (index order, a top-N heap or an external sort, see Planner.sort_method).
+    Over the whole table the child is not read at all.
+    """
+
+    def __init__(self, child: Operator, planner: Planner, field: str, ascending: bool, limit: int | None):
+        self.child = child
+        self.planner = planner
+        self.field = field
+        self.ascending = ascending
+        self.limit = limit
+
+    def __iter__(self) -> Iterator[Batch]:
+        offsets = None if self.child.whole_table else self.child.offsets()
+        ordered = self.planner.order_offsets(offsets, self.field, self.ascending, self.limit)
+        yield from batches(np.array(ordered, dtype=np.int64))
+
+
+class Limit(Operator):
+    """First `count` rows of the child; stops pulling once they are out."""
+
+    def __init__(self, child: Operator, count: int):
+        self.child = child
+        self.count = count
+
+    def __iter__(self) -> Iterator[Batch]:
+        remaining = self.count
+        if remaining <= 0:
+            return
+        for batch in self.child:
+            batch = batch.head(remaining)
+            remaining -= len(batch)
+            yield batch
+            if remaining == 0:
+                return
+
+
+class Project(Operator):
+    """
+    Root of a SELECT pipeline: iterating it yields a ColumnBatch of at most
+    BATCH_ROWS rows at a time, built with array operations over the selected
+    rows (VARCHAR decoded in bulk, numbers widened like Python's int/float).
+    Only the projected TEXT/SOUND columns touch their side files.
+    """
+
+    def __init__(self, child: Operator, table_name: str, heap: HeapFile, columns: list[str], positions: list[int]):
+        self.child = child
+        self.table_name = table_name
+        self.heap = heap
+        self.columns = columns
+        self.positions = positions
+        self.lob = [DBManager.get_field_type(table_name, c) in (ColumnType.TEXT, ColumnType.SOUND) for c in columns]
+
+    def project(self, values: np.ndarray, index: int, lob: bool):
+        if lob:
+            return self.heap.resolve_column(index, values.tolist())
+        match values.dtype.kind:
+            case "S":
+                return np.char.decode(values, "utf-8", errors="replace")
+            case "i" | "u":
+                return values.astype(np.int64)
+            case "f":
+                return values.astype(np.float64)
+        return values
+
+    def __iter__(self) -> Iterator[ColumnBatch]:
+        for batch in self.child:
+            batch.load(self.heap)
+            for part in batch.split(BATCH_ROWS):
+                selected = part.selected()
+                arrays = [
+                    self.project(selected[name], index, lob)
+                    for name, index, lob in zip(self.columns, self.positions, self.lob)
+                ]
+                yield ColumnBatch(self.columns, arrays)
+
+    def to_frame(self) -> pd.DataFrame:
+        parts = list(self)
+        if not parts:
+            return pd.DataFrame(columns=self.columns)
+        data = {}
+        for i in range(len(self.columns)):
+            arrays = [part.arrays[i] for part in parts]
+            if all(isinstance(a, np.ndarray) and a.ndim == 1 for a in arrays):
+                data[i] = np.concatenate(arrays)
+            else:
+                data[i] = [v for part in parts for v in ColumnBatch.python(part.arrays[i])]
+        frame = pd.DataFrame(data)
+        frame.columns = self.columns
+        return frame
+
+
+# endregion
+
+
+# region Pipeline construction
+def where_source(planner: Planner, condition: OrCondition, visitor) -> Operator:
+    """
+    Operators producing the rows of a WHERE. OR branches whose best driver is
+    an index scan it and filter the rest of the branch on the fetched rows;
+    every other branch is compiled into one mask checked in a single heap
+    scan, over the blocks their drivers may match. The sources are unioned.
+    """
+    heap = planner.heap
+    compiler = MaskCompiler(planner.table_name, heap, visitor)
+    sources: list[Operator] = []
+    scan_masks: list[Mask] = []
+    scan_ranges: list[tuple[int, int]] = []
+    for branch in planner.branches(condition):
+        plan = planner.plan(*planner.conjuncts(branch, visitor))
+        driver = plan.driver
+        if driver is not None and driver.index_type is not None:
+            source: Operator = IndexScan(driver)
+            nodes = [p.node for p, _ in plan.residuals] + plan.opaque
+            if not driver.exact:
+                nodes.insert(0, driver.predicate.node)  # recheck the exclusive bound
+            if nodes:
+                source = Filter(source, heap, compiler.all([compiler.compile(n) for n in nodes]))
+            sources.append(source)
+            continue
+        scan_masks.append(compiler.all([compiler.compile(n) for n in planner.ordered_nodes(plan)]))
+        scan_ranges += planner.candidate_ranges(plan)
+    if scan_masks:
+        sources.append(Filter(Scan(heap, scan_ranges), heap, compiler.any(scan_masks)))
+    return sources[0] if len(sources) == 1 else Union(sources)
+
+
+def select_pipeline(st: SelectStatement, visitor) -> Project:
+    """Scan/IndexScan → Filter → Sort → Limit → Project for a SELECT."""
+    DBManager.verify_table_exists(st.from_table)
+    planner = Planner(st.from_table)
+    names = [name for name, _ in DBManager.get_table_schema(st.from_table)]
+    columns = names if st.select_all else st.select_columns
+    for col in columns:
+        if col not in names:
+            raise ValueError(f"Column '{col}' does not exist in table '{st.from_table}'.")
+
+    source = Scan(planner.heap) if not st.where_statement else where_source(planner, st.where_statement.or_condition, visitor)
+    if st.order_by_column is not None:
+        source = Sort(source, planner, st.order_by_column, st.ascending, st.limit)
+    if st.limit is not None:
+        source = Limit(source, st.limit)
+    return Project(source, st.from_table, planner.heap, columns, [names.index(col) for col in columns])
+
+
+# endregion
@@ -62,16 +62,18 @@ class IndexType(Enum):
     SEQUENTIAL = auto()  # int, float, string
     SPIMI = auto()
     SPIMIAUDIO = auto()
+    BLOOM = auto()  # not an index: per-block filter that prunes scans
 
     def __str__(self):
         return self.name
 
 
 class QueryResult:
-    def __init__(self, success: bool, message: str = "", data=None):
+    def __init__(self, success: bool, message: str = "", data=None, stream=None):
         self.success = success
         self.message = message
         self.data = data
+        self.stream = stream  # SELECT pipeline, iterated for column batches (streaming queries)
 
     def __repr__(self):
         if self.data is None:
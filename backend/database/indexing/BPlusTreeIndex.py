@@ -1,5 +1,6 @@
 from .IndexRecord import IndexRecord
 from . import utils
+from storage.BufferPool import BufferPool
 import struct
 import os
 import math
@@ -35,29 +36,29 @@ class BPlusTreeIndex:
         self.leaf_record_size = sample_record.size
         self.node_size_leaf = 16 + self.order * self.leaf_record_size
 
+        # Los nodos se leen y escriben a través del buffer pool
+        self.pool = BufferPool.get()
         try:
-            with open(self.auxname, 'rb') as f:
-                self.root_offset = struct.unpack('Q', f.read(8))[0]
+            self.pool.validate(self.auxname)
+            self.root_offset = struct.unpack('Q', self.pool.read(self.auxname, 0, 8))[0]
         except (FileNotFoundError, struct.error):
             root = BPlusTreeNode(is_leaf=True)
 
             with open(self.auxname, 'wb') as f:
                 f.write(struct.pack('Q', 0))
+            self.pool.invalidate(self.auxname)
 
             self.root_offset = self.save_node(root)
             self.update_root_offset(self.root_offset)
 
     def load_node(self, node_offset):
-        with open(self.auxname, 'rb') as f:
-            f.seek(node_offset)
-            header = f.read(16)
-            if len(header) < 16:
-                raise ValueError("No se pudo leer el encabezado del nodo.")
-            is_leaf, key_count, next_leaf = struct.unpack('iiQ', header)
+        header = self.pool.read(self.auxname, node_offset, 16)
+        if len(header) < 16:
+            raise ValueError("No se pudo leer el encabezado del nodo.")
+        is_leaf, key_count, next_leaf = struct.unpack('iiQ', header)
 
-            node_size = self.node_size_leaf if is_leaf else self.node_size_internal
-            f.seek(node_offset)
-            buffer = f.read(node_size)
+        node_size = self.node_size_leaf if is_leaf else self.node_size_internal
+        buffer = self.pool.read(self.auxname, node_offset, node_size)
 
         is_leaf, key_count, next_leaf = struct.unpack('iiQ', buffer[:16])
         node = BPlusTreeNode(is_leaf=bool(is_leaf))
@@ -136,10 +137,7 @@ class BPlusTreeIndex:
             padding = b'\x00' * (self.node_size_internal - len(buffer))
             buffer += padding
 
-        with open(self.auxname, 'ab') as f:
-            pos = f.tell()
-            f.write(buffer)
-            return pos
+        return self.pool.append(self.auxname, buffer)
 
     def save_node_at(self, offset, node):
         is_leaf = int(node.is_leaf)
@@ -176,14 +174,10 @@ class BPlusTreeIndex:
             padding = b'\x00' * (self.node_size_internal - len(buffer))
             buffer += padding
 
-        with open(self.auxname, 'r+b') as f:
-            f.seek(offset)
-            f.write(buffer)
+        self.pool.write(self.auxname, offset, buffer)
         
     def update_root_offset(self, offset):
-        with open(self.auxname, 'r+b') as f:
-            f.seek(0)
-            f.write(struct.pack('Q', offset))
+        self.pool.write(self.auxname, 0, struct.pack('Q', offset))
         self.root_offset = offset
 
     def insert(self, record):
@@ -271,26 +265,9 @@ class BPlusTreeIndex:
         return new_offset, separator_key
 
     def search(self, key) -> list[int]:
-        #print(f"[DEBUG SEARCH] Buscando clave: {key}")    
-        return self.search_aux(self.root_offset, key)
-
-    def search_aux(self, node_offset, key) -> list[int]:
-        node = self.load_node(node_offset)
-
-        if node.is_leaf:
-            matches: list[int] = []
-            for record in node.records:
-                if record.key == key:
-                    matches.append(record.offset)
-                elif record.key > key:
-                    break
-            return matches
-
-        else:
-            idx = 0
-            while idx < len(node.keys) and key >= node.keys[idx]:
-                idx += 1
-            return self.search_aux(node.children[idx], key)
+        # los duplicados pueden quedar repartidos en varias hojas: se baja a la
+        # primera y se sigue la cadena de hojas
+        return self.range_search(key, key)
 
     def range_search(self, min_key, max_key) -> list[int]:
         offsets: list[int] = []
@@ -463,34 +440,49 @@ class BPlusTreeIndex:
         return None, None, None
 
     def delete(self, key, offset):
-        #print(f"[DEBUG DELETE] Eliminando clave: {key}, offset: {offset}")
-        self._delete_aux(self.root_offset, key, offset)
+        return self._delete_aux(self.root_offset, key, offset)
 
     def _delete_aux(self, node_offset, key, offset):
         node = self.load_node(node_offset)
 
         if node.is_leaf:
-            print(f"[DEBUG DELETE] Nodo hoja actual: {[r.key for r in node.records]}")
-            for i, rec in enumerate(node.records):
-                print(f"[DEBUG] Comparando con record: {rec.key=} {rec.offset=} vs objetivo: {key=} {offset=}")
-                if rec.key == key and rec.offset == offset:
-                    del node.records[i]
-                    self.save_node_at(node_offset, node)
-                    print(f"[DEBUG DELETE] Eliminado en hoja. Claves ahora: {[r.key for r in node.records]}")
-                    return True
-            print(f"[DEBUG DELETE] Clave no encontrada en esta hoja.")
-            return False
-
-        # Nodo interno: buscar el hijo correspondiente
+            # igual que en range_search: los duplicados de `key` pueden seguir
+            # en las hojas siguientes, así que se recorre la cadena next
+            while True:
+                for i, rec in enumerate(node.records):
+                    if rec.key == key and rec.offset == offset:
+                        del node.records[i]
+                        self.save_node_at(node_offset, node)
+                        return True
+                    if rec.key > key:
+                        return False
+                if not node.next:
+                    return False
+                node_offset = node.next
+                node = self.load_node(node_offset)
+
+        # Nodo interno: bajar a la primera hoja que puede tener la clave
         idx = 0
-        while idx < len(node.keys) and key > node.keys[idx]:
+        while idx < len(node.keys) and node.keys[idx] < key:
             idx += 1
-        self._delete_aux(node.children[idx], key, offset)
+        found = self._delete_aux(node.children[idx], key, offset)
 
         # Si el hijo quedó en underflow, manejamos el caso
         child_node = self.load_node(node.children[idx])
         if not child_node.is_leaf and len(child_node.keys) < self.min_keys:
             self._handle_internal_underflow(node.children[idx])
+        return found
+
+    def items(self):
+        """Pares (clave, offset) de todas las hojas, en orden de clave: baja
+        a la hoja más a la izquierda y sigue la cadena next."""
+        node = self.load_node(self.root_offset)
+        while not node.is_leaf:
+            node = self.load_node(node.children[0])
+        while node is not None:
+            for rec in node.records:
+                yield rec.key, rec.offset
+            node = self.load_node(node.next) if node.next else None
 
     def scan_all(self):
         node = self.load_node(self.root_offset)
@@ -583,5 +575,8 @@ class BPlusTreeIndexWrapper:
     def delete_record(self, key, offset):
         return self.tree.delete(key, offset)
 
+    def items(self):
+        return self.tree.items()
+
     def print_all(self):
         return self.tree.scan_all()
\ No newline at end of file
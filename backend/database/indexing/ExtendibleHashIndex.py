@@ -7,6 +7,9 @@ Estructura de archivos:
 - {table}.{field}.hash.idx   → Archivo marcador (para database.py)
 - {table}.{field}.hash.db    → Buckets binarios fijos
 - {table}.{field}.hash.tree  → Árbol binario serializado con pickle
+
+Los buckets y el árbol se escriben a través del BufferPool, así con el
+WriteAheadLog activo quedan en el log con la sentencia que los cambió.
 """
 
 from __future__ import annotations
@@ -14,6 +17,7 @@ import os, struct, pickle, hashlib
 from typing import List, Union
 from .IndexRecord import IndexRecord
 from . import utils  # utils para schema y formatos
+from storage.BufferPool import BufferPool
 
 # --------------------
 # Configuraciones globales
@@ -80,46 +84,61 @@ class _Page:
     def is_full(self):
         return len(self.data) >= self.cap
 
+    def _chain(self):
+        """Esta página y sus overflow, cargadas, en orden (sin recursión: las
+        cadenas de claves muy repetidas pueden ser largas)."""
+        page = self
+        while True:
+            page.load()
+            yield page
+            if page.next == -1:
+                return
+            page = self.store.page(page.next)
+
     def insert(self, rec: _Rec) -> bool:
-        self.load()
-        if not self.is_full():
-            self.data.append(rec)
-            self.save()
-            return True
-        if self.next != -1:
-            return self.store.page(self.next).insert(rec)
+        """Inserta en esta página o en la primera overflow: las overflow nuevas
+        se enlazan justo después de la principal, así que si ninguna de las
+        dos tiene lugar la cadena está llena (sin recorrerla entera)."""
+        for i, page in enumerate(self._chain()):
+            if not page.is_full():
+                page.data.append(rec)
+                page.save()
+                return True
+            if i == 1:
+                break
         return False
 
-    def search(self, key) -> List[_Rec]:
+    def link_overflow(self, rec: _Rec) -> None:
+        """Agrega una página de overflow después de esta, con ``rec``."""
         self.load()
-        matches = [r for r in self.data if r.key == key]
-        if self.next != -1:
-            matches += self.store.page(self.next).search(key)
-        return matches
+        new_page = self.store.new_page()
+        new_page.next = self.next
+        new_page.data.append(rec)
+        new_page.save()
+        self.next = new_page.pid
+        self.save()
 
-
-    def delete(self, key):
-        self.load()
-        for i, r in enumerate(self.data):
-            if r.key == key:
-                del self.data[i]
-                self.save()
-                return True
-        if self.next == -1:
-            return False
-        deleted = self.store.page(self.next).delete(key)
-        if deleted and not self.store.page(self.next)._has_records():
-            overflow = self.store.page(self.next)
-            self.next = overflow.next
-            self.save()
-        return deleted
+    def search(self, key) -> List[_Rec]:
+        return [r for page in self._chain() for r in page.data if r.key == key]
+
+    def delete(self, key, offset: int = None):
+        """Borra (key, offset), o la primera entrada de key si offset es None."""
+        prev = None
+        for page in self._chain():
+            for i, r in enumerate(page.data):
+                if r.key == key and (offset is None or r.offset == offset):
+                    del page.data[i]
+                    page.save()
+                    if prev is not None and not page.data:
+                        # la página de overflow quedó vacía: se saca de la cadena
+                        prev.next = page.next
+                        prev.save()
+                    return True
+            prev = page
+        return False
 
     def get_all(self):
-        self.load()
-        output = list(self.data)
-        if self.next != -1:
-            output.extend(self.store.page(self.next).get_all())
-        return output
+        return [r for page in self._chain() for r in page.data]
 
     def _has_records(self):
         self.load()
@@ -136,13 +155,17 @@ class _Storage:
     def __init__(self, filename: str, capacity: int):
         self.filename = filename
         self.cap = capacity
+        self.pool = BufferPool.get()  # buckets cacheados en el pool global
         if not os.path.exists(filename):
             with open(filename, "wb") as f:
                 f.write(struct.pack(self.HEADER_FORMAT, 0, self.cap, b"\x00"*8))
+            self.pool.invalidate(filename)
             self.next_pid = 0
         else:
-            with open(filename, "rb") as f:
-                self.next_pid, self.cap, _ = struct.unpack(self.HEADER_FORMAT, f.read(self.HEADER_SIZE))
+            self.pool.validate(filename)
+            self.next_pid, self.cap, _ = struct.unpack(
+                self.HEADER_FORMAT, self.pool.read(filename, 0, self.HEADER_SIZE)
+            )
 
     def _page_size(self):
         avg = 128
@@ -152,20 +175,16 @@ class _Storage:
         return self.HEADER_SIZE + pid * self._page_size()
 
     def _read(self, pid):
-        with open(self.filename, "rb") as f:
-            f.seek(self._pos(pid))
-            return f.read(self._page_size())
+        return self.pool.read(self.filename, self._pos(pid), self._page_size())
 
     def _write(self, pid, blob):
         blob = blob.ljust(self._page_size(), b"\x00")
-        with open(self.filename, "r+b") as f:
-            f.seek(self._pos(pid))
-            f.write(blob)
+        self.pool.write(self.filename, self._pos(pid), blob)
 
     def _write_header(self):
-        with open(self.filename, "r+b") as f:
-            f.seek(0)
-            f.write(struct.pack(self.HEADER_FORMAT, self.next_pid, self.cap, b"\x00"*8))
+        self.pool.write(
+            self.filename, 0, struct.pack(self.HEADER_FORMAT, self.next_pid, self.cap, b"\x00"*8)
+        )
 
     def new_page(self):
         pid = self.next_pid
@@ -202,10 +221,11 @@ class _HashTree:
         self.tree_path = f"{base_path}.hash.tree"
         self.kfmt = key_format
         self.store = _Storage(self.db_path, BUCKET_FACTOR)
+        self.pool = self.store.pool
 
         if os.path.exists(self.tree_path):
-            with open(self.tree_path, "rb") as f:
-                self.root = pickle.load(f)
+            self.pool.validate(self.tree_path)
+            self.root = pickle.loads(self.pool.read(self.tree_path, 0, self.pool.size(self.tree_path)))
         else:
             # Árbol inicial con 2 páginas
             p0 = self.store.new_page()
@@ -213,11 +233,15 @@ class _HashTree:
             self.root = _Node(0, None)
             self.root.left = _Node(1, p0.pid)
             self.root.right = _Node(1, p1.pid)
+            open(self.tree_path, "wb").close()
+            self.pool.invalidate(self.tree_path)
             self._save()
 
     def _save(self):
-        with open(self.tree_path, "wb") as f:
-            pickle.dump(self.root, f)
+        # Se reescribe desde el inicio por el pool; el árbol solo crece (los
+        # splits agregan nodos) y pickle ignora lo que sigue al objeto, así
+        # que no hace falta truncar.
+        self.pool.write(self.tree_path, 0, pickle.dumps(self.root))
 
     def _hash_bits(self, key: Union[int, str]) -> str:
         if isinstance(key, str):
@@ -240,11 +264,7 @@ class _HashTree:
             return
         if leaf.level >= GLOBAL_DEPTH - 1:
             # No se puede dividir más: chaining
-            new_page = self.store.new_page()
-            page.load()
-            page.next = new_page.pid
-            page.save()
-            new_page.insert(_Rec(key, offset))
+            page.link_overflow(_Rec(key, offset))
             return
         self._split(leaf, _Rec(key, offset))
 
@@ -264,7 +284,8 @@ class _HashTree:
         for r in items:
             bit = self._hash_bits(r.key)[leaf.level]
             target = leaf.left if bit == "0" else leaf.right
-            self.store.page(target.pid).insert(r)
+            if not self.store.page(target.pid).insert(r):
+                self.insert(r.key, r.offset)  # el hijo se llenó: dividir de nuevo o encadenar
 
         self._save()
 
@@ -275,11 +296,10 @@ class _HashTree:
         return [r.offset for r in results] if results else []
 
 
-    def delete(self, key: Union[int, str]):
+    def delete(self, key: Union[int, str], offset: int = None):
         bits = self._hash_bits(key)
         page = self.store.page(self._leaf(bits).pid)
-        page.delete(key)
-        self._save()
+        return page.delete(key, offset)
 
     def all_records(self) -> List[_Rec]:
         result = []
@@ -315,8 +335,7 @@ class ExtendibleHashIndex:
 
     def delete_record(self, key: Union[int, str], offset: int) -> bool:
         self._check_type(key)
-        self.tree.delete(key)
-        return True
+        return self.tree.delete(key, offset)
 
     def print_all(self):
         for r in sorted(self.tree.all_records(), key=lambda x: x.key):
@@ -62,23 +62,45 @@ class IndexRecord:
             raise TypeError(f"Formato no soportado: {self.format}")
 
     
+    # structs compilados por formato de clave ('i', 'f', 'Ns', 'Nf', ...)
+    _structs: dict = {}
+
+    @staticmethod
+    def get_struct(format: str) -> struct.Struct:
+        """Devuelve (y cachea) el struct.Struct del registro serializado para un formato."""
+        st = IndexRecord._structs.get(format)
+        if st is not None:
+            return st
+
+        if format == 'i':
+            st = struct.Struct("<Bii")
+        elif format == 'f':
+            st = struct.Struct("<Bfi")
+        elif re_string.fullmatch(format):
+            st = struct.Struct(f"<B{int(format[:-1])}si")
+        elif re_tuple.fullmatch(format):
+            st = struct.Struct(f"<B{int(format[:-1])}{format[-1]}i")
+        else:
+            raise ValueError(f"Formato no soportado: {format}")
+
+        IndexRecord._structs[format] = st
+        return st
+
     def pack(self) -> bytes:
         """Serializa el registro a bytes."""
         if self.format == 'i':
-            return struct.pack("<Bii", self.TYPE_INT, self.key, self.offset)
+            return IndexRecord.get_struct('i').pack(self.TYPE_INT, self.key, self.offset)
         
         if self.format == 'f':
-            return struct.pack("<Bfi", self.TYPE_FLOAT, self.key, self.offset)
+            return IndexRecord.get_struct('f').pack(self.TYPE_FLOAT, self.key, self.offset)
         
         if re_string.fullmatch(self.format) and isinstance(self.key, str):
             n = int(self.format[:-1])
             raw = self.key.encode("utf-8")[:n].ljust(n, b'\x00')
-            return struct.pack(f"<B{n}si", self.TYPE_STRING, raw, self.offset)
+            return IndexRecord.get_struct(self.format).pack(self.TYPE_STRING, raw, self.offset)
         
         if re_tuple.fullmatch(self.format) and isinstance(self.key, tuple):
-            n = int(self.format[:-1])
-            type_char = self.format[-1]
-            return struct.pack(f"<B{n}{type_char}i", self.TYPE_TUPLE, *self.key, self.offset)
+            return IndexRecord.get_struct(self.format).pack(self.TYPE_TUPLE, *self.key, self.offset)
         
         else:
             raise ValueError(f"Formato no soportado: '{self.format}', con tipo: '{type(self.key)}'")
@@ -89,23 +111,21 @@ class IndexRecord:
         type_byte = data[0]
         
         if type_byte == IndexRecord.TYPE_INT:
-            _, key, offset = struct.unpack_from("<Bii", data)
+            _, key, offset = IndexRecord.get_struct('i').unpack_from(data)
             return IndexRecord('i', key, offset)
         
         if type_byte == IndexRecord.TYPE_FLOAT:
-            _, key, offset = struct.unpack_from("<Bfi", data)
+            _, key, offset = IndexRecord.get_struct('f').unpack_from(data)
             return IndexRecord('f', key, offset)
         
         if type_byte == IndexRecord.TYPE_STRING:
-            n = int(format[:-1])
-            _, raw, offset = struct.unpack_from(f"<B{n}si", data)
+            _, raw, offset = IndexRecord.get_struct(format).unpack_from(data)
             key = raw.decode('utf-8').rstrip('\x00')
             return IndexRecord(format, key, offset)
         
         if type_byte == IndexRecord.TYPE_TUPLE:
             n = int(format[:-1])
-            type_char = format[-1]
-            parts = struct.unpack_from(f"<B{n}{type_char}i", data)
+            parts = IndexRecord.get_struct(format).unpack_from(data)
             key = tuple(parts[1:n+1])
             offset = parts[-1]
             return IndexRecord(format, key, offset)
@@ -116,23 +136,7 @@ class IndexRecord:
     @property
     def size(self) -> int:
         """Tamaño en bytes del registro serializado."""
-        if self.format == 'i':
-            return struct.calcsize("<Bii")
-        
-        if self.format == 'f':
-            return struct.calcsize("<Bfi")
-        
-        if re_string.fullmatch(self.format):
-            n = int(self.format[:-1])
-            return struct.calcsize(f"<B{n}si")
-        
-        if re_tuple.fullmatch(self.format):
-            n = int(self.format[:-1])
-            type_char = self.format[-1]
-            return struct.calcsize(f"<B{n}{type_char}i")
-        
-        else:
-            raise ValueError(f"Formato no soportado para size(): {self.format}")
+        return IndexRecord.get_struct(self.format).size
     
     def __eq__(self, other: 'IndexRecord') -> bool:
         """Comparación por igualdad."""
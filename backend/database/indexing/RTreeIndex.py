@@ -5,7 +5,7 @@ import json
 from typing import Union, List, Tuple
 from .IndexRecord import IndexRecord, re_tuple
 from . import utils
-from storage.HeapFile import HeapFile
+from storage.TableRegistry import TableRegistry
 
 class RTreeIndex:
     def __init__(self, table_path: str, indexed_field: str):
@@ -158,7 +158,7 @@ class RTreeIndex:
 
         offsets = list(self.idx.intersection(bounds))
 
-        heap_file = HeapFile(self.table_path)
+        heap_file = TableRegistry.heap(self.table_path)
         field_names = [name for name, _ in heap_file.schema]
         key_pos = field_names.index(self.indexed_field)
 
@@ -189,7 +189,7 @@ class RTreeIndex:
 
         offsets = list(self.idx.intersection(bounds))
 
-        heap_file = HeapFile(self.table_path)
+        heap_file = TableRegistry.heap(self.table_path)
         field_names = [name for name, _ in heap_file.schema]
         key_pos = field_names.index(self.indexed_field)
 
@@ -207,7 +207,7 @@ class RTreeIndex:
         point = self.to_mbr(point)
         offsets = self.idx.nearest(point, num_results = k)
 
-        heap_file = HeapFile(self.table_path)
+        heap_file = TableRegistry.heap(self.table_path)
         field_names = [name for name, _ in heap_file.schema]
         key_pos = field_names.index(self.indexed_field)
 
@@ -236,7 +236,7 @@ class RTreeIndex:
         
     def print_all(self):
         offsets = self.idx.intersection(tuple((float('-inf'),) * self.dims + (float('inf'),) * self.dims))
-        heap_file = HeapFile(self.table_path)
+        heap_file = TableRegistry.heap(self.table_path)
         field_names = [name for name, _ in heap_file.schema]
         key_pos = field_names.index(self.indexed_field)
 
@@ -5,6 +5,9 @@ import json
 from typing import Union, List, Optional, BinaryIO
 from .IndexRecord import IndexRecord
 from . import utils
+from storage.BufferPool import BufferPool
+
+DELETED_OFFSET = -1  # offset de las lápidas de delete_record
 
 class SequentialIndex:
     METADATA_FORMAT = "iii"  # main_size, aux_size, max_aux_size
@@ -26,9 +29,11 @@ class SequentialIndex:
         sample_record = IndexRecord(self.key_format, utils.get_default_key(self.key_format), 0)
         self.record_size = sample_record.size
         
-        with open(self.filename, "rb+") as f:
-            meta = f.read(self.METADATA_SIZE)
-            self.main_size, self.aux_size, self.max_aux_size = struct.unpack(self.METADATA_FORMAT, meta)
+        # Las búsquedas binarias leen registros sueltos: van por el buffer pool
+        self.pool = BufferPool.get()
+        self.pool.validate(self.filename)
+        meta = self.pool.read(self.filename, 0, self.METADATA_SIZE)
+        self.main_size, self.aux_size, self.max_aux_size = struct.unpack(self.METADATA_FORMAT, meta)
     
     @staticmethod
     def build_index(heap_filename: str, extract_index_fn, key_field: str):
@@ -59,6 +64,7 @@ class SequentialIndex:
         max_aux_size = max(1, math.floor(math.log2(main_size))) if main_size > 0 else 1
 
         # Crear archivo de índice
+        BufferPool.get().invalidate(idx_filename)
         with open(idx_filename, "wb") as f:
             # Escribir metadatos
             f.write(struct.pack(SequentialIndex.METADATA_FORMAT, main_size, aux_size, max_aux_size))
@@ -96,29 +102,40 @@ class SequentialIndex:
 
     def update_metadata(self, file_handle=None):
         """Actualiza los metadatos en el archivo."""
+        meta = struct.pack(self.METADATA_FORMAT, self.main_size, self.aux_size, self.max_aux_size)
         if file_handle:
             file_handle.seek(0)
-            file_handle.write(struct.pack(self.METADATA_FORMAT, self.main_size, self.aux_size, self.max_aux_size))
+            file_handle.write(meta)
         else:
-            with open(self.filename, "r+b") as f:
-                f.seek(0)
-                f.write(struct.pack(self.METADATA_FORMAT, self.main_size, self.aux_size, self.max_aux_size))
+            self.pool.write(self.filename, 0, meta)
+
+    def _record_at(self, i: int) -> IndexRecord:
+        """Registro en la posición i (área principal y auxiliar son contiguas)."""
+        data = self.pool.read(self.filename, self.METADATA_SIZE + i * self.record_size, self.record_size)
+        return IndexRecord.unpack(data, self.key_format)
+
+    def _records(self, first: int, count: int) -> List[IndexRecord]:
+        """``count`` registros desde la posición ``first`` con una sola lectura."""
+        data = self.pool.read(
+            self.filename, self.METADATA_SIZE + first * self.record_size, count * self.record_size
+        )
+        n = len(data) // self.record_size
+        return [
+            IndexRecord.unpack(data[k * self.record_size : (k + 1) * self.record_size], self.key_format)
+            for k in range(n)
+        ]
 
     def insert_record(self, record: IndexRecord):
         """Inserta un nuevo registro en el área auxiliar."""
         if record.format != self.key_format:
             raise TypeError(f"El registro tiene formato {record.format}, se esperaba {self.key_format}")
 
-        with open(self.filename, "r+b") as f:
-            # Posicionarse al final del área auxiliar
-            pos = self.METADATA_SIZE + (self.main_size + self.aux_size) * self.record_size
-            f.seek(pos)
-            
-            # Escribir el registro
-            f.write(record.pack())
-            self.aux_size += 1
-            self.update_metadata(file_handle=f)
-            #print("Indice Secuencial: Registro añadido correctamente")
+        # Escribir el registro al final del área auxiliar, junto con los metadatos
+        pos = self.METADATA_SIZE + (self.main_size + self.aux_size) * self.record_size
+        self.aux_size += 1
+        meta = struct.pack(self.METADATA_FORMAT, self.main_size, self.aux_size, self.max_aux_size)
+        self.pool.write_many(self.filename, [(pos, record.pack()), (0, meta)])
+        #print("Indice Secuencial: Registro añadido correctamente")
 
         # Reconstruir si el área auxiliar es demasiado grande
         if self.aux_size > self.max_aux_size:
@@ -129,27 +146,10 @@ class SequentialIndex:
         """Reconstruye el archivo fusionando áreas principal y auxiliar."""
         all_recs = []
         
-        # Leer todos los registros válidos
-        with open(self.filename, "rb") as f:
-            # Leer área principal
-            f.seek(self.METADATA_SIZE)
-            for _ in range(self.main_size):
-                data = f.read(self.record_size)
-                if not data:
-                    break
-                rec = IndexRecord.unpack(data, self.key_format)
-                if not self._is_deleted(rec):
-                    all_recs.append(rec)
-            
-            # Leer área auxiliar
-            f.seek(self.METADATA_SIZE + self.main_size * self.record_size)
-            for _ in range(self.aux_size):
-                data = f.read(self.record_size)
-                if not data:
-                    break
-                rec = IndexRecord.unpack(data, self.key_format)
-                if not self._is_deleted(rec):
-                    all_recs.append(rec)
+        # Leer todos los registros válidos (área principal + auxiliar)
+        for rec in self._records(0, self.main_size + self.aux_size):
+            if not self._is_deleted(rec):
+                all_recs.append(rec)
 
         # Ordenar registros
         all_recs.sort(key=lambda r: r.key)
@@ -175,6 +175,7 @@ class SequentialIndex:
 
         # Reemplazar archivo original
         os.replace(tmp_file, self.filename)
+        self.pool.invalidate(self.filename)
         
         # Actualizar estado
         self.main_size = new_main
@@ -183,6 +184,8 @@ class SequentialIndex:
 
     def _is_deleted(self, record: IndexRecord) -> bool:
         """Determina si un registro está marcado como eliminado."""
+        if record.offset == DELETED_OFFSET:
+            return True
         if self.key_format == 'i':
             return record.key == -1
         elif self.key_format == 'f':
@@ -198,56 +201,47 @@ class SequentialIndex:
 
         results: List[IndexRecord] = []
 
-        with open(self.filename, "rb") as f:
-            # ---------- 1) bin-search en área principal ----------
-            lo, hi = 0, self.main_size - 1
-            pos = -1
-            while lo <= hi:
-                mid = (lo + hi) // 2
-                f.seek(self.METADATA_SIZE + mid * self.record_size)
-                rec = IndexRecord.unpack(f.read(self.record_size), self.key_format)
-
-                cmp = self._compare_keys(rec.key, key)
-                if cmp == 0:
-                    pos = mid
+        # ---------- 1) bin-search en área principal ----------
+        lo, hi = 0, self.main_size - 1
+        pos = -1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            rec = self._record_at(mid)
+
+            cmp = self._compare_keys(rec.key, key)
+            if cmp == 0:
+                pos = mid
+                break
+            elif cmp < 0:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+
+        if pos != -1:
+            # --- 1a) retroceder hasta el primer duplicado ---
+            i = pos
+            while i >= 0:
+                rec = self._record_at(i)
+                if self._compare_keys(rec.key, key) != 0:
                     break
-                elif cmp < 0:
-                    lo = mid + 1
-                else:
-                    hi = mid - 1
-
-            if pos != -1:
-                # --- 1a) retroceder hasta el primer duplicado ---
-                i = pos
-                while i >= 0:
-                    f.seek(self.METADATA_SIZE + i * self.record_size)
-                    rec = IndexRecord.unpack(f.read(self.record_size), self.key_format)
-                    if self._compare_keys(rec.key, key) != 0:
-                        break
-                    if not self._is_deleted(rec):
-                        results.append(rec)
-                    i -= 1
-
-                # --- 1b) avanzar hacia la derecha ---
-                i = pos + 1
-                while i < self.main_size:
-                    f.seek(self.METADATA_SIZE + i * self.record_size)
-                    rec = IndexRecord.unpack(f.read(self.record_size), self.key_format)
-                    if self._compare_keys(rec.key, key) != 0:
-                        break
-                    if not self._is_deleted(rec):
-                        results.append(rec)
-                    i += 1
-
-            # ---------- 2) barrer área auxiliar ----------
-            f.seek(self.METADATA_SIZE + self.main_size * self.record_size)
-            for _ in range(self.aux_size):
-                data = f.read(self.record_size)
-                if not data:
+                if not self._is_deleted(rec):
+                    results.append(rec)
+                i -= 1
+
+            # --- 1b) avanzar hacia la derecha ---
+            i = pos + 1
+            while i < self.main_size:
+                rec = self._record_at(i)
+                if self._compare_keys(rec.key, key) != 0:
                     break
-                rec = IndexRecord.unpack(data, self.key_format)
-                if rec.key == key and not self._is_deleted(rec):
+                if not self._is_deleted(rec):
                     results.append(rec)
+                i += 1
+
+        # ---------- 2) barrer área auxiliar ----------
+        for rec in self._records(self.main_size, self.aux_size):
+            if rec.key == key and not self._is_deleted(rec):
+                results.append(rec)
 
         return results
 
@@ -256,32 +250,16 @@ class SequentialIndex:
         if not self._validate_type(key, self.key_format):
             raise TypeError(f"Clave {key} no es del tipo {self.key_format}")
 
-        empty = utils.get_empty_record(self.key_format)
         found = False
 
-        with open(self.filename, "r+b") as f:
-            # --- área principal ---
-            f.seek(self.METADATA_SIZE)
-            for _ in range(self.main_size):
-                pos = f.tell()
-                rec = IndexRecord.unpack(f.read(self.record_size), self.key_format)
-                if rec.key == key and rec.offset == offset:
-                    f.seek(pos)
-                    f.write(empty.pack())
-                    found = True
-                    break
-
-            # --- área auxiliar ---
-            if not found:
-                f.seek(self.METADATA_SIZE + self.main_size * self.record_size)
-                for _ in range(self.aux_size):
-                    pos = f.tell()
-                    rec = IndexRecord.unpack(f.read(self.record_size), self.key_format)
-                    if rec.key == key and rec.offset == offset:
-                        f.seek(pos)
-                        f.write(empty.pack())
-                        found = True
-                        break
+        # área principal y luego auxiliar (contiguas en el archivo); la lápida
+        # conserva la clave para no romper el orden de la búsqueda binaria
+        for i, rec in enumerate(self._records(0, self.main_size + self.aux_size)):
+            if rec.key == key and rec.offset == offset:
+                tombstone = IndexRecord(self.key_format, rec.key, DELETED_OFFSET)
+                self.pool.write(self.filename, self.METADATA_SIZE + i * self.record_size, tombstone.pack())
+                found = True
+                break
         return found
 
     def search_range(self, start_key: Union[int, float, str], end_key: Union[int, float, str]) -> List[IndexRecord]:
@@ -290,51 +268,41 @@ class SequentialIndex:
             raise TypeError("Las claves del rango no coinciden con el tipo de índice")
 
         results = []
-        with open(self.filename, "rb") as f:
-            # Encontrar primer registro en rango (búsqueda binaria)
-            low, high = 0, self.main_size - 1
-            first_pos = 0
+        # Encontrar primer registro en rango (búsqueda binaria)
+        low, high = 0, self.main_size - 1
+        first_pos = 0
+        
+        while low <= high:
+            mid = (low + high) // 2
+            rec = self._record_at(mid)
             
-            while low <= high:
-                mid = (low + high) // 2
-                f.seek(self.METADATA_SIZE + mid * self.record_size)
-                rec = IndexRecord.unpack(f.read(self.record_size), self.key_format)
-                
-                if self._compare_keys(rec.key, start_key) < 0:
-                    low = mid + 1
-                else:
-                    high = mid - 1
-                    first_pos = mid
-
-            # Leer registros en rango del área principal
-            f.seek(self.METADATA_SIZE + first_pos * self.record_size)
-            for _ in range(first_pos, self.main_size):
-                data = f.read(self.record_size)
-                if not data:
-                    break
-                rec = IndexRecord.unpack(data, self.key_format)
-                if self._compare_keys(rec.key, start_key) < 0:
-                    continue
-                if self._compare_keys(rec.key, end_key) > 0:
-                    break
+            if self._compare_keys(rec.key, start_key) < 0:
+                low = mid + 1
+            else:
+                high = mid - 1
+                first_pos = mid
+
+        # Leer registros en rango del área principal
+        for i in range(first_pos, self.main_size):
+            rec = self._record_at(i)
+            if self._compare_keys(rec.key, start_key) < 0:
+                continue
+            if self._compare_keys(rec.key, end_key) > 0:
+                break
+            if not self._is_deleted(rec):
+                results.append(rec)
+
+        # Buscar en área auxiliar
+        for rec in self._records(self.main_size, self.aux_size):
+            if self._compare_keys(rec.key, start_key) >= 0 and self._compare_keys(rec.key, end_key) <= 0:
                 if not self._is_deleted(rec):
                     results.append(rec)
 
-            # Buscar en área auxiliar
-            f.seek(self.METADATA_SIZE + self.main_size * self.record_size)
-            for _ in range(self.aux_size):
-                data = f.read(self.record_size)
-                if not data:
-                    break
-                rec = IndexRecord.unpack(data, self.key_format)
-                if self._compare_keys(rec.key, start_key) >= 0 and self._compare_keys(rec.key, end_key) <= 0:
-                    if not self._is_deleted(rec):
-                        results.append(rec)
-
         return results
 
     def print_all(self):
         """Imprime todos los registros del índice."""
+        self.pool.flush(self.filename)
         with open(self.filename, "rb") as f:
             # Leer metadatos
             meta = f.read(self.METADATA_SIZE)
@@ -133,7 +133,7 @@ class SPIMIIndexer:
             postings_json = json.dumps(
                 [[doc_id, tfidf] for doc_id, tfidf in postings_tfidf]
             )
-            record = Record(schema_idx, [term, postings_json])
+            record = Record(schema_idx, [term, postings_json], heapfile_idx.codec)
             try:
                 heapfile_idx.insert_record(record)
             except:
@@ -152,7 +152,7 @@ class SPIMIIndexer:
         # 6. Guardar normas (streaming)
         for doc_id, norm_sum in document_norms.items():
             norm = math.sqrt(norm_sum)
-            record = Record(schema_norms, [doc_id, norm])
+            record = Record(schema_norms, [doc_id, norm], heapfile_norms.codec)
             heapfile_norms.insert_record(record)
 
         # 7. Crear índices hash
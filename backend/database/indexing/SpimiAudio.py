@@ -140,7 +140,7 @@ class SpimiAudioIndexer:
             postings_json = json.dumps(
                 [[doc_id, tfidf] for doc_id, tfidf in postings_tfidf]
             )
-            record = Record(schema_idx, [term, postings_json])
+            record = Record(schema_idx, [term, postings_json], heapfile_idx.codec)
             heapfile_idx.insert_record_free(record)
 
             for i in blocks_to_advance:
@@ -153,7 +153,7 @@ class SpimiAudioIndexer:
         
         for doc_id, norm_sum in document_norms.items():
             norm = math.sqrt(norm_sum)
-            record = Record(schema_norms, [doc_id, norm])
+            record = Record(schema_norms, [doc_id, norm], heapfile_norms.codec)
             heapfile_norms.insert_record(record)
 
         ExtendibleHashIndex.build_index(
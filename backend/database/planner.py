@@ -0,0 +1,549 @@
+import math
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterator, Mapping
+
+import numpy as np
+
+from fancytypes.column_types import ColumnType, IndexType, OperationType
+from dbmanager import DBManager
+from storage.ExternalSort import PY_KEY_BYTES, SORT_MEMORY, ExternalSort, top_n
+from storage.HeapFile import HeapFile
+from storage.TableRegistry import TableRegistry
+from storage.TableStats import DEFAULT_EQ_SEL, DEFAULT_RANGE_SEL
+from storage.ZoneMap import ZONE_SLOTS
+from statement import (
+    AndCondition,
+    BetweenComparison,
+    Condition,
+    ConstantCondition,
+    NotCondition,
+    OrCondition,
+    PrimaryCondition,
+    SimpleComparison,
+)
+
+# mask(rows, positions): rows maps column names to the NumPy columns of a
+# block of rows (a structured array or a dict of arrays), positions are their
+# slot numbers; returns one bool per row
+Mask = Callable[[Mapping[str, np.ndarray], np.ndarray], np.ndarray]
+
+
+# region Plan nodes
+class Predicate:
+    """`field <op> value` over the current table, with the column on the left."""
+
+    SUPPORTED = (
+        OperationType.EQUAL,
+        OperationType.NOT_EQUAL,
+        OperationType.GREATER_THAN,
+        OperationType.LESS_THAN,
+        OperationType.GREATER__EQUAL,
+        OperationType.LESS__EQUAL,
+        OperationType.BETWEEN,
+    )
+
+    def __init__(self, field: str, op: OperationType, value):
+        self.field = field
+        self.op = op
+        self.value = value
+        self.node: Condition | None = None  # conjunct it came from (set by Planner.conjuncts)
+
+    @staticmethod
+    def is_column(value) -> bool:
+        return type(value) is str and value.startswith("§")
+
+    @staticmethod
+    def from_values(left_value, op: OperationType, right_value) -> "Predicate | None":
+        """Predicate for an evaluated comparison, or None if it isn't a plain
+        column-vs-constant comparison (text/audio search, two columns, two constants)."""
+        if op not in Predicate.SUPPORTED:
+            return None
+        left_is_col, right_is_col = Predicate.is_column(left_value), Predicate.is_column(right_value)
+        if op == OperationType.BETWEEN:
+            if not left_is_col or any(Predicate.is_column(v) for v in right_value):
+                return None
+            return Predicate(left_value[1:].split(".")[1], op, tuple(right_value))
+        if left_is_col == right_is_col:
+            return None
+        if left_is_col:
+            return Predicate(left_value[1:].split(".")[1], op, right_value)
+        # reverse the operator so the column stays on the left
+        op = {
+            OperationType.GREATER_THAN: OperationType.LESS_THAN,
+            OperationType.LESS_THAN: OperationType.GREATER_THAN,
+            OperationType.GREATER__EQUAL: OperationType.LESS__EQUAL,
+            OperationType.LESS__EQUAL: OperationType.GREATER__EQUAL,
+        }.get(op, op)
+        return Predicate(right_value[1:].split(".")[1], op, left_value)
+
+    @staticmethod
+    def of(comparison: Condition, visitor) -> "Predicate | None":
+        """Predicate for a SimpleComparison/BetweenComparison, evaluating its expressions with `visitor`."""
+        if isinstance(comparison, SimpleComparison):
+            return Predicate.from_values(
+                comparison.left_expression.accept(visitor),
+                comparison.operator,
+                comparison.right_expression.accept(visitor),
+            )
+        if isinstance(comparison, BetweenComparison):
+            return Predicate.from_values(
+                comparison.left_expression.accept(visitor),
+                OperationType.BETWEEN,
+                (comparison.lower_bound.accept(visitor), comparison.upper_bound.accept(visitor)),
+            )
+        return None
+
+    def __str__(self):
+        if self.op == OperationType.BETWEEN:
+            return f"{self.field} BETWEEN {self.value[0]!r} AND {self.value[1]!r}"
+        return f"{self.field} {self.op} {self.value!r}"
+
+
+class AccessPath:
+    """How a predicate would be answered: through an index or a heap scan."""
+
+    def __init__(self, predicate: Predicate, index_type: IndexType | None, search, exact: bool, est_rows: float, cost: float):
+        self.predicate = predicate
+        self.index_type = index_type  # None: heap scan
+        self.search = search  # index search (None for scans)
+        self.exact = exact  # False: the index returns a superset (exclusive range bounds)
+        self.est_rows = est_rows
+        self.cost = cost
+
+    def describe(self) -> str:
+        return "Seq Scan" if self.index_type is None else f"Index Scan ({self.index_type})"
+
+
+class ConjunctionPlan:
+    """Plan for one AND chain: a driving access path, the residual predicates
+    checked only on the rows it returns (most selective first) and the
+    conditions the planner can't cost (NOT, nested OR, text/audio search...),
+    checked last."""
+
+    def __init__(self, driver: AccessPath | None, residuals: list[tuple[Predicate, float]], opaque: list[Condition], est_rows: float):
+        self.driver = driver
+        self.residuals = residuals  # (predicate, selectivity)
+        self.opaque = opaque
+        self.est_rows = est_rows
+
+
+# endregion
+
+
+# region Compiled conditions
+class MaskCompiler:
+    """
+    Compiles a condition tree into one vectorized Mask evaluated over blocks
+    of heap slots: comparisons become NumPy column masks and AND/OR/NOT
+    become &, |, ~, so a whole WHERE is checked in a single pass. What NumPy
+    can't compare (text/audio search, TEXT/SOUND columns, POINT ordering) is
+    evaluated once through the visitor and looked up by slot.
+    """
+
+    def __init__(self, table_name: str, heap: HeapFile, visitor):
+        self.table_name = table_name
+        self.visitor = visitor
+        self.empty = np.zeros(0, dtype=heap.numpy_dtype())
+
+    def compile(self, node: Condition) -> Mask:
+        if isinstance(node, OrCondition):
+            parts = []
+            while node is not None:
+                parts.append(self.compile(node.and_condition))
+                node = node.or_condition
+            return self.any(parts)
+        if isinstance(node, AndCondition):
+            parts = []
+            while node is not None:
+                parts.append(self.compile(node.not_condition))
+                node = node.and_condition
+            return self.all(parts)
+        if isinstance(node, NotCondition):
+            inner = self.compile(node.primary_condition)
+            return (lambda rows, positions: ~inner(rows, positions)) if node.is_not else inner
+        if isinstance(node, PrimaryCondition):
+            return self.compile(node.condition)
+        if isinstance(node, ConstantCondition):
+            value = bool(node.bool_constant.accept(self.visitor))
+            return lambda rows, positions: np.full(len(positions), value)
+        if isinstance(node, (SimpleComparison, BetweenComparison)):
+            predicate = Predicate.of(node, self.visitor)
+            if predicate is not None and self.vectorizable(predicate):
+                return self.comparison(predicate)
+            return self.column_pair(node) or self.lookup(node)
+        raise ValueError(f"Unsupported condition type: {type(node)}")
+
+    def plain(self, field: str) -> bool:
+        if field not in self.empty.dtype.names:
+            return False
+        # TEXT/SOUND slots only hold an offset into the side file
+        return DBManager.get_field_type(self.table_name, field) not in (ColumnType.TEXT, ColumnType.SOUND)
+
+    def vectorizable(self, predicate: Predicate) -> bool:
+        if not self.plain(predicate.field):
+            return False
+        return DBManager.column_mask(self.empty[predicate.field], predicate.op, predicate.value) is not None
+
+    def column_pair(self, node: Condition) -> Mask | None:
+        """`a <op> b` between two columns of the table, as one array comparison per block."""
+        if not isinstance(node, SimpleComparison):
+            return None
+        left, right = node.left_expression.accept(self.visitor), node.right_expression.accept(self.visitor)
+        if not (Predicate.is_column(left) and Predicate.is_column(right)):
+            return None
+        a, b = left[1:].split(".")[1], right[1:].split(".")[1]
+        op = node.operator
+        if not (self.plain(a) and self.plain(b)) or DBManager.columns_mask(self.empty[a], op, self.empty[b]) is None:
+            return None
+        return lambda rows, positions: DBManager.columns_mask(rows[a], op, rows[b])
+
+    @staticmethod
+    def comparison(predicate: Predicate) -> Mask:
+        field, op, value = predicate.field, predicate.op, predicate.value
+        return lambda rows, positions: DBManager.column_mask(rows[field], op, value)
+
+    def lookup(self, node: Condition) -> Mask:
+        """Mask for a node evaluated by the visitor (once, on first use)."""
+        offsets = None
+
+        def mask(rows, positions):
+            nonlocal offsets
+            if offsets is None:
+                offsets = np.array(sorted(node.accept(self.visitor)), dtype=np.int64)
+            return np.isin(positions, offsets)
+
+        return mask
+
+    @staticmethod
+    def all(parts: list[Mask]) -> Mask:
+        """AND, in order; stops as soon as no slot survives."""
+        if len(parts) == 1:
+            return parts[0]
+
+        def mask(rows, positions):
+            result = parts[0](rows, positions)
+            for part in parts[1:]:
+                if not result.any():
+                    break
+                result &= part(rows, positions)
+            return result
+
+        return mask
+
+    @staticmethod
+    def any(parts: list[Mask]) -> Mask:
+        """OR, in order; stops as soon as every slot passes."""
+        if len(parts) == 1:
+            return parts[0]
+
+        def mask(rows, positions):
+            result = parts[0](rows, positions)
+            for part in parts[1:]:
+                if result.all():
+                    break
+                result |= part(rows, positions)
+            return result
+
+        return mask
+
+
+# endregion
+
+
+# region Planner
+class Planner:
+    """
+    Cost-based access path selection for the conjuncts of a WHERE clause.
+    Costs are in abstract units; only their relative size matters.
+    """
+
+    INDEX_PROBE_COST = {
+        IndexType.EXTENDIBLEHASH: 1.0,
+        IndexType.BPLUSTREE: 3.0,
+        IndexType.RTREE: 3.0,
+    }  # SEQUENTIAL: binary search, log2(n) probes
+    INDEX_ROW_COST = 0.05  # each entry returned by an index (random heap access later)
+    SCAN_SLOT_COST = 0.001  # each slot read by a vectorized heap scan
+    FILTER_ROW_COST = 0.01  # each fetched row checked against a residual
+    SCAN_CHUNK = 64 * ZONE_SLOTS  # slots per block evaluated at once in a scan
+    SORT_ROW_COST = 0.0002  # each row key fetched and compared, times log2 of the sort (or top-N heap) size
+    SPILL_ROW_COST = 0.01  # each row written to a sort run and merged back
+    INDEX_WALK_COST = 0.05  # each B+ tree leaf entry visited in key order (nodes decoded one by one)
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.db = DBManager()
+        self.heap = DBManager.get_table_heap(table_name, use_mmap=True)
+        stats = DBManager.get_table_stats(table_name)
+        self.rows = stats.row_count if stats is not None else self.heap.count()
+
+    # region Conjuncts
+    @staticmethod
+    def conjuncts(condition: AndCondition, visitor) -> tuple[list[Predicate], list[Condition]]:
+        """Flattens an AND chain into plannable predicates and opaque conditions.
+        Expressions are evaluated with `visitor` (constants and column references)."""
+        predicates: list[Predicate] = []
+        opaque: list[Condition] = []
+        while condition is not None:
+            node: NotCondition = condition.not_condition
+            predicate = None if node.is_not else Predicate.of(node.primary_condition.condition, visitor)
+            if predicate is not None:
+                predicate.node = node
+                predicates.append(predicate)
+            else:
+                opaque.append(node)
+            condition = condition.and_condition
+        return predicates, opaque
+
+    # endregion
+
+    # region Estimation
+    def selectivity(self, predicate: Predicate) -> float:
+        """Fraction of rows expected to pass; statistics when ANALYZE ran, defaults otherwise."""
+        sel = DBManager.estimate_selectivity(self.table_name, predicate.field, predicate.op, predicate.value)
+        if sel is not None:
+            return sel
+        match predicate.op:
+            case OperationType.EQUAL:
+                if predicate.field == self.heap.primary_key:
+                    return 1 / max(1, self.rows)
+                return DEFAULT_EQ_SEL
+            case OperationType.NOT_EQUAL:
+                return 1 - DEFAULT_EQ_SEL
+            case _:
+                return DEFAULT_RANGE_SEL
+
+    def access_paths(self, predicate: Predicate, selectivity: float) -> list[AccessPath]:
+        """The heap scan (pruned by zone maps and Bloom filters) plus the index path, if any."""
+        est_rows = selectivity * self.rows
+        ranges = DBManager.block_ranges(self.heap, predicate.field, predicate.op, predicate.value)
+        slots = self.heap.heap_size if ranges is None else sum(end - start for start, end in ranges)
+        paths = [AccessPath(predicate, None, None, True, est_rows, slots * self.SCAN_SLOT_COST)]
+
+        index = self.db.index_access_path(self.table_name, predicate.field, predicate.op, predicate.value)
+        if index is not None:
+            index_type, search, exact = index
+            probe = self.INDEX_PROBE_COST.get(index_type, math.log2(max(2, self.rows)))
+            returned = est_rows if exact else est_rows + self.rows * DEFAULT_EQ_SEL
+            cost = probe + returned * self.INDEX_ROW_COST
+            paths.append(AccessPath(predicate, index_type, search, exact, est_rows, cost))
+        return paths
+
+    # endregion
+
+    # region Planning
+    def plan(self, predicates: list[Predicate], opaque: list[Condition]) -> ConjunctionPlan:
+        """Picks the driving path that minimizes its own cost plus the cost of
+        checking the remaining predicates on the rows it returns."""
+        selectivities = [self.selectivity(p) for p in predicates]
+        best: AccessPath | None = None
+        best_total = math.inf
+        for i, predicate in enumerate(predicates):
+            others = len(predicates) - 1 + len(opaque)
+            for path in self.access_paths(predicate, selectivities[i]):
+                total = path.cost + path.est_rows * others * self.FILTER_ROW_COST
+                if total < best_total:
+                    best, best_total = path, total
+
+        residuals = [(p, s) for p, s in zip(predicates, selectivities) if best is None or p is not best.predicate]
+        residuals.sort(key=lambda pair: pair[1])
+        est_rows = float(self.rows)
+        for s in selectivities:
+            est_rows *= s  # independence assumption
+        return ConjunctionPlan(best, residuals, opaque, est_rows)
+
+    @staticmethod
+    def branches(condition: OrCondition) -> list[AndCondition]:
+        result = []
+        while condition is not None:
+            result.append(condition.and_condition)
+            condition = condition.or_condition
+        return result
+
+    @staticmethod
+    def ordered_nodes(plan: ConjunctionPlan) -> list[Condition]:
+        """Every conjunct of the plan, most selective first, opaque ones last."""
+        predicates = [] if plan.driver is None else [plan.driver.predicate]
+        predicates += [p for p, _ in plan.residuals]
+        return [p.node for p in predicates] + plan.opaque
+
+    def candidate_ranges(self, plan: ConjunctionPlan) -> list[tuple[int, int]]:
+        """Slot ranges a scan branch must read: the blocks its driver may match."""
+        if plan.driver is not None:
+            predicate = plan.driver.predicate
+            ranges = DBManager.block_ranges(self.heap, predicate.field, predicate.op, predicate.value)
+            if ranges is not None:
+                return ranges
+        return [(0, self.heap.heap_size)]
+
+    # endregion
+
+    # region ORDER BY
+    def sort_method(self, field: str, candidates: float | None, ascending: bool, limit: int | None) -> tuple[str, float]:
+        """
+        How to produce rows in `field` order, with its cost: "index" walks the
+        B+ tree leaf chain (no sort at all; ascending with a LIMIT stops after
+        the first matches), "top-n" keeps a heap of `limit` rows and
+        "external" is a merge sort that spills runs past SORT_MEMORY.
+        `candidates` is the number of rows to order (None: the whole table).
+        """
+        n = max(1.0, float(self.rows if candidates is None else candidates))
+        width = self.heap.numpy_dtype()[field].itemsize if self.plain_key(field) else PY_KEY_BYTES
+        if limit is not None:
+            method, cost = "top-n", n * math.log2(max(2, limit)) * self.SORT_ROW_COST
+        else:
+            method, cost = "external", n * math.log2(max(2.0, n)) * self.SORT_ROW_COST
+            if n * (width + 8) > SORT_MEMORY:
+                cost += n * self.SPILL_ROW_COST  # every row is written to and read from a run
+        if DBManager.check_btree_idx(self.table_name, field):
+            visited = float(self.rows)
+            if ascending and limit is not None:
+                visited = min(visited, limit * self.rows / n)  # matches are spread along the chain
+            walk = visited * self.INDEX_WALK_COST
+            if walk <= cost:
+                return "index", walk
+        return method, cost
+
+    def order_offsets(self, offsets: set[int] | None, field: str, ascending: bool, limit: int | None = None) -> list[int]:
+        """The offsets (every live row when None) in ORDER BY order, cut at `limit`."""
+        if field not in dict(DBManager.get_table_schema(self.table_name)):
+            raise ValueError(f"Column '{field}' does not exist in table '{self.table_name}'.")
+        candidates = None if offsets is None else len(offsets)
+        method, _ = self.sort_method(field, candidates, ascending, limit)
+        if method == "index":
+            return self.index_order(offsets, field, ascending, limit)
+        if offsets is None:
+            positions = np.flatnonzero(self.heap.live_mask()).astype(np.int64)
+        else:
+            positions = np.array(sorted(offsets), dtype=np.int64)
+        chunks = self.sort_keys(field, positions)
+        if method == "top-n":
+            return top_n(chunks, limit, descending=not ascending)
+        sorter = ExternalSort(descending=not ascending, tmp_dir=DBManager.tables_dir)
+        for keys, chunk in chunks:
+            sorter.add(keys, chunk)
+        return list(sorter.offsets())
+
+    def index_order(self, offsets: set[int] | None, field: str, ascending: bool, limit: int | None) -> list[int]:
+        """Walks the B+ tree leaves in key order keeping the wanted rows. The
+        leaves only link forward, so descending order keeps the last `limit`
+        matches of the walk (or all of them) and reverses them."""
+        if offsets is None:
+            live = self.heap.live_mask()
+            wanted = lambda offset: offset < len(live) and live[offset]
+        else:
+            wanted = offsets.__contains__
+        index = TableRegistry.btree_index(DBManager.table_path(self.table_name), field)
+        entries = ((key, offset) for key, offset in index.items() if wanted(offset))
+        matches = self.current_entries(entries, field, limit if ascending else None)
+        if ascending:
+            return list(islice(matches, limit))
+        return list(reversed(deque(matches, maxlen=limit)))
+
+    def current_entries(self, entries, field: str, batch: int | None) -> Iterator[int]:
+        """Offsets of the (key, offset) index entries whose slot still holds
+        `key`: an entry left behind by a delete may point at a slot reused by
+        another row. The heap is read in batches that double from `batch`."""
+        size = max(1, batch or self.SCAN_CHUNK)
+        while True:
+            block = list(islice(entries, size))
+            if not block:
+                return
+            positions = np.array([offset for _, offset in block], dtype=np.int64)
+            values = [v for keys, _ in self.sort_keys(field, positions) for v in (keys.tolist() if isinstance(keys, np.ndarray) else keys)]
+            for (key, offset), value in zip(block, values):
+                if isinstance(value, bytes):
+                    value = value.decode("utf-8", errors="replace")
+                if key == value:
+                    yield offset
+            size *= 2
+
+    def plain_key(self, field: str) -> bool:
+        """Whether the slot holds the sort key itself as a NumPy scalar."""
+        if DBManager.get_field_type(self.table_name, field) in (ColumnType.TEXT, ColumnType.SOUND):
+            return False
+        return self.heap.numpy_dtype()[field].shape == ()
+
+    def sort_keys(self, field: str, positions: np.ndarray):
+        """(keys, positions) blocks of SCAN_CHUNK rows: NumPy keys for plain
+        columns, Python values for TEXT/SOUND (the side file content) and POINT."""
+        plain = self.plain_key(field)
+        index = DBManager.get_column_position(self.table_name, field)
+        for lo in range(0, len(positions), self.SCAN_CHUNK):
+            chunk = positions[lo : lo + self.SCAN_CHUNK]
+            if plain:
+                yield self.heap.take(chunk)[field], chunk
+            else:
+                keys = [row[0] for row in self.heap.fetch_projection(chunk.tolist(), [index])]
+                yield [tuple(k) if isinstance(k, list) else k for k in keys], chunk
+
+    # endregion
+
+    # region EXPLAIN
+    def explain(self, condition: OrCondition | None, visitor, describe) -> list[dict]:
+        """One row per step of the WHERE plan; `describe` renders condition nodes."""
+        if condition is None:
+            return [self.step("Seq Scan", "", "heap", self.rows, self.heap.heap_size * self.SCAN_SLOT_COST)]
+        rows: list[dict] = []
+        scan_parts: list[str] = []
+        scan_ranges: list[tuple[int, int]] = []
+        scan_est = 0.0
+        sources = 0
+        for branch in self.branches(condition):
+            predicates, opaque = self.conjuncts(branch, visitor)
+            plan = self.plan(predicates, opaque)
+            driver = plan.driver
+            if driver is not None and driver.index_type is not None:
+                sources += 1
+                access = "index" if driver.exact else "index + recheck"
+                rows.append(self.step(driver.describe(), str(driver.predicate), access, driver.est_rows, driver.cost))
+                rest = [p.node for p, _ in plan.residuals] + plan.opaque
+                if rest:
+                    text = " AND ".join(describe(n) for n in rest)
+                    cost = driver.est_rows * len(rest) * self.FILTER_ROW_COST
+                    rows.append(self.step("Filter", text, "fetched rows", plan.est_rows, cost))
+                continue
+            scan_parts.append(" AND ".join(describe(n) for n in self.ordered_nodes(plan)))
+            scan_ranges += self.candidate_ranges(plan)
+            scan_est += plan.est_rows
+        if scan_parts:
+            sources += 1
+            slots = sum(end - start for start, end in scan_ranges)
+            slots = min(slots, self.heap.heap_size)
+            text = " OR ".join(f"({p})" for p in scan_parts) if len(scan_parts) > 1 else scan_parts[0]
+            rows.append(self.step("Seq Scan", text, f"heap, single pass ({slots} slots)", scan_est, slots * self.SCAN_SLOT_COST))
+        if sources > 1:
+            rows.append(self.step("Union", f"{sources} sources", "offsets", None, None))
+        return rows
+
+    def estimate(self, condition: OrCondition, visitor) -> float:
+        """Rows expected to match a WHERE (OR branches taken as disjoint)."""
+        total = sum(self.plan(*self.conjuncts(branch, visitor)).est_rows for branch in self.branches(condition))
+        return min(float(self.rows), total)
+
+    def sort_step(self, field: str, ascending: bool, limit: int | None, candidates: float | None) -> dict:
+        method, cost = self.sort_method(field, candidates, ascending, limit)
+        access = {
+            "index": "B+ tree leaf order, no sort",
+            "top-n": f"top-N heap ({limit} rows)",
+            "external": "external merge sort",
+        }[method]
+        rows = float(self.rows if candidates is None else candidates)
+        order = f"{field} {'ASC' if ascending else 'DESC'}"
+        return self.step("Sort", order, access, rows if limit is None else min(rows, limit), cost)
+
+    @staticmethod
+    def step(operation: str, predicate: str, access: str, est_rows, cost) -> dict:
+        return {
+            "operation": operation,
+            "predicate": predicate,
+            "access": access,
+            "est_rows": None if est_rows is None else int(round(est_rows)),
+            "cost": None if cost is None else round(cost, 3),
+        }
+
+    # endregion
+
+
+# endregion
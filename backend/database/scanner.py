@@ -37,6 +37,20 @@ class TokenType(Enum):
     EXTENDIBLEHASH = auto()
     RTREE = auto()
     SEQUENTIAL = auto()
+    BLOOM = auto()
+
+    # table storage
+    HEAP = auto()
+    PAGED = auto()
+    VACUUM = auto()
+    ANALYZE = auto()
+    EXPLAIN = auto()
+
+    # TEXT compression
+    COMPRESSED = auto()
+    ZLIB = auto()
+    LZMA = auto()
+    DICTIONARY = auto()
 
     # types
     INT = auto()
@@ -126,6 +140,16 @@ class Token:
         TokenType.EXTENDIBLEHASH: "HASHFILE",
         TokenType.RTREE: "RTREE",
         TokenType.SEQUENTIAL: "SEQUENTIAL",
+        TokenType.BLOOM: "BLOOM",
+        TokenType.HEAP: "HEAP",
+        TokenType.PAGED: "PAGED",
+        TokenType.VACUUM: "VACUUM",
+        TokenType.ANALYZE: "ANALYZE",
+        TokenType.EXPLAIN: "EXPLAIN",
+        TokenType.COMPRESSED: "COMPRESSED",
+        TokenType.ZLIB: "ZLIB",
+        TokenType.LZMA: "LZMA",
+        TokenType.DICTIONARY: "DICTIONARY",
         TokenType.INT: "INT",
         TokenType.FLOAT: "FLOAT",
         TokenType.VARCHAR: "VARCHAR",
@@ -161,11 +161,13 @@ class CreateColumnDefinition:
         column_type: ColumnType,
         varchar_length: int,
         is_pk: bool = False,
+        compression: str | None = None,
     ):
         self.column_name = column_name
         self.column_type = column_type
         self.varchar_length = varchar_length if column_type == ColumnType.VARCHAR else 0
         self.is_pk = is_pk
+        self.compression = compression  # "zlib", "lzma" or "zlib+dict" (TEXT only)
 
 
 class CreateTableStatement(Statement):
@@ -174,10 +176,12 @@ class CreateTableStatement(Statement):
         table_name: str,
         columns: list[CreateColumnDefinition],
         if_not_exists: bool = False,
+        storage: str = "heap",
     ):
         self.table_name = table_name
         self.columns = columns
         self.if_not_exists = if_not_exists
+        self.storage = storage
 
 
 class DropTableStatement(Statement):
@@ -185,6 +189,16 @@ class DropTableStatement(Statement):
         self.table_name = table_name
 
 
+class VacuumStatement(Statement):
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+
+
+class AnalyzeStatement(Statement):
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+
+
 class CreateIndexStatement(Statement):
     def __init__(
         self, index_name: str, table_name: str, column_name: str, index_type: IndexType
@@ -236,6 +250,11 @@ class SelectStatement(Statement):
         self.limit = limit
 
 
+class ExplainStatement(Statement):
+    def __init__(self, select_statement: SelectStatement):
+        self.select_statement = select_statement
+
+
 class KnnStatement(Statement):
     def __init__(self, table_name: str, column_name: str, query_path: str, k: int):
         self.table_name = table_name
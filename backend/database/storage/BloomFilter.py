@@ -0,0 +1,190 @@
+import hashlib
+import math
+import struct
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .BufferPool import BufferPool
+from .Record import Record
+from .ZoneMap import ZONE_SLOTS
+
+# --------------------------------------------------------
+#  Formato
+# --------------------------------------------------------
+MAGIC = b"BLMF"
+HEADER_FORMAT = "<4sdii"  # [magic, tasa de falsos positivos, bits por bloque, k]
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+DEFAULT_FP_RATE = 0.01
+
+_INT_CHARS = "bBhHiIlLqQ"
+
+
+def column_key(char: str, value) -> Optional[bytes]:
+    """Bytes que representan ``value`` como quedaría guardado en una columna
+    de formato ``char`` (float32, VARCHAR truncado), o None si no se puede
+    normalizar. Lo usan los filtros de Bloom y las estadísticas."""
+    if isinstance(value, bool):
+        return None
+    if char in _INT_CHARS:
+        if isinstance(value, float):
+            if not value.is_integer():
+                return None
+            value = int(value)
+        if not isinstance(value, int):
+            return None
+        return struct.pack("<q", value)
+    if char in "fd":
+        if not isinstance(value, (int, float)):
+            return None
+        value = float(np.float32(value)) if char == "f" else float(value)
+        return struct.pack("<d", value)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    if not isinstance(value, bytes):
+        return None
+    return value[: int(char[:-1])].rstrip(b"\x00")
+
+
+class BloomFilter:
+    """Filtros de Bloom de una columna, uno por bloque de ZONE_SLOTS slots
+    (los mismos bloques del mapa de zonas).
+
+    • <tabla>.<campo>.bloom: cabecera + un arreglo de bits por bloque. El
+      tamaño (m bits, k hashes) sale de la tasa de falsos positivos pedida
+      para un bloque lleno: m = -n·ln p / ln²2, k = m/n·ln 2.
+    • Insertar agrega la clave al filtro de su bloque; borrar no la quita
+      (solo deja falsos positivos). VACUUM lo reconstruye.
+    • Un "no" es definitivo: el bloque no tiene filas con ese valor.
+    Las claves se normalizan como quedan en el slot (float32, VARCHAR
+    truncado), así un valor de la consulta calza con el guardado.
+    """
+
+    def __init__(self, filename: str, fmt: str):
+        self.filename = filename
+        self.char = Record.get_format_char_static(fmt)
+        self.pool = BufferPool.get()
+        try:
+            self.pool.validate(self.filename)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo {self.filename} no existe. Llame a build_file primero.")
+        magic, self.fp_rate, self.m, self.k = struct.unpack(
+            HEADER_FORMAT, self.pool.read(self.filename, 0, HEADER_SIZE)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{self.filename} no es un filtro de Bloom.")
+        self.block_bytes = (self.m + 7) // 8
+
+    @staticmethod
+    def supports(fmt: str) -> bool:
+        if fmt.upper() in ("TEXT", "SOUND"):
+            return False
+        char = Record.get_format_char_static(fmt)
+        return char in _INT_CHARS or char in "fd" or (char.endswith("s") and char[:-1].isdigit())
+
+    @staticmethod
+    def sizing(fp_rate: float, n: int = ZONE_SLOTS):
+        """(m, k) para n claves por bloque con la tasa de falsos positivos dada."""
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"Tasa de falsos positivos inválida: {fp_rate}")
+        m = max(8, math.ceil(-n * math.log(fp_rate) / math.log(2) ** 2))
+        k = max(1, round(m / n * math.log(2)))
+        return m, k
+
+    # ------------------------------------------------------------------
+    # Creación del archivo ---------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def build_file(
+        filename: str,
+        fmt: str,
+        fp_rate: float = DEFAULT_FP_RATE,
+        column: Optional[np.ndarray] = None,
+        live: Optional[np.ndarray] = None,
+    ) -> None:
+        """Crea (o sobrescribe) el filtro. ``column`` (la columna del heap
+        como arreglo NumPy) y ``live`` (máscara de vivos) lo llenan."""
+        if not BloomFilter.supports(fmt):
+            raise ValueError(f"Tipo no soportado por el filtro de Bloom: {fmt}")
+        m, k = BloomFilter.sizing(fp_rate)
+        block_bytes = (m + 7) // 8
+        n = 0 if column is None else len(column)
+        n_blocks = (n + ZONE_SLOTS - 1) // ZONE_SLOTS
+        bits = np.zeros((n_blocks, block_bytes), dtype=np.uint8)
+        char = Record.get_format_char_static(fmt)
+        if n:
+            for pos in np.flatnonzero(live[:n]).tolist():
+                key = column_key(char, column[pos].item())
+                for bit in BloomFilter._bits(key, m, k):
+                    bits[pos // ZONE_SLOTS, bit >> 3] |= 1 << (bit & 7)
+        with open(filename, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, MAGIC, fp_rate, m, k))
+            f.write(bits.tobytes())
+        BufferPool.get().invalidate(filename)
+
+    # ------------------------------------------------------------------
+    # Hashing -----------------------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _bits(key: bytes, m: int, k: int):
+        """k posiciones por doble hashing (Kirsch–Mitzenmacher)."""
+        h = hashlib.blake2b(key, digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", h)
+        h2 |= 1
+        return [(h1 + i * h2) % m for i in range(k)]
+
+    # ------------------------------------------------------------------
+    # Mantenimiento -----------------------------------------------------
+    # ------------------------------------------------------------------
+    def _block_pos(self, block: int) -> int:
+        return HEADER_SIZE + block * self.block_bytes
+
+    def add(self, positions: Iterable[int], values: Iterable) -> None:
+        """Agrega los valores crudos de los slots ``positions``; lee y
+        escribe una sola vez el tramo de bloques afectado."""
+        pairs = [(pos, column_key(self.char, v)) for pos, v in zip(positions, values)]
+        if not pairs:
+            return
+        first = min(p for p, _ in pairs) // ZONE_SLOTS
+        last = max(p for p, _ in pairs) // ZONE_SLOTS
+        size = (last - first + 1) * self.block_bytes
+        chunk = bytearray(self.pool.read(self.filename, self._block_pos(first), size))
+        chunk.extend(b"\x00" * (size - len(chunk)))  # crecer
+        for pos, key in pairs:
+            if key is None:
+                continue
+            base = (pos // ZONE_SLOTS - first) * self.block_bytes
+            for bit in self._bits(key, self.m, self.k):
+                chunk[base + (bit >> 3)] |= 1 << (bit & 7)
+        self.pool.write(self.filename, self._block_pos(first), bytes(chunk))
+
+    # ------------------------------------------------------------------
+    # Consulta ----------------------------------------------------------
+    # ------------------------------------------------------------------
+    def _load(self, n_blocks: int) -> np.ndarray:
+        data = self.pool.read(self.filename, HEADER_SIZE, n_blocks * self.block_bytes)
+        bits = np.zeros(n_blocks * self.block_bytes, dtype=np.uint8)
+        bits[: len(data)] = np.frombuffer(data, dtype=np.uint8)
+        return bits.reshape(n_blocks, self.block_bytes)
+
+    def _test(self, bits: np.ndarray, value) -> np.ndarray:
+        key = column_key(self.char, value)
+        keep = np.ones(len(bits), dtype=bool)
+        if key is None:
+            return keep
+        for bit in self._bits(key, self.m, self.k):
+            keep &= (bits[:, bit >> 3] & (1 << (bit & 7))) != 0
+        return keep
+
+    def blocks_with(self, value, n_blocks: int) -> np.ndarray:
+        """Máscara por bloque: False = el bloque seguro no tiene ``value``."""
+        return self._test(self._load(n_blocks), value)
+
+    def might_contain_many(self, values: Iterable, n_blocks: int) -> list[bool]:
+        """Por cada valor, si puede estar en la tabla (un solo read)."""
+        bits = self._load(n_blocks)
+        return [bool(self._test(bits, v).any()) for v in values]
+
+    def might_contain(self, value, n_blocks: int) -> bool:
+        return self.might_contain_many([value], n_blocks)[0]
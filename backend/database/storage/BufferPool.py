@@ -0,0 +1,351 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+PAGE_SIZE = 4096
+DEFAULT_MEMORY = 64 * 1024 * 1024  # 64 MiB → 16384 frames
+
+
+class BufferPool:
+    """Pool de páginas compartido por todo el proceso.
+
+    • Los archivos se ven como páginas de PAGE_SIZE bytes; cada página leída
+      ocupa un frame identificado por (ruta absoluta, nº de página).
+    • Reemplazo LRU con un presupuesto de memoria configurable.
+    • Modo write-through (por defecto): cada escritura va al disco y parcha
+      los frames ya cargados, así quien lee el archivo por fuera (mmap,
+      numpy) siempre ve lo último.
+    • Modo write-back: las escrituras solo marcan el frame como sucio; se
+      bajan a disco al desalojarlo o en flush(). Quien lea el archivo por
+      fuera debe llamar antes a flush(ruta).
+    • validate(ruta) descarta los frames limpios de un archivo que cambió
+      por fuera del pool (inodo, tamaño o mtime distintos). Lo llaman los
+      constructores de HeapFile, TextFile, los índices, etc., así cada
+      consulta parte de un pool coherente sin hacer stat en cada lectura.
+    • Con un WriteAheadLog activo (``wal``) cada escritura se registra en el
+      log antes de ensuciar el frame, y las páginas de la sentencia en curso
+      no se desalojan hasta su commit (ver WriteAheadLog).
+    """
+
+    _instance: Optional["BufferPool"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, memory_bytes: int = DEFAULT_MEMORY, write_back: bool = False):
+        self.capacity = max(1, memory_bytes // PAGE_SIZE)
+        self.write_back = write_back
+        self._frames: "OrderedDict[Tuple[str, int], bytearray]" = OrderedDict()
+        self._dirty: Set[Tuple[str, int]] = set()
+        self._pages: Dict[str, Set[int]] = {}  # ruta → páginas en el pool
+        self._stamps: Dict[str, Tuple[int, int, int]] = {}
+        self._abs: Dict[str, str] = {}  # caché de rutas absolutas
+        self._versions: Dict[str, int] = {}  # escrituras por archivo
+        self.wal = None  # WriteAheadLog activo, si lo hay
+        self._uncommitted: Set[Tuple[str, int]] = set()  # frames de la sentencia en curso
+        self._written: Set[str] = set()  # archivos bajados a disco desde el último checkpoint
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.evictions = self.writebacks = 0
+
+    # ------------------------------------------------------------------
+    # Instancia global --------------------------------------------------
+    # ------------------------------------------------------------------
+    @classmethod
+    def get(cls) -> "BufferPool":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def configure(
+        cls, memory_bytes: Optional[int] = None, write_back: Optional[bool] = None
+    ) -> "BufferPool":
+        """Cambia el presupuesto o la política del pool global. Baja a disco
+        lo pendiente antes de cambiar de política."""
+        pool = cls.get()
+        with pool._lock:
+            if write_back is not None and write_back != pool.write_back:
+                pool.flush()
+                pool.write_back = write_back
+            if memory_bytes is not None:
+                pool.capacity = max(1, memory_bytes // PAGE_SIZE)
+                pool._evict()
+        return pool
+
+    # ------------------------------------------------------------------
+    # Estadísticas ------------------------------------------------------
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "page_size": PAGE_SIZE,
+                "capacity": self.capacity,
+                "frames": len(self._frames),
+                "dirty": len(self._dirty),
+                "write_back": self.write_back,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "writebacks": self.writebacks,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.writebacks = 0
+
+    # ------------------------------------------------------------------
+    # Lectura -----------------------------------------------------------
+    # ------------------------------------------------------------------
+    def read(self, path: str, offset: int, size: int) -> bytes:
+        """Hasta ``size`` bytes desde ``offset`` (menos si se llega al final)."""
+        if size <= 0:
+            return b""
+        with self._lock:
+            path = self._key(path)
+            first = offset // PAGE_SIZE
+            last = (offset + size - 1) // PAGE_SIZE
+            self._load(path, range(first, last + 1))
+
+            start = offset - first * PAGE_SIZE
+            if first == last:
+                return bytes(self._frames[(path, first)][start : start + size])
+            parts = []
+            for page in range(first, last + 1):
+                frame = self._frames[(path, page)]
+                parts.append(frame)
+                if len(frame) < PAGE_SIZE:
+                    break  # fin del archivo
+            return b"".join(parts)[start : start + size]
+
+    def size(self, path: str) -> int:
+        """Tamaño lógico del archivo (incluye páginas sucias aún no escritas)."""
+        with self._lock:
+            path = self._key(path)
+            if path not in self._stamps:
+                self._stamp(path)
+            size = self._stamps[path][1]
+            for page in self._pages.get(path, ()):
+                if (path, page) in self._dirty:
+                    size = max(size, page * PAGE_SIZE + len(self._frames[(path, page)]))
+            return size
+
+    # ------------------------------------------------------------------
+    # Escritura ---------------------------------------------------------
+    # ------------------------------------------------------------------
+    def write(self, path: str, offset: int, data: bytes) -> None:
+        self.write_many(path, [(offset, data)])
+
+    def write_many(self, path: str, writes: Iterable[Tuple[int, bytes]]) -> None:
+        """Aplica varias escrituras al mismo archivo (una sola apertura en
+        modo write-through)."""
+        writes = [(off, data) for off, data in writes if data]
+        if not writes:
+            return
+        with self._lock:
+            path = self._key(path)
+            self._versions[path] = self._versions.get(path, 0) + 1
+            if self.write_back:
+                if self.wal is not None:
+                    self.wal.log_write(path, writes)
+                for offset, data in writes:
+                    self._patch(path, offset, data, load=True)
+                    if self.wal is not None:
+                        first, last = offset // PAGE_SIZE, (offset + len(data) - 1) // PAGE_SIZE
+                        self._uncommitted.update((path, p) for p in range(first, last + 1))
+                self._evict()
+                return
+            with open(path, "r+b") as fh:
+                for offset, data in writes:
+                    fh.seek(offset)
+                    fh.write(data)
+            for offset, data in writes:
+                self._patch(path, offset, data, load=False)
+            self._stamp(path)
+
+    def append(self, path: str, data: bytes) -> int:
+        """Agrega ``data`` al final del archivo y devuelve su offset."""
+        with self._lock:
+            offset = self.size(path)
+            self.write(path, offset, data)
+            return offset
+
+    # ------------------------------------------------------------------
+    # Sincronización ----------------------------------------------------
+    # ------------------------------------------------------------------
+    def flush(self, path: Optional[str] = None) -> None:
+        """Escribe a disco los frames sucios (de un archivo o de todos)."""
+        with self._lock:
+            if path is not None:
+                path = self._key(path)
+            targets = sorted(k for k in self._dirty if path is None or k[0] == path)
+            by_file: Dict[str, List[int]] = {}
+            for fpath, page in targets:
+                by_file.setdefault(fpath, []).append(page)
+            for fpath, pages in by_file.items():
+                self._write_pages(fpath, pages)
+                if fpath in self._stamps:
+                    self._stamp(fpath)
+
+    def invalidate(self, path: str) -> None:
+        """Descarta los frames de un archivo que se borró o reemplazó."""
+        with self._lock:
+            path = self._key(path)
+            self._versions[path] = self._versions.get(path, 0) + 1
+            if self.wal is not None:
+                self.wal.log_drop(path)
+            for page in self._pages.pop(path, ()):
+                self._frames.pop((path, page), None)
+                self._dirty.discard((path, page))
+                self._uncommitted.discard((path, page))
+            self._stamps.pop(path, None)
+
+    def end_statement(self) -> None:
+        """La sentencia se confirmó en el log: sus páginas ya pueden
+        desalojarse."""
+        with self._lock:
+            self._uncommitted.clear()
+            self._evict()
+
+    def take_written(self) -> Set[str]:
+        """Archivos escritos a disco desde la última llamada (el checkpoint
+        los sincroniza)."""
+        with self._lock:
+            written, self._written = self._written, set()
+            return written
+
+    def version(self, path: str) -> int:
+        """Contador de cambios del archivo vistos por el pool: escrituras e
+        invalidaciones (reemplazo, o cambio por fuera detectado por
+        validate). Sirve para saber si un objeto que cachea su contenido
+        quedó viejo; bajar páginas a disco no lo cambia."""
+        with self._lock:
+            return self._versions.get(self._key(path), 0)
+
+    def validate(self, path: str) -> None:
+        """Si el archivo cambió por fuera del pool, olvida sus frames."""
+        with self._lock:
+            path = self._key(path)
+            st = os.stat(path)
+            stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+            old = self._stamps.get(path)
+            if old != stamp:
+                if old is not None and not any(
+                    (path, p) in self._dirty for p in self._pages.get(path, ())
+                ):
+                    self.invalidate(path)
+                self._stamps[path] = stamp
+
+    # ------------------------------------------------------------------
+    # Internos ----------------------------------------------------------
+    # ------------------------------------------------------------------
+    def _key(self, path: str) -> str:
+        key = self._abs.get(path)
+        if key is None:
+            key = self._abs[path] = os.path.abspath(path)
+        return key
+
+    def _stamp(self, path: str) -> None:
+        st = os.stat(path)
+        self._stamps[path] = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _load(self, path: str, pages: range) -> None:
+        """Trae al pool las páginas faltantes; cada tramo contiguo de
+        faltantes se lee con una sola lectura."""
+        missing = []
+        for page in pages:
+            key = (path, page)
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                missing.append(page)
+        if not missing:
+            return
+        with open(path, "rb") as fh:
+            i = 0
+            while i < len(missing):
+                j = i + 1
+                while j < len(missing) and missing[j] == missing[j - 1] + 1:
+                    j += 1
+                fh.seek(missing[i] * PAGE_SIZE)
+                data = fh.read((j - i) * PAGE_SIZE)
+                for k, page in enumerate(missing[i:j]):
+                    self._install(path, page, bytearray(data[k * PAGE_SIZE : (k + 1) * PAGE_SIZE]))
+                i = j
+        self._evict(keep=set((path, p) for p in pages))
+
+    def _install(self, path: str, page: int, frame: bytearray) -> None:
+        self._frames[(path, page)] = frame
+        self._pages.setdefault(path, set()).add(page)
+
+    def _patch(self, path: str, offset: int, data: bytes, load: bool) -> None:
+        """Copia ``data`` sobre los frames que cubre. Con ``load`` (write-back)
+        las páginas ausentes se cargan y quedan sucias; sin él solo se
+        actualizan las que ya estaban en el pool."""
+        end = offset + len(data)
+        for page in range(offset // PAGE_SIZE, (end - 1) // PAGE_SIZE + 1):
+            key = (path, page)
+            base = page * PAGE_SIZE
+            lo, hi = max(offset, base), min(end, base + PAGE_SIZE)
+            if key not in self._frames:
+                if not load:
+                    continue
+                if lo == base and hi == base + PAGE_SIZE:
+                    self.misses += 1
+                    self._install(path, page, bytearray(PAGE_SIZE))
+                else:
+                    self._load(path, range(page, page + 1))
+            else:
+                self._frames.move_to_end(key)
+            frame = self._frames[key]
+            if len(frame) < hi - base:
+                frame.extend(b"\x00" * (hi - base - len(frame)))  # crecer
+            frame[lo - base : hi - base] = data[lo - offset : hi - offset]
+            if load:
+                self._dirty.add(key)
+
+    def _write_pages(self, path: str, pages: List[int]) -> None:
+        """Baja a disco páginas sucias de un archivo, coalesciendo contiguas.
+        Si el archivo ya se borró (DROP TABLE/INDEX) las páginas se descartan."""
+        pages = sorted(pages)
+        if self.wal is not None:
+            self.wal.before_page_write()
+        try:
+            with open(path, "r+b") as fh:
+                i = 0
+                while i < len(pages):
+                    j = i + 1
+                    while j < len(pages) and pages[j] == pages[j - 1] + 1:
+                        j += 1
+                    fh.seek(pages[i] * PAGE_SIZE)
+                    fh.write(b"".join(self._frames[(path, p)] for p in pages[i:j]))
+                    i = j
+        except FileNotFoundError:
+            self.invalidate(path)
+            return
+        for page in pages:
+            self._dirty.discard((path, page))
+        self._written.add(path)
+        self.writebacks += len(pages)
+
+    def _evict(self, keep: Set[Tuple[str, int]] = frozenset()) -> None:
+        while len(self._frames) > self.capacity:
+            # no-steal: las páginas de la sentencia en curso esperan su commit
+            victim = next(
+                (k for k in self._frames if k not in keep and k not in self._uncommitted), None
+            )
+            if victim is None:
+                return
+            path, page = victim
+            if victim in self._dirty:
+                self._write_pages(path, [page])
+                if path in self._stamps:
+                    self._stamp(path)
+            if victim in self._frames:
+                del self._frames[victim]
+                self._pages[path].discard(page)
+            self.evictions += 1
@@ -0,0 +1,290 @@
+import lzma
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from global_utils import Utils
+from .BufferPool import BufferPool
+from .TextFile import TextFile
+
+# --------------------------------------------------------
+#  Formato
+# --------------------------------------------------------
+MAGIC = b"ZTXT"
+FILE_HEADER_FORMAT = "4sBB2x"  # [magic, códec, flags]
+FILE_HEADER_SIZE = struct.calcsize(FILE_HEADER_FORMAT)
+BLOCK_HEADER_FORMAT = "ii"  # [bytes comprimidos, cantidad de entradas]
+BLOCK_HEADER_SIZE = struct.calcsize(BLOCK_HEADER_FORMAT)
+MAP_FORMAT = "ii"  # por entrada: [offset del bloque, posición en el bloque]
+MAP_SIZE = struct.calcsize(MAP_FORMAT)
+
+CODECS = {"zlib": 0, "lzma": 1}
+FLAG_DICTIONARY = 1
+
+BLOCK_ENTRIES = 64  # entradas máximas por bloque
+BLOCK_BYTES = 32 * 1024  # bytes sin comprimir por bloque
+DICTIONARY_SIZE = 32 * 1024  # zlib solo usa los últimos 32 KiB
+
+
+def parse_compression(spec: str) -> Tuple[str, bool]:
+    """"zlib", "lzma" o "zlib+dict" → (códec, usa diccionario)."""
+    codec, _, extra = spec.lower().partition("+")
+    if codec not in CODECS or extra not in ("", "dict"):
+        raise ValueError(f"Compresión de TEXT no soportada: {spec}")
+    if extra and codec != "zlib":
+        raise ValueError("El diccionario compartido solo está disponible con zlib.")
+    return codec, bool(extra)
+
+
+class CompressedTextFile(TextFile):
+    """Columna TEXT comprimida por bloques.
+
+    • <tabla>.<campo>.ztext: cabecera + bloques [n_comp, n_entradas] con
+      las entradas [n][bytes] de TextFile comprimidas juntas (zlib o lzma).
+    • <tabla>.<campo>.ztext.map: (offset del bloque, posición) por entrada.
+      El "offset" que guarda el heap es el número de entrada, así una
+      lectura puntual es una consulta al mapa y un bloque.
+    • <tabla>.<campo>.ztext.dict (opcional, zlib): diccionario compartido,
+      tomado de los primeros textos insertados; ayuda a los bloques chicos
+      de las inserciones de a una fila.
+    • Los bloques son inmutables; los descomprimidos se guardan en una
+      caché LRU compartida. Borrar solo marca la entrada en el mapa; VACUUM
+      (compact) reescribe los bloques con las vivas.
+    """
+
+    CACHE_BLOCKS = 256
+    _cache: "OrderedDict[Tuple[str, int], List[bytes]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Creación del archivo ---------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def paths(table_name: str, field_name: str) -> Tuple[str, str, str]:
+        base = Utils.build_path("tables", f"{table_name}.{field_name}.ztext")
+        return base, base + ".map", base + ".dict"
+
+    @staticmethod
+    def build_file(table_name: str, field_name: str, compression: str = "zlib") -> None:
+        """Crea (o vacía) los archivos de la columna comprimida."""
+        codec, dictionary = parse_compression(compression)
+        filename, map_filename, dict_filename = CompressedTextFile.paths(table_name, field_name)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        flags = FLAG_DICTIONARY if dictionary else 0
+        with open(filename, "wb") as f:
+            f.write(struct.pack(FILE_HEADER_FORMAT, MAGIC, CODECS[codec], flags))
+        open(map_filename, "wb").close()
+        if dictionary:
+            open(dict_filename, "wb").close()  # vacío hasta la primera inserción
+        elif os.path.exists(dict_filename):
+            os.remove(dict_filename)
+        pool = BufferPool.get()
+        for path in (filename, map_filename, dict_filename):
+            pool.invalidate(path)
+        CompressedTextFile._forget(filename)
+
+    # ------------------------------------------------------------------
+    # Inicialización ----------------------------------------------------
+    # ------------------------------------------------------------------
+    def __init__(self, table_name: str, field_name: str):
+        self.filename, self.map_filename, self.dict_filename = self.paths(table_name, field_name)
+        pool = BufferPool.get()
+        try:
+            pool.validate(self.filename)
+            pool.validate(self.map_filename)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo {self.filename} no existe. Llame a build_file primero.")
+        magic, codec, self.flags = struct.unpack(
+            FILE_HEADER_FORMAT, pool.read(self.filename, 0, FILE_HEADER_SIZE)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{self.filename} no es un archivo de texto comprimido.")
+        self.codec = next(name for name, code in CODECS.items() if code == codec)
+        self.dictionary: Optional[bytes] = None
+        if self.flags & FLAG_DICTIONARY:
+            self.dictionary = self._read_dictionary()
+
+    # ------------------------------------------------------------------
+    # Compresión --------------------------------------------------------
+    # ------------------------------------------------------------------
+    def _compress(self, payload: bytes) -> bytes:
+        if self.codec == "lzma":
+            return lzma.compress(payload)
+        if self.dictionary:
+            comp = zlib.compressobj(zdict=self.dictionary)
+            return comp.compress(payload) + comp.flush()
+        return zlib.compress(payload)
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self.codec == "lzma":
+            return lzma.decompress(data)
+        if self.dictionary:
+            return zlib.decompressobj(zdict=self.dictionary).decompress(data)
+        return zlib.decompress(data)
+
+    def _read_dictionary(self) -> Optional[bytes]:
+        """El diccionario guardado, o None si todavía no se fijó (archivo
+        vacío o inexistente)."""
+        pool = BufferPool.get()
+        try:
+            pool.validate(self.dict_filename)
+        except FileNotFoundError:
+            return None
+        return pool.read(self.dict_filename, 0, pool.size(self.dict_filename)) or None
+
+    def _ensure_dictionary(self, encoded: List[bytes]) -> None:
+        """La primera inserción fija el diccionario (si la columna lo usa).
+        Se escribe por el pool, así queda en el log con los bloques que
+        comprime: tras una caída no puede quedar uno sin el otro."""
+        if not self.flags & FLAG_DICTIONARY or self.dictionary is not None:
+            return
+        self.dictionary = self._read_dictionary()  # lo fijó otra instancia
+        if self.dictionary is not None:
+            return
+        sample = b"".join(encoded)[:DICTIONARY_SIZE]
+        if not os.path.exists(self.dict_filename):
+            open(self.dict_filename, "wb").close()
+        BufferPool.get().write(self.dict_filename, 0, sample)
+        self.dictionary = sample or None
+
+    def _pack_blocks(self, encoded: List[bytes], base: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+        """Comprime ``encoded`` en bloques que empiezan en ``base``; devuelve
+        los bytes a agregar y la entrada de mapa de cada texto."""
+        chunks, entries = [], []
+        pos = base
+        i = 0
+        while i < len(encoded):
+            j, size = i, 0
+            while j < len(encoded) and j - i < BLOCK_ENTRIES and (j == i or size < BLOCK_BYTES):
+                size += TextFile.INT_SIZE + len(encoded[j])
+                j += 1
+            payload = b"".join(struct.pack("i", len(e)) + e for e in encoded[i:j])
+            comp = self._compress(payload)
+            chunks.append(struct.pack(BLOCK_HEADER_FORMAT, len(comp), j - i) + comp)
+            entries.extend((pos, k) for k in range(j - i))
+            pos += BLOCK_HEADER_SIZE + len(comp)
+            i = j
+        return b"".join(chunks), entries
+
+    # ------------------------------------------------------------------
+    # Bloques -----------------------------------------------------------
+    # ------------------------------------------------------------------
+    @classmethod
+    def _forget(cls, filename: str) -> None:
+        path = os.path.abspath(filename)
+        with cls._cache_lock:
+            for key in [k for k in cls._cache if k[0] == path]:
+                del cls._cache[key]
+
+    def _block(self, block_offset: int) -> List[bytes]:
+        """Entradas descomprimidas del bloque (desde la caché si está)."""
+        key = (os.path.abspath(self.filename), block_offset)
+        with self._cache_lock:
+            entries = self._cache.get(key)
+            if entries is not None:
+                self._cache.move_to_end(key)
+                return entries
+
+        pool = BufferPool.get()
+        clen, count = struct.unpack(
+            BLOCK_HEADER_FORMAT, pool.read(self.filename, block_offset, BLOCK_HEADER_SIZE)
+        )
+        payload = self._decompress(pool.read(self.filename, block_offset + BLOCK_HEADER_SIZE, clen))
+        entries, pos = [], 0
+        for _ in range(count):
+            (n,) = struct.unpack_from("i", payload, pos)
+            entries.append(payload[pos + TextFile.INT_SIZE : pos + TextFile.INT_SIZE + n])
+            pos += TextFile.INT_SIZE + n
+
+        with self._cache_lock:
+            self._cache[key] = entries
+            while len(self._cache) > self.CACHE_BLOCKS:
+                self._cache.popitem(last=False)
+        return entries
+
+    def _locate(self, ids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """{id: (offset del bloque, posición)} de las entradas vivas; lee el
+        tramo del mapa que cubre los ids pedidos de una vez."""
+        pool = BufferPool.get()
+        n = pool.size(self.map_filename) // MAP_SIZE
+        wanted = sorted({i for i in ids if i is not None and 0 <= i < n})
+        if not wanted:
+            return {}
+        first = wanted[0]
+        data = pool.read(self.map_filename, first * MAP_SIZE, (wanted[-1] - first + 1) * MAP_SIZE)
+        out = {}
+        for i in wanted:
+            block_offset, idx = struct.unpack_from(MAP_FORMAT, data, (i - first) * MAP_SIZE)
+            if block_offset >= 0:
+                out[i] = (block_offset, idx)
+        return out
+
+    def _raw_many(self, ids: List[int]) -> Dict[int, bytes]:
+        located = self._locate(ids)
+        out = {}
+        # un bloque a la vez, en orden de archivo
+        for i, (block_offset, idx) in sorted(located.items(), key=lambda kv: kv[1]):
+            out[i] = self._block(block_offset)[idx]
+        return out
+
+    # ------------------------------------------------------------------
+    # API de TextFile ---------------------------------------------------
+    # ------------------------------------------------------------------
+    def insert(self, text: str) -> int:
+        return self.insert_many([text])[0]
+
+    def insert_many(self, texts: list[str]) -> list[int]:
+        if not texts:
+            return []
+        encoded = [text.encode("utf-8") for text in texts]
+        self._ensure_dictionary(encoded)
+        pool = BufferPool.get()
+        data, entries = self._pack_blocks(encoded, pool.size(self.filename))
+        pool.append(self.filename, data)
+        first = pool.append(
+            self.map_filename, b"".join(struct.pack(MAP_FORMAT, *e) for e in entries)
+        ) // MAP_SIZE
+        return list(range(first, first + len(entries)))
+
+    def delete(self, offset: int) -> bool:
+        try:
+            BufferPool.get().write(self.map_filename, offset * MAP_SIZE, struct.pack(MAP_FORMAT, -1, -1))
+            return True
+        except Exception:
+            return False
+
+    def read(self, offset: int) -> str | None:
+        return self.read_many([offset])[0]
+
+    def read_many(self, offsets) -> list[str | None]:
+        offsets = list(offsets)
+        raw = self._raw_many(offsets)
+        return [
+            None if raw.get(o) is None else raw[o].decode("utf-8", errors="replace")
+            for o in offsets
+        ]
+
+    def compact(self, offsets) -> dict[int, int]:
+        """Reescribe bloques y mapa con solo las entradas de ``offsets`` y
+        devuelve {id_viejo: id_nuevo}. Se conserva el diccionario."""
+        raw = self._raw_many(list(offsets))
+        live = sorted(raw)
+        pool = BufferPool.get()
+        pool.flush(self.filename)
+        pool.flush(self.map_filename)
+
+        data, entries = self._pack_blocks([raw[i] for i in live], FILE_HEADER_SIZE)
+        header = pool.read(self.filename, 0, FILE_HEADER_SIZE)
+        for path, content in (
+            (self.filename, header + data),
+            (self.map_filename, b"".join(struct.pack(MAP_FORMAT, *e) for e in entries)),
+        ):
+            with open(path + ".tmp", "wb") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+            pool.invalidate(path)
+        self._forget(self.filename)
+        return {old: new for new, old in enumerate(live)}
@@ -0,0 +1,142 @@
+import heapq
+import os
+import pickle
+import tempfile
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+# --------------------------------------------------------
+#  Parámetros
+# --------------------------------------------------------
+SORT_MEMORY = 16 * 1024 * 1024  # bytes de claves + offsets en memoria antes de volcar una corrida
+RUN_BATCH = 4096  # pares (clave, offset) por bloque escrito en una corrida
+PY_KEY_BYTES = 64  # tamaño estimado de una clave Python (TEXT, POINT...)
+
+Keys = Union[np.ndarray, list]
+
+
+def _nbytes(keys: Keys) -> int:
+    return keys.nbytes if isinstance(keys, np.ndarray) else len(keys) * PY_KEY_BYTES
+
+
+def sort_pairs(keys: Keys, offsets: np.ndarray, descending: bool = False) -> Tuple[Keys, np.ndarray]:
+    """Ordena por (clave, offset); descendente invierte ambos. Las claves
+    NumPy (números, S{n}, bool) se ordenan vectorizadas, el resto en Python."""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if isinstance(keys, np.ndarray) and keys.ndim == 1:
+        order = np.lexsort((offsets, keys))
+        if descending:
+            order = order[::-1]
+        return keys[order], offsets[order]
+    pairs = sorted(zip(keys, offsets.tolist()), reverse=descending)
+    return [k for k, _ in pairs], np.array([o for _, o in pairs], dtype=np.int64)
+
+
+def top_n(chunks: Iterable[Tuple[Keys, np.ndarray]], n: int, descending: bool = False) -> List[int]:
+    """Offsets de las n primeras filas según su clave, leyendo ``chunks``
+    (pares claves/offsets) de a uno: solo se mantiene un heap de n pares.
+    De cada bloque NumPy compiten únicamente sus n mejores."""
+    if n <= 0:
+        return []
+    pick = heapq.nlargest if descending else heapq.nsmallest
+    best: List[tuple] = []
+    for keys, offsets in chunks:
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if isinstance(keys, np.ndarray) and keys.ndim == 1 and len(keys) > n:
+            keys, offsets = sort_pairs(keys, offsets, descending)
+            keys, offsets = keys[:n], offsets[:n]
+        if isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        best = pick(n, chain(best, zip(keys, offsets.tolist())))
+    return [offset for _, offset in best]
+
+
+class ExternalSort:
+    """Ordenamiento externo de pares (clave, offset) con memoria acotada.
+
+    • add() acumula bloques de claves; cuando pasan ``memory`` bytes, el
+      búfer se ordena y se vuelca a disco como una corrida (archivo temporal
+      con bloques de RUN_BATCH pares).
+    • offsets() devuelve los offsets en orden. Si todo entró en memoria es un
+      solo ordenamiento; si no, se mezclan las corridas con heapq.merge,
+      leyendo un bloque por corrida a la vez. Las corridas se borran al final.
+    Los empates se desempatan por offset (orden del heap).
+    """
+
+    def __init__(self, descending: bool = False, memory: int = SORT_MEMORY, tmp_dir: Optional[str] = None):
+        self.descending = descending
+        self.memory = memory
+        self.tmp_dir = tmp_dir
+        self.runs: List[str] = []
+        self._keys: List[Keys] = []
+        self._offsets: List[np.ndarray] = []
+        self._bytes = 0
+
+    # ------------------------------------------------------------------
+    # Carga -------------------------------------------------------------
+    # ------------------------------------------------------------------
+    def add(self, keys: Keys, offsets) -> None:
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if not len(offsets):
+            return
+        self._keys.append(keys)
+        self._offsets.append(offsets)
+        self._bytes += _nbytes(keys) + offsets.nbytes
+        if self._bytes > self.memory:
+            self._spill()
+
+    def _sorted_buffer(self) -> Tuple[Keys, np.ndarray]:
+        if not self._keys:
+            return [], np.zeros(0, dtype=np.int64)
+        if all(isinstance(k, np.ndarray) for k in self._keys):
+            keys = np.concatenate(self._keys)
+        else:
+            keys = [k for block in self._keys for k in (block.tolist() if isinstance(block, np.ndarray) else block)]
+        offsets = np.concatenate(self._offsets)
+        self._keys, self._offsets, self._bytes = [], [], 0
+        return sort_pairs(keys, offsets, self.descending)
+
+    def _spill(self) -> None:
+        keys, offsets = self._sorted_buffer()
+        if isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        offsets = offsets.tolist()
+        fd, path = tempfile.mkstemp(prefix="sort_", suffix=".run", dir=self.tmp_dir)
+        self.runs.append(path)
+        with os.fdopen(fd, "wb") as f:
+            for i in range(0, len(offsets), RUN_BATCH):
+                pickle.dump(list(zip(keys[i : i + RUN_BATCH], offsets[i : i + RUN_BATCH])), f)
+
+    # ------------------------------------------------------------------
+    # Resultado ---------------------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _read_run(path: str) -> Iterator[tuple]:
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    return
+                yield from batch
+
+    def offsets(self) -> Iterator[int]:
+        if not self.runs:
+            yield from self._sorted_buffer()[1].tolist()
+            return
+        if self._keys:
+            self._spill()
+        try:
+            merged = heapq.merge(*(self._read_run(p) for p in self.runs), reverse=self.descending)
+            for _, offset in merged:
+                yield offset
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        for path in self.runs:
+            if os.path.exists(path):
+                os.remove(path)
+        self.runs = []
@@ -1,12 +1,20 @@
 import struct
 import json
+import mmap
 import os
-from typing import Iterator, Optional, Tuple, List
+from typing import Dict, Iterator, Optional, Tuple, List
+import numpy as np
 import pandas as pd
 
 from .Record import Record
 from .TextFile import TextFile
+from .CompressedTextFile import parse_compression
 from .Sound import Sound
+from .HistogramFile import HistogramFile
+from .LiveBitmap import LiveBitmap
+from .ZoneMap import ZONE_SLOTS, ZoneMap
+from .BloomFilter import BloomFilter
+from .BufferPool import BufferPool
 
 from logger import Logger
 
@@ -23,6 +31,11 @@ SENTINEL_STR: str = ""  # Para campos string
 PTR_SIZE = 4  # int32 para enlazar free‑list
 METADATA_FORMAT = "ii"  # [heap_size, free_head]
 METADATA_SIZE = struct.calcsize(METADATA_FORMAT)
+NEXT_FREE_FIELD = "_next_free"  # nombre del puntero en el dtype de NumPy
+
+# Mapa PK → slot por archivo .dat, compartido por todas las instancias del
+# proceso: {ruta_absoluta: [versión en el BufferPool, {pk: slot}]}
+_PK_SLOTS: dict = {}
 
 
 class HeapFile:
@@ -31,9 +44,17 @@ class HeapFile:
     • Cada *slot* = datos de Record + 4 bytes (next_free).
     • Cuando un slot está libre: PK = centinela y next_free apunta al
       siguiente hueco (o -1 si es el último).
-    • Offsets lógicos nunca cambian, así los índices externos se mantienen.
+    • Offsets lógicos nunca cambian, así los índices externos se mantienen
+      (salvo VACUUM, que compacta y obliga a reconstruirlos).
     """
 
+    # Bytes leídos por cada read() en los recorridos secuenciales (se
+    # redondea a slots completos). Puede cambiarse por clase o por instancia.
+    SCAN_CHUNK_SIZE: int = 4 * 1024 * 1024
+
+    # Filas por lote al leer los textos en iterate_text_documents.
+    TEXT_BATCH: int = 1024
+
     # ------------------------------------------------------------------
     # Creación del archivo ---------------------------------------------
     # ------------------------------------------------------------------
@@ -42,20 +63,59 @@ class HeapFile:
         table_name: str,
         schema: List[Tuple[str, str]],
         primary_key: Optional[str] = None,
+        storage: str = "heap",
+        compression: Optional[Dict[str, str]] = None,
     ) -> None:
-        """Crea archivo <table_name>.dat y <table_name>.schema.json."""
+        """Crea archivo <table_name>.dat y <table_name>.schema.json.
+
+        ``storage`` elige el formato del .dat: "heap" (slots contiguos) o
+        "paged" (páginas con directorio de slots, ver PagedHeapFile).
+        ``compression`` indica, por campo TEXT, si se guarda comprimido
+        ("zlib", "lzma" o "zlib+dict"; ver CompressedTextFile).
+        """
+        compression = compression or {}
+        text_fields = {n for n, fmt in schema if fmt.upper() == "TEXT"}
+        for field_name, spec in compression.items():
+            if field_name not in text_fields:
+                raise ValueError(f"Solo los campos TEXT admiten compresión: {field_name}")
+            parse_compression(spec)
         filename = table_name + ".dat"
+        if storage == "paged":
+            from .PagedFile import PagedHeapFile
+
+            header = PagedHeapFile.header_page(schema)
+        elif storage == "heap":
+            header = struct.pack(METADATA_FORMAT, 0, -1)  # heap_size=0, free_head=-1
+        else:
+            raise ValueError(f"Tipo de almacenamiento no soportado: {storage}")
         with open(filename, "wb") as f:
-            f.write(struct.pack(METADATA_FORMAT, 0, -1))  # heap_size=0, free_head=-1
+            f.write(header)
+        BufferPool.get().invalidate(filename)
+        _PK_SLOTS.pop(os.path.abspath(filename), None)
+        LiveBitmap.build_file(table_name + ".live")
+        ZoneMap.build_file(table_name + ".zone", schema)
+        for n, fmt in schema:
+            bloom_path = f"{table_name}.{n}.bloom"
+            if n == primary_key and BloomFilter.supports(fmt):
+                BloomFilter.build_file(bloom_path, fmt)
+            elif os.path.exists(bloom_path):  # de una tabla anterior con el mismo nombre
+                os.remove(bloom_path)
 
         schema_file = table_name + ".schema.json"
         fields = [
             {"name": n, "type": fmt, "is_primary_key": (n == primary_key)}
             for n, fmt in schema
         ]
+        for field in fields:
+            if field["name"] in compression:
+                field["compression"] = compression[field["name"]]
         with open(schema_file, "w", encoding="utf-8") as jf:
             json.dump(
-                {"table_name": os.path.basename(table_name), "fields": fields},
+                {
+                    "table_name": os.path.basename(table_name),
+                    "storage": storage,
+                    "fields": fields,
+                },
                 jf,
                 indent=4,
             )
@@ -63,20 +123,38 @@ class HeapFile:
         # Crear archivo .text por cada campo tipo "text"
         for field_name, fmt in schema:
             if fmt.upper() == "TEXT":
-                TextFile.build_file(table_name, field_name)
+                TextFile.build_file(table_name, field_name, compression.get(field_name))
             elif fmt.upper() == "SOUND":
                 Sound.build_file(table_name, field_name)
 
     # ------------------------------------------------------------------
     # Inicialización ----------------------------------------------------
     # ------------------------------------------------------------------
-    def __init__(self, table_name: str):
+    def __new__(cls, table_name: str, use_mmap: bool = False):
+        # Las tablas creadas con storage="paged" se abren como PagedHeapFile
+        if cls is HeapFile and HeapFile.storage_of(table_name) == "paged":
+            from .PagedFile import PagedHeapFile
+
+            cls = PagedHeapFile
+        return super().__new__(cls)
+
+    @staticmethod
+    def storage_of(table_name: str) -> str:
+        """Formato de almacenamiento declarado en el schema.json ("heap" por defecto)."""
+        try:
+            with open(table_name + ".schema.json", encoding="utf-8") as jf:
+                return json.load(jf).get("storage", "heap")
+        except FileNotFoundError:
+            return "heap"
+
+    def __init__(self, table_name: str, use_mmap: bool = False):
         self.table_name = table_name.split("/")[
             -1
         ]  # saves table name for stuff in parser
         self.filename = table_name + ".dat"
         self.schema, self.primary_key = self._load_schema(self.filename)
-        self.rec_data_size = Record.get_size(self.schema)
+        self.codec = Record.get_codec(self.schema)
+        self.rec_data_size = self.codec.size
         self.slot_size = self.rec_data_size + PTR_SIZE
 
         if not os.path.exists(self.filename):
@@ -84,10 +162,55 @@ class HeapFile:
                 f"{self.filename} no existe. Cree la tabla primero."
             )
 
-        with open(self.filename, "rb") as f:
-            self.heap_size, self.free_head = struct.unpack(
-                METADATA_FORMAT, f.read(METADATA_SIZE)
+        # Las lecturas y escrituras puntuales pasan por el buffer pool
+        self.pool = BufferPool.get()
+        self.refresh()
+
+        # Modo mmap (solo lectura): fetch y recorridos decodifican directo
+        # del mapeo en vez de abrir/seek/read en cada llamada.
+        self.use_mmap = use_mmap
+        self._mm: Optional[mmap.mmap] = None
+
+        # Bitmap de slots vivos; las tablas creadas antes de tenerlo lo
+        # generan una vez a partir de los centinelas de la PK.
+        self.live_filename = table_name + ".live"
+        if not os.path.exists(self.live_filename):
+            LiveBitmap.build_file(
+                self.live_filename,
+                np.flatnonzero(self._sentinel_mask(self.to_numpy())).tolist(),
             )
+        self.live = LiveBitmap(self.live_filename)
+
+        # Mapa de zonas (min/max por bloque) para podar recorridos; igual
+        # que el bitmap, las tablas anteriores lo generan una vez.
+        self.zone_filename = table_name + ".zone"
+        if not os.path.exists(self.zone_filename):
+            ZoneMap.build_file(
+                self.zone_filename, self.schema, self.to_numpy(), self.live_mask()
+            )
+        self.zones = ZoneMap(self.zone_filename, self.schema)
+
+        # Filtros de Bloom por columna (<tabla>.<campo>.bloom, ver
+        # DBManager.create_bloom_filter). La PK tiene el suyo desde que se
+        # crea la tabla: responde "no existe" sin armar el mapa PK → slot.
+        self.blooms: Dict[str, BloomFilter] = {}
+        for name, fmt in self.schema:
+            bloom_path = f"{table_name}.{name}.bloom"
+            if not os.path.exists(bloom_path):
+                if name != self.primary_key or not BloomFilter.supports(fmt):
+                    continue
+                BloomFilter.build_file(
+                    bloom_path, fmt, column=self.to_numpy()[name], live=self.live_mask()
+                )
+            self.blooms[name] = BloomFilter(bloom_path, fmt)
+
+    def refresh(self) -> None:
+        """Relee la cabecera (heap_size, free_head), por si otra instancia
+        escribió en la tabla. Es una lectura al pool, no reabre nada."""
+        self.pool.validate(self.filename)
+        self.heap_size, self.free_head = struct.unpack(
+            METADATA_FORMAT, self.pool.read(self.filename, 0, METADATA_SIZE)
+        )
 
     # ------------------------------------------------------------------
     # Utilidades internas ----------------------------------------------
@@ -117,14 +240,247 @@ class HeapFile:
             return SENTINEL_FLOAT
         return SENTINEL_INT
 
-    def _write_header(self, fh):
-        fh.seek(0)
-        fh.write(struct.pack(METADATA_FORMAT, self.heap_size, self.free_head))
+    def _header_image(self) -> bytes:
+        return struct.pack(METADATA_FORMAT, self.heap_size, self.free_head)
+
+    # ------------------------------------------------------------------
+    # Mapa de clave primaria -------------------------------------------
+    # ------------------------------------------------------------------
+    def _version(self) -> int:
+        return self.pool.version(self.filename)
+
+    def _pk_slots(self) -> dict:
+        """Mapa PK → slot de los registros vivos.
+
+        Se arma con un solo recorrido la primera vez y luego cada inserción
+        o borrado lo mantiene, así el chequeo de unicidad es O(1). Queda
+        atado a la versión del .dat en el BufferPool: si alguien escribe el
+        archivo sin pasar por aquí, o el pool lo invalida (reemplazado, o
+        cambiado por fuera según validate), se rearma. Bajar páginas a disco
+        (flush, desalojo, checkpoint) no lo afecta.
+        """
+        key = os.path.abspath(self.filename)
+        entry = _PK_SLOTS.get(key)
+        version = self._version()
+        if entry is None or entry[0] != version:
+            pk_idx, _ = self._pk_idx_fmt()
+            slots = {values[pk_idx]: pos for pos, values in self._scan()}
+            entry = _PK_SLOTS[key] = [version, slots]
+        return entry[1]
+
+    def _pk_update(self, added=(), removed=()) -> None:
+        """Registra en el mapa (si ya existe) los cambios de una escritura
+        ya cerrada: ``added`` son pares (pk, slot), ``removed`` claves."""
+        entry = _PK_SLOTS.get(os.path.abspath(self.filename))
+        if entry is None:
+            return
+        slots = entry[1]
+        for pk in removed:
+            slots.pop(pk, None)
+        for pk, slot in added:
+            slots.setdefault(pk, slot)
+        entry[0] = self._version()
+
+    def _pk_may_exist(self, keys: List) -> List[bool]:
+        """Por cada clave, False si seguro no está en la tabla. Si el mapa
+        PK → slot ya está armado se usa ese; si no, el filtro de Bloom de la
+        PK evita el recorrido completo cuando las claves son nuevas."""
+        entry = _PK_SLOTS.get(os.path.abspath(self.filename))
+        bloom = self.blooms.get(self.primary_key)
+        if bloom is None or (entry is not None and entry[0] == self._version()):
+            return [True] * len(keys)
+        n_blocks = (self.heap_size + ZONE_SLOTS - 1) // ZONE_SLOTS
+        return bloom.might_contain_many(keys, n_blocks)
+
+    def _pk_index_candidates(self, key) -> List[int]:
+        """Offsets que devuelve el índice B+ o hash de la PK, si existe."""
+        from .TableRegistry import TableRegistry
+
+        base = self.filename[: -len(".dat")]
+        try:
+            if os.path.exists(f"{base}.{self.primary_key}.btree.idx"):
+                return TableRegistry.btree_index(base, self.primary_key).search(key)
+            if os.path.exists(f"{base}.{self.primary_key}.hash.idx"):
+                return TableRegistry.hash_index(base, self.primary_key).tree.search(key)
+        except (TypeError, ValueError):
+            pass  # clave de otro tipo: que decida el mapa
+        return []
+
+    def _locate_pk(self, key) -> Optional[int]:
+        """Slot del registro vivo con PK ``key``, o None.
+
+        Se consulta primero el índice de la PK (si lo hay) verificando el
+        slot devuelto; si no hay índice o no acierta, se usa el mapa PK → slot.
+        """
+        pk_idx, _ = self._pk_idx_fmt()
+        if not self._pk_may_exist([key])[0]:
+            return None
+        for pos in self._pk_index_candidates(key):
+            if 0 <= pos < self.heap_size and self._read_values(pos)[pk_idx] == key:
+                return pos
+        return self._pk_slots().get(key)
+
+    def _read_values(self, pos: int) -> list:
+        """Valores crudos (offsets de text/sound sin resolver) de un slot."""
+        return self.codec.decode(self._read_slot(pos))
+
+    # ------------------------------------------------------------------
+    # E/S de slots (PagedHeapFile redefine estas primitivas) -----------
+    # ------------------------------------------------------------------
+    def _slot_pos(self, pos: int) -> int:
+        """Byte donde empieza el slot ``pos`` dentro del .dat."""
+        return METADATA_SIZE + pos * self.slot_size
+
+    def _file_extent(self) -> int:
+        """Bytes del .dat ocupados por la cabecera y los heap_size slots."""
+        return METADATA_SIZE + self.heap_size * self.slot_size
+
+    def _read_slot(self, pos: int):
+        """Bytes del slot completo (registro + next_free)."""
+        start = self._slot_pos(pos)
+        if self.use_mmap:
+            return memoryview(self._mapped())[start : start + self.slot_size]
+        return self.pool.read(self.filename, start, self.slot_size)
+
+    def _next_free(self, pos: int) -> int:
+        return struct.unpack_from("i", self._read_slot(pos), self.rec_data_size)[0]
+
+    def _allocate(self, n: int) -> List[int]:
+        """Reserva n slots: primero los huecos de la free-list, luego al final."""
+        slots = []
+        while len(slots) < n and self.free_head != -1:
+            slots.append(self.free_head)
+            self.free_head = self._next_free(self.free_head)
+        while len(slots) < n:
+            slots.append(self.heap_size)
+            self.heap_size += 1
+        return slots
+
+    def _write_slots(self, writes: List[Tuple[int, bytes]], live: bool = True) -> None:
+        """Escribe imágenes de slot completas y la cabecera en una sola pasada
+        por el buffer pool. Los slots consecutivos van juntos. ``live`` indica
+        si las imágenes son registros u huecos (lo usan los formatos con
+        directorio de slots; aquí la ocupación vive en el bitmap)."""
+        writes = sorted(writes, key=lambda w: w[0])
+        runs = []
+        i = 0
+        while i < len(writes):
+            j = i + 1
+            while j < len(writes) and writes[j][0] == writes[j - 1][0] + 1:
+                j += 1
+            runs.append(
+                (self._slot_pos(writes[i][0]), b"".join(image for _, image in writes[i:j]))
+            )
+            i = j
+        runs.append((0, self._header_image()))
+        self.pool.write_many(self.filename, runs)
+
+    def _slot_blocks(
+        self, chunk_size: Optional[int] = None
+    ) -> Iterator[Tuple[int, memoryview, int]]:
+        """Bloques (primer offset, vista, cantidad) de slots contiguos.
+
+        Los recorridos completos leen el archivo directo (no pasan por el
+        pool para no desalojar las páginas calientes).
+        """
+        self.pool.flush(self.filename)
+        slot = self.slot_size
+        per_chunk = max(1, (chunk_size or self.SCAN_CHUNK_SIZE) // slot)
+
+        if self.use_mmap:
+            mapped = memoryview(self._mapped())
+            fh = None
+        else:
+            fh = open(self.filename, "rb")
+            fh.seek(METADATA_SIZE)
+
+        with fh if fh is not None else mapped:
+            pos = 0
+            while pos < self.heap_size:
+                want = min(per_chunk, self.heap_size - pos)
+                if fh is None:
+                    start = METADATA_SIZE + pos * slot
+                    view = mapped[start : start + want * slot]
+                    n = len(view) // slot
+                else:
+                    data = fh.read(want * slot)
+                    n = len(data) // slot
+                    view = memoryview(data)[: n * slot]
+                if n == 0:
+                    break
+                yield pos, view, n
+                pos += n
+                if n < want:
+                    break
+
+    def _mapped(self) -> mmap.mmap:
+        """Devuelve el mapeo del .dat, rehaciéndolo si el archivo creció
+        (p. ej. tras un append de insert_record) y ya no cubre heap_size."""
+        self.pool.flush(self.filename)
+        needed = self._file_extent()
+        if self._mm is None or len(self._mm) < needed:
+            self.close()
+            with open(self.filename, "rb") as fh:
+                self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def close(self) -> None:
+        """Libera el mapeo en memoria, si lo hay."""
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # aún hay vistas vivas (p. ej. un recorrido sin terminar);
+                # el mapeo se libera cuando se suelten
+                pass
+            self._mm = None
+
+    def _scan(
+        self, skip_deleted: bool = True, chunk_size: Optional[int] = None
+    ) -> Iterator[Tuple[int, list]]:
+        """Recorre el heap por bloques y devuelve (offset, valores) por slot.
+
+        Cada bloque de _slot_blocks trae ``chunk_size`` bytes de slots
+        completos y se decodifica sobre un memoryview, así el puntero
+        next_free ya no cuesta un seek por fila. Los huecos se omiten salvo
+        que ``skip_deleted`` sea False (se consulta el bitmap de vivos).
+        """
+        slot = self.slot_size
+        alive = self.live_mask().tolist() if skip_deleted else None
+
+        # Si el esquema es plano y el struct "registro + ptr" coincide con el
+        # slot (sin padding extra), iter_unpack decodifica el bloque entero.
+        slot_struct = None
+        if self.codec.flat:
+            candidate = struct.Struct(self.codec.format + "i")
+            if candidate.size == slot:
+                slot_struct = candidate
+        decode = self.codec.decode
+
+        for first, view, n in self._slot_blocks(chunk_size):
+            if slot_struct is not None:
+                rows = (list(raw[:-1]) for raw in slot_struct.iter_unpack(view))
+            else:
+                rows = (decode(view, i * slot) for i in range(n))
+
+            for i, values in enumerate(rows):
+                if alive is not None and not alive[first + i]:
+                    continue
+                yield first + i, values
 
     # ------------------------------------------------------------------
     # Inserción ---------------------------------------------------------
     # ------------------------------------------------------------------
 
+    def _summaries_add(self, positions: List[int], rows: List[list], new_rows: bool = True) -> None:
+        """Registra filas escritas en el mapa de zonas y los filtros de Bloom."""
+        self.zones.add(positions, rows, new_rows)
+        if self.blooms:
+            names = [n for n, _ in self.schema]
+            for name, bloom in self.blooms.items():
+                idx = names.index(name)
+                bloom.add(positions, [values[idx] for values in rows])
+
     def _process_text_fields(self, record: Record) -> None:
         for idx, (field_name, fmt) in enumerate(record.schema):
             if fmt == "text":
@@ -153,38 +509,21 @@ class HeapFile:
             if pk_val == self._sentinel(pk_fmt):
                 raise ValueError("Sentinel value not allowed in PK.")
 
-            with open(self.filename, "rb") as fh:  # una sola apertura
-                fh.seek(METADATA_SIZE)
-                for _ in range(self.heap_size):
-                    buf = fh.read(self.rec_data_size)
-                    if len(buf) < self.rec_data_size:
-                        break
-                    if Record.unpack(buf, self.schema).values[pk_idx] == pk_val:
-                        raise ValueError(f"Duplicated primary key with value: {pk_val}")
-                    fh.seek(PTR_SIZE, os.SEEK_CUR)  # saltar next_free
+            if self._pk_may_exist([pk_val])[0] and pk_val in self._pk_slots():
+                raise ValueError(f"Duplicated primary key with value: {pk_val}")
 
         self._process_text_fields(record)
         self._process_sound_fields(record)
 
         # ── 2. Insertar (reciclar hueco o append) ─────────────────────
-        with open(self.filename, "r+b") as fh:
-            if self.free_head == -1:  # sin huecos → append
-                slot_off = self.heap_size
-                fh.seek(0, os.SEEK_END)
-                fh.write(record.pack())
-                fh.write(struct.pack("i", 0))  # next_free = 0
-                self.heap_size += 1
-            else:  # reciclar hueco
-                slot_off = self.free_head
-                byte_off = METADATA_SIZE + slot_off * self.slot_size
-                fh.seek(byte_off + self.rec_data_size)
-                self.free_head = struct.unpack("i", fh.read(4))[0]  # siguiente libre
-                fh.seek(byte_off)
-                fh.write(record.pack())
-                fh.write(struct.pack("i", 0))
-            self._write_header(fh)  # actualizar cabecera
-            Logger.log_info(f"Record: {record} inserted correctly")
-            return slot_off
+        (slot_off,) = self._allocate(1)
+        self._write_slots([(slot_off, record.pack() + struct.pack("i", 0))])
+        Logger.log_info(f"Record: {record} inserted correctly")
+        self.live.set(slot_off)
+        self._summaries_add([slot_off], [record.values])
+        if self.primary_key:
+            self._pk_update(added=[(pk_val, slot_off)])
+        return slot_off
 
     def insert_record_free(self, record: Record) -> int:
         """Inserta un registro sin verificar unicidad de PK. Usa free-list si hay huecos."""
@@ -194,27 +533,78 @@ class HeapFile:
         self._process_text_fields(record)
         self._process_sound_fields(record)
 
-        with open(self.filename, "r+b") as fh:
-            if self.free_head == -1:  # sin huecos → append
-                slot_off = self.heap_size
-                fh.seek(0, os.SEEK_END)
-                fh.write(record.pack())
-                fh.write(struct.pack("i", 0))  # next_free = 0
-                self.heap_size += 1
-            else:  # reciclar hueco
-                slot_off = self.free_head
-                byte_off = METADATA_SIZE + slot_off * self.slot_size
-                fh.seek(byte_off + self.rec_data_size)
-                self.free_head = struct.unpack("i", fh.read(4))[0]  # siguiente libre
-                fh.seek(byte_off)
-                fh.write(record.pack())
-                fh.write(struct.pack("i", 0))
-
-            self._write_header(fh)
-            Logger.log_info(
-                f"Record with no PK restriction: {record} inserted at offset {slot_off}"
+        (slot_off,) = self._allocate(1)
+        self._write_slots([(slot_off, record.pack() + struct.pack("i", 0))])
+        Logger.log_info(
+            f"Record with no PK restriction: {record} inserted at offset {slot_off}"
+        )
+        self.live.set(slot_off)
+        self._summaries_add([slot_off], [record.values])
+        if self.primary_key:
+            pk_idx, _ = self._pk_idx_fmt()
+            self._pk_update(added=[(record.values[pk_idx], slot_off)])
+        return slot_off
+
+    def insert_many(self, records: List[Record]) -> List[int]:
+        """Inserta un lote de registros y devuelve sus offsets (mismo orden).
+
+        Valida la PK de todo el lote con un solo recorrido antes de escribir
+        nada, escribe los textos/sonidos de cada campo en bloque, recicla los
+        huecos de la free-list y agrega el resto con un único write. La
+        cabecera se actualiza una sola vez.
+        """
+        if not records:
+            return []
+        for record in records:
+            if record.schema != self.schema:
+                raise ValueError("Record and Heapfile schema mismatch.")
+
+        # ── 1. Unicidad de PK (contra el heap y dentro del lote) ──────
+        if self.primary_key:
+            pk_idx, pk_fmt = self._pk_idx_fmt()
+            sentinel = self._sentinel(pk_fmt)
+            keys = [record.values[pk_idx] for record in records]
+            maybe = self._pk_may_exist(keys)
+            existing = self._pk_slots() if any(maybe) else {}
+            batch_keys = set()
+            for pk_val, may_exist in zip(keys, maybe):
+                if pk_val == sentinel:
+                    raise ValueError("Sentinel value not allowed in PK.")
+                if pk_val in batch_keys or (may_exist and pk_val in existing):
+                    raise ValueError(f"Duplicated primary key with value: {pk_val}")
+                batch_keys.add(pk_val)
+
+        # ── 2. Campos externos, un archivo a la vez ───────────────────
+        for idx, (field_name, fmt) in enumerate(self.schema):
+            if fmt == "text":
+                offsets = TextFile(self.table_name, field_name).insert_many(
+                    [record.values[idx] for record in records]
+                )
+                for record, offset in zip(records, offsets):
+                    record.values[idx] = offset
+            elif fmt.upper() == "SOUND":
+                pending = [r for r in records if isinstance(r.values[idx], str)]
+                if pending:
+                    sound_file = Sound(self.filename.replace(".dat", ""), field_name)
+                    offsets = sound_file.insert_many([r.values[idx] for r in pending])
+                    for record, offset in zip(pending, offsets):
+                        record.values[idx] = (offset, -1)
+
+        # ── 3. Escribir: huecos primero, el resto en un solo append ───
+        slots = self._allocate(len(records))
+        next_ptr = struct.pack("i", 0)
+        self._write_slots(
+            [(slot, r.pack() + next_ptr) for slot, r in zip(slots, records)]
+        )
+
+        self.live.set_many(slots)
+        self._summaries_add(slots, [r.values for r in records])
+        if self.primary_key:
+            self._pk_update(
+                added=[(r.values[pk_idx], slot) for r, slot in zip(records, slots)]
             )
-            return slot_off
+        Logger.log_info(f"{len(records)} records inserted into {self.table_name}")
+        return slots
 
     # ------------------------------------------------------------------
     # Borrado -----------------------------------------------------------
@@ -222,40 +612,123 @@ class HeapFile:
     def delete_by_pk(self, key) -> Tuple[bool, int, Optional[Record]]:
         if self.primary_key is None:
             raise ValueError("Tabla sin clave primaria.")
-        pk_idx, pk_fmt = self._pk_idx_fmt()
-        sentinel = self._sentinel(pk_fmt)
 
-        with open(self.filename, "r+b") as fh:
-            for pos in range(self.heap_size):
-                byte_off = METADATA_SIZE + pos * self.slot_size
-                fh.seek(byte_off)
-                buf = fh.read(self.rec_data_size)
-                rec = Record.unpack(buf, self.schema)
-                old_rec = Record.unpack(buf, self.schema)
-                if rec.values[pk_idx] != key:
-                    continue
-                # Borrar campos tipo text
-                for i, (field_name, fmt) in enumerate(self.schema):
-                    if fmt == "text":
-                        offset = old_rec.values[i]
-                        TextFile(self.table_name, field_name).delete(offset)
-                    elif fmt.upper() == "SOUND":
-                        sound_offset, _ = old_rec.values[i]
-                        Sound(self.filename.replace(".dat", ""), field_name).delete(
-                            sound_offset
-                        )
-                # marcar hueco: set PK = sentinel y next_free = free_head
-                rec.values[pk_idx] = sentinel
-                fh.seek(byte_off)
-                fh.write(rec.pack())
-                fh.write(struct.pack("i", self.free_head))
-                self.free_head = pos
-                self._write_header(fh)
-                Logger.log_info(
-                    "Record with PK: {key}, with content: {old_rec} deleted correctly."
+        pos = self._locate_pk(key)
+        if pos is None:
+            return False, -1, None
+        return self.delete_by_offset(pos)
+
+    def delete_by_offset(self, pos: int) -> Tuple[bool, int, Optional[Record]]:
+        """Borra el registro del slot ``pos``. Funciona también en tablas
+        sin PK: el bitmap de vivos es lo que marca el hueco."""
+        if pos < 0 or pos >= self.heap_size or not self.live.is_live(pos):
+            return False, -1, None
+
+        values = self._read_values(pos)
+        old_rec = Record(self.schema, list(values), self.codec)
+        # Borrar campos tipo text
+        for i, (field_name, fmt) in enumerate(self.schema):
+            if fmt == "text":
+                TextFile(self.table_name, field_name).delete(values[i])
+            elif fmt.upper() == "SOUND":
+                sound_offset, _ = values[i]
+                Sound(self.filename.replace(".dat", ""), field_name).delete(
+                    sound_offset
+                )
+
+        # marcar hueco: PK = centinela (si hay PK) y next_free = free_head
+        key = None
+        if self.primary_key is not None:
+            pk_idx, pk_fmt = self._pk_idx_fmt()
+            key = values[pk_idx]
+            values[pk_idx] = self._sentinel(pk_fmt)
+        image = self.codec.encode(values) + struct.pack("i", self.free_head)
+        self.free_head = pos
+        self._write_slots([(pos, image)], live=False)
+        self.live.set(pos, False)
+        self.zones.remove([pos])
+        Logger.log_info(
+            f"Record at offset {pos}, with content: {old_rec} deleted correctly."
+        )
+        if self.primary_key is not None:
+            self._pk_update(removed=[key])
+        return True, pos, old_rec
+
+    # ------------------------------------------------------------------
+    # Compactación (VACUUM) --------------------------------------------
+    # ------------------------------------------------------------------
+    def _dense_file(self, images: List[bytes]) -> Iterator[bytes]:
+        """Contenido de un .dat sin huecos con los slots ``images`` en orden
+        (PagedHeapFile lo redefine para armar páginas)."""
+        yield struct.pack(METADATA_FORMAT, len(images), -1)
+        yield b"".join(images)
+
+    def vacuum(self) -> dict:
+        """Reescribe la tabla sin huecos y devuelve {offset_viejo: offset_nuevo}.
+
+        • Un solo recorrido de los slots vivos; los registros quedan en los
+          offsets 0..n-1 respetando su orden y la free-list queda vacía.
+        • Los archivos de text, sound e histogramas se reescriben con solo
+          las entradas que siguen referenciadas (los borrados solo habían
+          marcado su largo con -1) y se corrigen los offsets en cada registro.
+        • El .dat nuevo se escribe aparte y reemplaza al viejo con os.replace.
+        Los índices secundarios guardan offsets viejos: quien llame debe
+        reconstruirlos o remapearlos con el mapa devuelto.
+        """
+        before = self.heap_size
+        rows = [(pos, values) for pos, values in self._scan()]
+        moved = {old: new for new, (old, _) in enumerate(rows)}
+
+        # ── 1. Archivos externos: solo las entradas vivas ─────────────
+        base = self.filename[: -len(".dat")]
+        for idx, (field_name, fmt) in enumerate(self.schema):
+            if fmt == "text":
+                text_map = TextFile(self.table_name, field_name).compact(
+                    values[idx] for _, values in rows
                 )
-                return True, pos, old_rec
-        return False, -1, None
+                for _, values in rows:
+                    values[idx] = text_map.get(values[idx], values[idx])
+            elif fmt.upper() == "SOUND":
+                sound_map = Sound(base, field_name).compact(
+                    values[idx][0] for _, values in rows
+                )
+                try:
+                    hist_map = HistogramFile(base, field_name).compact(
+                        values[idx][1] for _, values in rows
+                    )
+                except FileNotFoundError:  # tabla sin histogramas
+                    hist_map = {}
+                for _, values in rows:
+                    sound_offset, hist_offset = values[idx]
+                    values[idx] = (
+                        sound_map.get(sound_offset, -1),
+                        hist_map.get(hist_offset, -1),
+                    )
+
+        # ── 2. Heap denso ─────────────────────────────────────────────
+        next_ptr = struct.pack("i", 0)
+        images = [self.codec.encode(values) + next_ptr for _, values in rows]
+        self.pool.flush(self.filename)
+        tmp = self.filename + ".tmp"
+        with open(tmp, "wb") as fh:
+            for chunk in self._dense_file(images):
+                fh.write(chunk)
+        self.close()
+        os.replace(tmp, self.filename)
+        self.pool.invalidate(self.filename)
+        LiveBitmap.build_file(self.live_filename, range(len(images)))
+        _PK_SLOTS.pop(os.path.abspath(self.filename), None)
+        self.refresh()
+        arr, live = self.to_numpy(), self.live_mask()
+        ZoneMap.build_file(self.zone_filename, self.schema, arr, live)
+        fmts = dict(self.schema)
+        for name, bloom in self.blooms.items():
+            BloomFilter.build_file(bloom.filename, fmts[name], bloom.fp_rate, arr[name], live)
+
+        Logger.log_info(
+            f"Table {self.table_name} vacuumed: {before} slots -> {self.heap_size}"
+        )
+        return moved
 
     # ------------------------------------------------------------------
     #  Búsqueda secuencial por cualquier campo --------------------------
@@ -275,51 +748,33 @@ class HeapFile:
             raise KeyError(f"Campo '{field}' no existe en el esquema.")
         fld_idx = names.index(field)
 
-        # --- info de PK/tombstone -----------------------------------------
-        pk_idx, pk_sentinel = None, None
-        stop_early = False
-        if self.primary_key is not None:
-            pk_idx, pk_fmt = self._pk_idx_fmt()
-            pk_sentinel = self._sentinel(pk_fmt)
-            stop_early = field == self.primary_key
+        # --- si es la PK basta la primera coincidencia ---------------------
+        stop_early = self.primary_key is not None and field == self.primary_key
 
         resultados = []
 
-        with open(self.filename, "rb") as fh:
-            fh.seek(METADATA_SIZE)
-            for _ in range(self.heap_size):
-                buf = fh.read(self.rec_data_size)
-                if len(buf) < self.rec_data_size:
-                    break
-                rec = Record.unpack(buf, self.schema)
+        # el recorrido ya ignora huecos
+        for _, values in self._scan():
+            if values[fld_idx] == value:
+                # --- Reemplazar offsets por contenido real para campos 'text' ---
+                updated_values = values
+                for i, (fname, fmt) in enumerate(self.schema):
+                    if fmt.upper() == "TEXT":
+                        offset = updated_values[i]
+                        updated_values[i] = TextFile(self.table_name, fname).read(
+                            offset
+                        )
+                    elif fmt.upper() == "SOUND":
+                        if not crude_data:
+                            sound_offset, _ = updated_values[i]
+                            updated_values[i] = Sound(
+                                self.filename.replace(".dat", ""), fname
+                            ).read(sound_offset)
 
-                # ignorar huecos
-                if pk_idx is not None and rec.values[pk_idx] == pk_sentinel:
-                    fh.seek(PTR_SIZE, os.SEEK_CUR)
-                    continue
+                resultados.append(Record(self.schema, updated_values, self.codec))
 
-                if rec.values[fld_idx] == value:
-                    # --- Reemplazar offsets por contenido real para campos 'text' ---
-                    updated_values = list(rec.values)
-                    for i, (fname, fmt) in enumerate(self.schema):
-                        if fmt.upper() == "TEXT":
-                            offset = updated_values[i]
-                            updated_values[i] = TextFile(self.table_name, fname).read(
-                                offset
-                            )
-                        elif fmt.upper() == "SOUND":
-                            if not crude_data:
-                                sound_offset, _ = updated_values[i]
-                                updated_values[i] = Sound(
-                                    self.filename.replace(".dat", ""), fname
-                                ).read(sound_offset)
-
-                    resultados.append(Record(self.schema, updated_values))
-
-                    if stop_early:
-                        break
-
-                fh.seek(PTR_SIZE, os.SEEK_CUR)
+                if stop_early:
+                    break
 
         # devolver un solo registro si sólo hay uno, si prefieres:
         # return resultados[0] if len(resultados) == 1 else resultados
@@ -334,54 +789,151 @@ class HeapFile:
             raise KeyError(f"Campo '{field}' no existe.")
         fld_idx = names.index(field)
 
-        pk_idx, pk_sentinel = None, None
-        if self.primary_key is not None:
-            pk_idx, pk_fmt = self._pk_idx_fmt()
-            pk_sentinel = self._sentinel(pk_fmt)
-
-        out, pos = [], 0
-        with open(self.filename, "rb") as fh:
-            fh.seek(METADATA_SIZE)
-            while pos < self.heap_size:
-                buf = fh.read(self.rec_data_size)
-                if len(buf) < self.rec_data_size:
-                    break
-                rec = Record.unpack(buf, self.schema)
-                # saltar huecos
-                if pk_idx is not None and rec.values[pk_idx] == pk_sentinel:
-                    fh.seek(PTR_SIZE, os.SEEK_CUR)
-                    pos += 1
-                    continue
-                out.append((rec.values[fld_idx], pos))
-                fh.seek(PTR_SIZE, os.SEEK_CUR)
-                pos += 1
-        return out
+        return [(values[fld_idx], pos) for pos, values in self._scan()]
 
     # ------------------------------------------------------------------
     # Fetch por offset --------------------------------------------------
     # ------------------------------------------------------------------
     def fetch_record_by_offset(self, pos: int) -> Record:
-        if pos < 0 or pos >= self.heap_size:
-            raise IndexError("Offset fuera de rango")
+        (values,) = self.fetch_projection([pos], range(len(self.schema)))
+        return Record(self.schema, values, self.codec)
+
+    def _lob_readers(self, positions) -> dict:
+        """Un lector por columna TEXT/SOUND de ``positions``: recibe la
+        columna de valores crudos y devuelve los contenidos (se abre una
+        sola vez por consulta y lee en lote con read_many)."""
+        readers = {}
+        for i in positions:
+            fname, fmt = self.schema[i]
+            if i in readers:
+                continue
+            if fmt.upper() == "TEXT":
+                readers[i] = TextFile(self.table_name, fname).read_many
+            elif fmt.upper() == "SOUND":
+                sound_file = Sound(self.filename.replace(".dat", ""), fname)
+                readers[i] = lambda column, f=sound_file: f.read_many(v[0] for v in column)
+        return readers
+
+    def resolve_column(self, index: int, raw: list) -> list:
+        """Contenido de la columna TEXT/SOUND ``index`` a partir de sus valores
+        crudos (offsets), leído en lote; las demás columnas vuelven igual."""
+        reader = self._lob_readers([index]).get(index)
+        return raw if reader is None else reader(raw)
+
+    def fetch_projection(self, offsets, positions) -> List[list]:
+        """Valores de las columnas ``positions`` (en ese orden) para cada
+        offset de ``offsets``, en el mismo orden.
+
+        Solo se leen los archivos de text/sound de las columnas pedidas, con
+        un lector por archivo para toda la llamada y en una sola pasada
+        ordenada por offset; el resto de los campos externos no se tocan.
+        """
+        positions = list(positions)
+        readers = self._lob_readers(positions)
+        raw = []
+        for pos in offsets:
+            if pos < 0 or pos >= self.heap_size:
+                raise IndexError("Offset fuera de rango")
+            raw.append(self._read_values(pos))
+
+        resolved = {}
+        for i in positions:
+            if i not in resolved:
+                column = [values[i] for values in raw]
+                reader = readers.get(i)
+                resolved[i] = column if reader is None else reader(column)
+        return [[resolved[i][k] for i in positions] for k in range(len(raw))]
 
-        with open(self.filename, "rb") as fh:
-            fh.seek(METADATA_SIZE + pos * self.slot_size)
-            buf = fh.read(self.rec_data_size)
-            record = Record.unpack(buf, self.schema)
+    # ------------------------------------------------------------------
+    # Vista columnar con NumPy -----------------------------------------
+    # ------------------------------------------------------------------
+    def numpy_dtype(self) -> np.dtype:
+        """dtype estructurado equivalente a un slot completo.
 
-            # Procesar campos de texto
-            updated_values = list(record.values)
-            for i, (fname, fmt) in enumerate(self.schema):
-                if fmt.upper() == "TEXT":
-                    offset = updated_values[i]
-                    updated_values[i] = TextFile(self.table_name, fname).read(offset)
-                elif fmt.upper() == "SOUND":
-                    sound_offset, _ = updated_values[i]
-                    updated_values[i] = Sound(
-                        self.filename.replace(".dat", ""), fname
-                    ).read(sound_offset)
+        i→int32, f→float32, Ns→S{n}, SOUND→2×int32, tuplas→subarreglos y
+        el puntero next_free al final. Los offsets se calculan con el mismo
+        alineamiento nativo que usa struct, así el dtype calza byte a byte.
+        """
+        names, formats, offsets = [], [], []
+        prefix = ""
+        for name, fmt in self.schema:
+            char = Record.get_format_char_static(fmt)
+            if fmt.upper() == "SOUND":
+                np_fmt = ("i4", (2,))
+            elif char.endswith("s"):
+                np_fmt = f"S{char[:-1]}"
+            elif char[:-1].isdigit():
+                np_fmt = (np.dtype(char[-1]), (int(char[:-1]),))
+            else:
+                np_fmt = np.dtype(char)
+            names.append(name)
+            formats.append(np_fmt)
+            offsets.append(struct.calcsize(prefix + char) - struct.calcsize(char))
+            prefix += char
+        names.append(NEXT_FREE_FIELD)
+        formats.append("i4")
+        offsets.append(self.rec_data_size)
+        return np.dtype(
+            {
+                "names": names,
+                "formats": formats,
+                "offsets": offsets,
+                "itemsize": self.slot_size,
+            }
+        )
 
-            return Record(self.schema, updated_values)
+    def to_numpy(self) -> np.ndarray:
+        """Carga todos los slots (huecos incluidos) como arreglo estructurado.
+
+        En modo mmap el arreglo es una vista de solo lectura sobre el mapeo.
+        """
+        dtype = self.numpy_dtype()
+        if self.use_mmap:
+            return np.frombuffer(
+                self._mapped(), dtype=dtype, count=self.heap_size, offset=METADATA_SIZE
+            )
+        self.pool.flush(self.filename)
+        return np.fromfile(
+            self.filename, dtype=dtype, count=self.heap_size, offset=METADATA_SIZE
+        )
+
+    def to_numpy_range(self, start: int, end: int) -> np.ndarray:
+        """Slots [start, end) como arreglo estructurado; lee solo ese tramo."""
+        dtype = self.numpy_dtype()
+        end = min(end, self.heap_size)
+        if start >= end:
+            return np.zeros(0, dtype=dtype)
+        offset = METADATA_SIZE + start * self.slot_size
+        if self.use_mmap:
+            return np.frombuffer(self._mapped(), dtype=dtype, count=end - start, offset=offset)
+        self.pool.flush(self.filename)
+        return np.fromfile(self.filename, dtype=dtype, count=end - start, offset=offset)
+
+    def take(self, positions) -> np.ndarray:
+        """Slots ``positions`` (en ese orden) como arreglo estructurado; en
+        modo mmap se indexa la vista sin copiar el resto del heap."""
+        positions = np.asarray(positions, dtype=np.int64)
+        dtype = self.numpy_dtype()
+        if len(positions) and (positions.min() < 0 or positions.max() >= self.heap_size):
+            raise IndexError("Offset fuera de rango")
+        if self.use_mmap:
+            return self.to_numpy()[positions]
+        raw = b"".join(bytes(self._read_slot(pos)) for pos in positions.tolist())
+        return np.frombuffer(raw, dtype=dtype, count=len(positions))
+
+    def live_mask(self) -> np.ndarray:
+        """Máscara booleana (largo heap_size) de slots vivos, según el bitmap."""
+        return self.live.mask(self.heap_size)
+
+    def _sentinel_mask(self, arr: np.ndarray) -> np.ndarray:
+        """Slots cuya PK no es el centinela (formato previo al bitmap)."""
+        if self.primary_key is None:
+            return np.ones(len(arr), dtype=bool)
+        pk_idx, pk_fmt = self._pk_idx_fmt()
+        sentinel = self._sentinel(pk_fmt)
+        if isinstance(sentinel, str):
+            sentinel = sentinel.encode("utf-8")
+        return arr[self.primary_key] != sentinel
 
     # ------------------------------------------------------------------
     # Utilidades de depuración -----------------------------------------
@@ -391,117 +943,63 @@ class HeapFile:
         names = [n for n, _ in self.schema]
         print(" | ".join(names))
         print("-" * 10 * len(names))
-        with open(self.filename, "rb") as fh:
-            fh.seek(METADATA_SIZE)
-            for i in range(self.heap_size):
-                buf = fh.read(self.rec_data_size)
-                rec = Record.unpack(buf, self.schema)
-                # Reemplazar offsets por texto real
-                for idx, (name, fmt) in enumerate(self.schema):
-                    if fmt.upper() == "TEXT":
-                        offset = rec.values[idx]
-                        text_file = TextFile(self.table_name, name)
-                        text_content = text_file.read(offset)
-                        rec.values[idx] = text_content
-                    elif fmt.upper() == "SOUND":
-                        sound_offset, _ = rec.values[idx]
-                        sound_file = Sound(self.filename.replace(".dat", ""), name)
-                        sound_path = sound_file.read(sound_offset)
-                        rec.values[idx] = sound_path
+        for _, values in self._scan(skip_deleted=False):
+            rec = Record(self.schema, values, self.codec)
+            # Reemplazar offsets por texto real
+            for idx, (name, fmt) in enumerate(self.schema):
+                if fmt.upper() == "TEXT":
+                    offset = rec.values[idx]
+                    text_file = TextFile(self.table_name, name)
+                    text_content = text_file.read(offset)
+                    rec.values[idx] = text_content
+                elif fmt.upper() == "SOUND":
+                    sound_offset, _ = rec.values[idx]
+                    sound_file = Sound(self.filename.replace(".dat", ""), name)
+                    sound_path = sound_file.read(sound_offset)
+                    rec.values[idx] = sound_path
 
-                print(rec)
-                fh.seek(PTR_SIZE, os.SEEK_CUR)
+            print(rec)
 
     # ------------------------------------------------------------------
     # Utilidades de parser ---------------------------------------------
     # ------------------------------------------------------------------
 
     def get_all_offsets(self) -> set[int]:
-        offsets: set[int] = set()
-        pk_idx, pk_sentinel = None, None
-        if self.primary_key is not None:
-            pk_idx, pk_fmt = self._pk_idx_fmt()
-            pk_sentinel = self._sentinel(pk_fmt)
+        return set(np.flatnonzero(self.live_mask()).tolist())
 
-        with open(self.filename, "rb") as f:
-            f.seek(METADATA_SIZE)
-            pos = 0
-            while pos < self.heap_size:
-                buf = f.read(self.rec_data_size)
-                if len(buf) < self.rec_data_size:
-                    break
-                rec = Record.unpack(buf, self.schema)
-                # si no es hueco, lo incluimos
-                if not (pk_idx is not None and rec.values[pk_idx] == pk_sentinel):
-                    offsets.add(pos)
-                # saltar puntero next_free
-                f.seek(PTR_SIZE, os.SEEK_CUR)
-                pos += 1
-        return offsets
+    def count(self) -> int:
+        """Cantidad de registros vivos (lee solo el bitmap)."""
+        return int(self.live_mask().sum())
 
     def get_all_records(self) -> List[Record]:
         """Devuelve todos los registros no eliminados en una lista."""
-        records = []
-        with open(self.filename, "rb") as f:
-            f.seek(METADATA_SIZE)
-            pk_idx, pk_sentinel = None, None
-
-            # get pk for deleted files
-            if self.primary_key is not None:
-                pk_idx, pk_fmt = self._pk_idx_fmt()
-                pk_sentinel = self._sentinel(pk_fmt)
-
-            for _ in range(self.heap_size):
-                buf = f.read(self.rec_data_size)
-                if len(buf) < self.rec_data_size:
-                    break
-
-                rec = Record.unpack(buf, self.schema)
-
-                # skips del records
-                if pk_idx is not None and rec.values[pk_idx] == pk_sentinel:
-                    f.seek(PTR_SIZE, os.SEEK_CUR)
-                    continue
-                records.append(rec)
-                f.seek(PTR_SIZE, os.SEEK_CUR)
-        return records
+        return [Record(self.schema, values, self.codec) for _, values in self._scan()]
 
     @staticmethod
     def to_dataframe(heapfile: "HeapFile", alias=None) -> pd.DataFrame:
-        with open(heapfile.filename, "rb") as f:
-            f.seek(METADATA_SIZE)
-            headers = [
-                (heapfile.table_name if alias is None else alias) + "." + column_name
-                for column_name, _ in heapfile.schema
-            ]
-            rows = []
-
-            # get pk for deleted files
-            pk_idx, pk_sentinel = None, None
-            if heapfile.primary_key is not None:
-                pk_idx, pk_fmt = heapfile._pk_idx_fmt()
-                pk_sentinel = heapfile._sentinel(pk_fmt)
-
-            for _ in range(heapfile.heap_size):
-                buf = f.read(heapfile.rec_data_size)
-                if len(buf) < heapfile.rec_data_size:
-                    break
-
-                rec = Record.unpack(buf, heapfile.schema)
-
-                # skips del records
-                if pk_idx is not None and rec.values[pk_idx] == pk_sentinel:
-                    f.seek(PTR_SIZE, os.SEEK_CUR)  # skips ptr
-                    continue
-
-                row = {name: value for name, value in zip(headers, rec.values)}
-                rows.append(row)
-
-                # skips next_free
-                f.seek(PTR_SIZE, os.SEEK_CUR)
-
-            df = pd.DataFrame(rows, columns=headers)
-        return df
+        headers = [
+            (heapfile.table_name if alias is None else alias) + "." + column_name
+            for column_name, _ in heapfile.schema
+        ]
+        arr = heapfile.to_numpy()
+        arr = arr[heapfile.live_mask()]
+
+        columns = {}
+        for header, (name, _) in zip(headers, heapfile.schema):
+            col = arr[name]
+            if col.ndim > 1:  # tuplas / SOUND → tuplas de Python
+                columns[header] = [tuple(v) for v in col.tolist()]
+            elif col.dtype.kind == "S":
+                columns[header] = [
+                    b.decode("utf-8", errors="replace") for b in col.tolist()
+                ]
+            elif col.dtype.kind == "f":
+                columns[header] = col.astype(np.float64)
+            elif col.dtype.kind in "iu":
+                columns[header] = col.astype(np.int64)
+            else:
+                columns[header] = col
+        return pd.DataFrame(columns, columns=headers)
 
     # esto es para el spimi, se supone (segun gpt) yield hace que retornes los elementos
     # de una lista de uno en uno, no todo de golpe lo que llenaria la ram
@@ -512,25 +1010,24 @@ class HeapFile:
         """
         text_fields = [i for i, (_, fmt) in enumerate(self.schema) if fmt == "text"]
         pk_idx, _ = self._pk_idx_fmt()
-        sentinel = self._sentinel(self.schema[pk_idx][1])
+        files = [TextFile(self.table_name, self.schema[idx][0]) for idx in text_fields]
 
-        with open(self.filename, "rb") as fh:
-            fh.seek(METADATA_SIZE)
-            for i in range(self.heap_size):
-                buf = fh.read(self.rec_data_size)
-                if len(buf) < self.rec_data_size:
-                    break
-                rec = Record.unpack(buf, self.schema)
-                if rec.values[pk_idx] == sentinel:
-                    fh.seek(PTR_SIZE, os.SEEK_CUR)
-                    continue
-                text = " ".join(
-                    TextFile(self.table_name, self.schema[idx][0]).read(offset)
-                    for idx in text_fields
-                    for offset in [rec.values[idx]]
-                )
-                fh.seek(PTR_SIZE, os.SEEK_CUR)
-                yield rec.values[pk_idx], text
+        # los textos se leen por lotes de filas, ordenados por offset
+        def documents(batch):
+            columns = [
+                f.read_many(values[idx] for values in batch)
+                for f, idx in zip(files, text_fields)
+            ]
+            for k, values in enumerate(batch):
+                yield values[pk_idx], " ".join(column[k] for column in columns)
+
+        batch = []
+        for _, values in self._scan():
+            batch.append(values)
+            if len(batch) >= self.TEXT_BATCH:
+                yield from documents(batch)
+                batch = []
+        yield from documents(batch)
 
     def update_record(self, record: Record):
         if record.schema != self.schema:
@@ -539,25 +1036,20 @@ class HeapFile:
         pk_idx, _ = self._pk_idx_fmt()
         pk_value = record.values[pk_idx]
 
-        with open(self.filename, "r+b") as fh:
-            for pos in range(self.heap_size):
-                byte_off = METADATA_SIZE + pos * self.slot_size
-                fh.seek(byte_off)
-                buf = fh.read(self.rec_data_size)
-                rec = Record.unpack(buf, self.schema)
-                if rec.values[pk_idx] == pk_value:
-                    # Decode string values before packing
-                    for i, (fname, fmt) in enumerate(self.schema):
-                        if "s" in Record.get_format_char_static(fmt) and isinstance(
-                            record.values[i], bytes
-                        ):
-                            record.values[i] = (
-                                record.values[i].decode("utf-8").strip("\x00")
-                            )
-                    fh.seek(byte_off)
-                    fh.write(record.pack())
-                    return True
-        return False
+        pos = self._locate_pk(pk_value)
+        if pos is None:
+            return False
+
+        # Decode string values before packing
+        for i, (fname, fmt) in enumerate(self.schema):
+            if "s" in Record.get_format_char_static(fmt) and isinstance(
+                record.values[i], bytes
+            ):
+                record.values[i] = record.values[i].decode("utf-8").strip("\x00")
+        self._write_slots([(pos, record.pack() + struct.pack("i", 0))])
+        self._summaries_add([pos], [record.values], new_rows=False)
+        self._pk_update()
+        return True
 
     def search_offsets_by_field(self, field: str, value):
         """
@@ -568,32 +1060,12 @@ class HeapFile:
         if field not in names:
             raise KeyError(f"Campo '{field}' no existe en el esquema.")
         fld_idx = names.index(field)
-        # info de PK/tombstone
-        pk_idx, pk_sentinel = None, None
-        stop_early = False
-        if self.primary_key is not None:
-            pk_idx, pk_fmt = self._pk_idx_fmt()
-            pk_sentinel = self._sentinel(pk_fmt)
-            stop_early = field == self.primary_key
+        stop_early = self.primary_key is not None and field == self.primary_key
 
         offsets = []
-        with open(self.filename, "rb") as fh:
-            fh.seek(METADATA_SIZE)
-            pos = 0
-            while pos < self.heap_size:
-                buf = fh.read(self.rec_data_size)
-                if len(buf) < self.rec_data_size:
+        for pos, values in self._scan():
+            if values[fld_idx] == value:
+                offsets.append(pos)
+                if stop_early:
                     break
-                rec = Record.unpack(buf, self.schema)
-                # saltar huecos
-                if pk_idx is not None and rec.values[pk_idx] == pk_sentinel:
-                    fh.seek(PTR_SIZE, os.SEEK_CUR)
-                    pos += 1
-                    continue
-                if rec.values[fld_idx] == value:
-                    offsets.append(pos)
-                    if stop_early:
-                        break
-                fh.seek(PTR_SIZE, os.SEEK_CUR)
-                pos += 1
         return offsets
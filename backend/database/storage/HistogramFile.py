@@ -4,6 +4,7 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from global_utils import Utils
+from .BufferPool import BufferPool
 # Inicializar un HistogramFiile solo requiere el nombre, ya construye la ruta
 
 class HistogramFile:
@@ -14,7 +15,9 @@ class HistogramFile:
 
     def __init__(self, table_name: str, field_name: str):
         self.filename = Utils.build_path("tables",f"{table_name}.{field_name}.histogram.dat")
-        if not os.path.exists(self.filename):
+        try:
+            BufferPool.get().validate(self.filename)  # descarta frames viejos si cambió por fuera
+        except FileNotFoundError:
             raise FileNotFoundError(f"Archivo {self.filename} no existe. Llame a build_file primero.")
 
     @staticmethod
@@ -25,29 +28,45 @@ class HistogramFile:
             os.makedirs(os.path.dirname(filename), exist_ok=True)
             with open(filename, "wb") as f:
                 pass
+            BufferPool.get().invalidate(filename)
 
     def insert(self, histogram: list[tuple[int, int]]) -> int:
-        num_tuples = len(histogram)
-        with open(self.filename, "ab") as f:
-            offset = f.tell()
-            f.write(struct.pack("i", num_tuples))
-            for centroid_id, count in histogram:
-                f.write(struct.pack("ii", centroid_id, count))
-        return offset
+        data = struct.pack("i", len(histogram)) + b"".join(
+            struct.pack("ii", centroid_id, count) for centroid_id, count in histogram
+        )
+        return BufferPool.get().append(self.filename, data)
 
     def read(self, offset: int) -> list[tuple[int, int]]:
-        with open(self.filename, "rb") as f:
-            f.seek(offset)
-            num_tuples_bytes = f.read(self.INT_SIZE)
-            if len(num_tuples_bytes) < self.INT_SIZE:
-                return []
-            (num_tuples,) = struct.unpack("i", num_tuples_bytes)
-
-            histogram = []
-            for _ in range(num_tuples):
-                tuple_bytes = f.read(struct.calcsize("ii"))
-                if len(tuple_bytes) < struct.calcsize("ii"):
-                    break
-                centroid_id, count = struct.unpack("ii", tuple_bytes)
-                histogram.append((centroid_id, count))
-            return histogram
+        pool = BufferPool.get()
+        num_tuples_bytes = pool.read(self.filename, offset, self.INT_SIZE)
+        if len(num_tuples_bytes) < self.INT_SIZE:
+            return []
+        (num_tuples,) = struct.unpack("i", num_tuples_bytes)
+
+        pair_size = struct.calcsize("ii")
+        data = pool.read(self.filename, offset + self.INT_SIZE, num_tuples * pair_size)
+        usable = len(data) - len(data) % pair_size  # registro incompleto al final
+        return list(struct.iter_unpack("ii", data[:usable]))
+
+    def compact(self, offsets) -> dict[int, int]:
+        """Reescribe el archivo con solo las entradas de ``offsets`` (las que
+        siguen referenciadas), en orden de archivo, y devuelve
+        {offset_viejo: offset_nuevo}. Las entradas borradas desaparecen."""
+        pool = BufferPool.get()
+        pool.flush(self.filename)
+        moved: dict[int, int] = {}
+        tmp = self.filename + ".tmp"
+        with open(self.filename, "rb") as src, open(tmp, "wb") as dst:
+            for offset in sorted({o for o in offsets if o >= 0}):
+                src.seek(offset)
+                head = src.read(self.INT_SIZE)
+                if len(head) < self.INT_SIZE:
+                    continue
+                (n,) = struct.unpack("i", head)
+                if n < 0:  # SENTINEL: ya borrada
+                    continue
+                moved[offset] = dst.tell()
+                dst.write(head + src.read(n * struct.calcsize("ii")))
+        os.replace(tmp, self.filename)
+        pool.invalidate(self.filename)
+        return moved
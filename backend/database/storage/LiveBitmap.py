@@ -0,0 +1,70 @@
+from typing import Iterable
+
+import numpy as np
+
+from .BufferPool import BufferPool
+
+
+class LiveBitmap:
+    """Bitmap en disco de los slots vivos de un heap (bit i = slot i ocupado).
+
+    Ocupa n/8 bytes, así contar filas o listar offsets válidos no requiere
+    decodificar la tabla, y permite borrar en tablas sin clave primaria.
+    Orden de bits: el slot i está en el byte i // 8, bit i % 8 (little).
+    Lecturas y escrituras pasan por el buffer pool (y por el log, si está
+    activo), igual que el heap al que acompaña.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.pool = BufferPool.get()
+        try:
+            self.pool.validate(self.filename)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo {self.filename} no existe. Llame a build_file primero.")
+
+    @staticmethod
+    def build_file(filename: str, live_slots: Iterable[int] = ()) -> None:
+        """Crea (o sobrescribe) el bitmap con los slots indicados en 1."""
+        bits = bytearray()
+        for pos in live_slots:
+            byte = pos >> 3
+            if byte >= len(bits):
+                bits.extend(b"\x00" * (byte + 1 - len(bits)))
+            bits[byte] |= 1 << (pos & 7)
+        with open(filename, "wb") as f:
+            f.write(bits)
+        BufferPool.get().invalidate(filename)
+
+    def set_many(self, positions: Iterable[int], live: bool = True) -> None:
+        """Marca varios slots con una sola lectura y una sola escritura."""
+        positions = list(positions)
+        if not positions:
+            return
+        first = min(positions) >> 3
+        last = max(positions) >> 3
+        chunk = bytearray(self.pool.read(self.filename, first, last - first + 1))
+        chunk.extend(b"\x00" * (last - first + 1 - len(chunk)))  # crecer
+        for pos in positions:
+            mask = 1 << (pos & 7)
+            if live:
+                chunk[(pos >> 3) - first] |= mask
+            else:
+                chunk[(pos >> 3) - first] &= ~mask & 0xFF
+        self.pool.write(self.filename, first, bytes(chunk))
+
+    def set(self, pos: int, live: bool = True) -> None:
+        self.set_many([pos], live)
+
+    def is_live(self, pos: int) -> bool:
+        b = self.pool.read(self.filename, pos >> 3, 1)
+        return bool(b) and bool(b[0] & (1 << (pos & 7)))
+
+    def mask(self, n: int) -> np.ndarray:
+        """Arreglo booleano de largo n (slots más allá del archivo = libres)."""
+        data = self.pool.read(self.filename, 0, (n + 7) >> 3)
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little")
+        out = np.zeros(n, dtype=bool)
+        m = min(n, len(bits))
+        out[:m] = bits[:m]
+        return out
@@ -0,0 +1,238 @@
+import struct
+from collections import defaultdict
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .BufferPool import BufferPool
+from .HeapFile import HeapFile, PTR_SIZE
+from .Record import Record
+
+# --------------------------------------------------------
+#  Constantes del formato paginado
+# --------------------------------------------------------
+PAGE_SIZE = 4096
+FILE_HEADER_FORMAT = "iiii"  # [heap_size, free_head, page_size, slots_per_page]
+FILE_HEADER_SIZE = struct.calcsize(FILE_HEADER_FORMAT)
+PAGE_HEADER_FORMAT = "ii"  # [n_live, free_bytes]
+PAGE_HEADER_SIZE = struct.calcsize(PAGE_HEADER_FORMAT)
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class PagedHeapFile(HeapFile):
+    """Tabla almacenada en páginas de tamaño fijo.
+
+    • Página 0: cabecera del archivo. Sus primeros 8 bytes son los mismos
+      [heap_size, free_head] del HeapFile, seguidos de page_size y
+      slots_per_page.
+    • Página k ≥ 1: [n_live, free_bytes] + directorio de slots (1 byte por
+      slot, 1 = ocupado) + slots (registro + next_free), alineados a 8.
+    • El slot lógico i vive en la página 1 + i // slots_per_page, posición
+      i % slots_per_page: el offset que guardan los índices sigue siendo
+      válido y equivale al RID (página, slot).
+    • Toda lectura y escritura es de páginas completas.
+    """
+
+    # ------------------------------------------------------------------
+    # Creación del archivo ---------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def slots_per_page(slot_size: int, page_size: int = PAGE_SIZE) -> int:
+        spp = (page_size - PAGE_HEADER_SIZE) // (slot_size + 1)
+        while spp > 0 and _align8(PAGE_HEADER_SIZE + spp) + spp * slot_size > page_size:
+            spp -= 1
+        if spp <= 0:
+            raise ValueError(
+                f"El registro ({slot_size} bytes) no entra en una página de {page_size} bytes."
+            )
+        return spp
+
+    @staticmethod
+    def header_page(schema: List[Tuple[str, str]]) -> bytes:
+        """Página 0 de un archivo vacío para el esquema dado."""
+        slot_size = Record.get_codec(schema).size + PTR_SIZE
+        spp = PagedHeapFile.slots_per_page(slot_size)
+        header = struct.pack(FILE_HEADER_FORMAT, 0, -1, PAGE_SIZE, spp)
+        return header.ljust(PAGE_SIZE, b"\x00")
+
+    # ------------------------------------------------------------------
+    # Inicialización ----------------------------------------------------
+    # ------------------------------------------------------------------
+    def __init__(self, table_name: str, use_mmap: bool = False):
+        pool = BufferPool.get()
+        pool.validate(table_name + ".dat")
+        _, _, self.page_size, self.spp = struct.unpack(
+            FILE_HEADER_FORMAT, pool.read(table_name + ".dat", 0, FILE_HEADER_SIZE)
+        )
+        self.data_start = _align8(PAGE_HEADER_SIZE + self.spp)
+        super().__init__(table_name, use_mmap)
+
+    def rid(self, pos: int) -> Tuple[int, int]:
+        """(página, slot) del offset lógico ``pos``."""
+        return 1 + pos // self.spp, pos % self.spp
+
+    def _n_pages(self) -> int:
+        return (self.heap_size + self.spp - 1) // self.spp
+
+    # ------------------------------------------------------------------
+    # E/S por páginas ---------------------------------------------------
+    # ------------------------------------------------------------------
+    def _slot_pos(self, pos: int) -> int:
+        page, idx = self.rid(pos)
+        return page * self.page_size + self.data_start + idx * self.slot_size
+
+    def _file_extent(self) -> int:
+        return (1 + self._n_pages()) * self.page_size
+
+    def _read_page(self, page: int):
+        start = page * self.page_size
+        if self.use_mmap:
+            return memoryview(self._mapped())[start : start + self.page_size]
+        return self.pool.read(self.filename, start, self.page_size)
+
+    def _read_slot(self, pos: int):
+        page, idx = self.rid(pos)
+        start = self.data_start + idx * self.slot_size
+        return self._read_page(page)[start : start + self.slot_size]
+
+    def _write_slots(self, writes: List[Tuple[int, bytes]], live: bool = True) -> None:
+        """Agrupa las escrituras por página: trae cada página una vez del
+        pool, parcha slots y directorio, recalcula el espacio libre y la
+        devuelve junto con la cabecera."""
+        by_page = defaultdict(list)
+        for pos, image in writes:
+            by_page[self.rid(pos)[0]].append((pos, image))
+
+        pages = []
+        for page_no in sorted(by_page):
+            start = page_no * self.page_size
+            page = bytearray(
+                self.pool.read(self.filename, start, self.page_size).ljust(
+                    self.page_size, b"\x00"
+                )
+            )
+            for pos, image in by_page[page_no]:
+                idx = pos % self.spp
+                slot_start = self.data_start + idx * self.slot_size
+                page[slot_start : slot_start + self.slot_size] = image
+                page[PAGE_HEADER_SIZE + idx] = 1 if live else 0
+            directory = page[PAGE_HEADER_SIZE : PAGE_HEADER_SIZE + self.spp]
+            n_live = directory.count(1)
+            struct.pack_into(
+                PAGE_HEADER_FORMAT,
+                page,
+                0,
+                n_live,
+                (self.spp - n_live) * self.slot_size,
+            )
+            pages.append((start, bytes(page)))
+
+        header = struct.pack(
+            FILE_HEADER_FORMAT, self.heap_size, self.free_head, self.page_size, self.spp
+        )
+        pages.append((0, header.ljust(self.page_size, b"\x00")))
+        self.pool.write_many(self.filename, pages)
+
+    def _dense_file(self, images: List[bytes]) -> Iterator[bytes]:
+        """Página 0 y páginas llenas con los slots ``images`` en orden."""
+        header = struct.pack(FILE_HEADER_FORMAT, len(images), -1, self.page_size, self.spp)
+        yield header.ljust(self.page_size, b"\x00")
+        for first in range(0, len(images), self.spp):
+            chunk = images[first : first + self.spp]
+            page = bytearray(self.page_size)
+            struct.pack_into(
+                PAGE_HEADER_FORMAT, page, 0, len(chunk), (self.spp - len(chunk)) * self.slot_size
+            )
+            page[PAGE_HEADER_SIZE : PAGE_HEADER_SIZE + len(chunk)] = b"\x01" * len(chunk)
+            data = b"".join(chunk)
+            page[self.data_start : self.data_start + len(data)] = data
+            yield bytes(page)
+
+    def _slot_blocks(
+        self, chunk_size: Optional[int] = None
+    ) -> Iterator[Tuple[int, memoryview, int]]:
+        """Lee ``chunk_size`` bytes de páginas completas por vez y devuelve
+        la zona de slots usada de cada página."""
+        self.pool.flush(self.filename)
+        per_chunk = max(1, (chunk_size or self.SCAN_CHUNK_SIZE) // self.page_size)
+        n_pages = self._n_pages()
+        slot = self.slot_size
+
+        if self.use_mmap:
+            mapped = memoryview(self._mapped())
+            fh = None
+        else:
+            fh = open(self.filename, "rb")
+
+        with fh if fh is not None else mapped:
+            page_no = 1
+            while page_no <= n_pages:
+                want = min(per_chunk, n_pages - page_no + 1)
+                start = page_no * self.page_size
+                if fh is None:
+                    view = mapped[start : start + want * self.page_size]
+                else:
+                    fh.seek(start)
+                    view = memoryview(fh.read(want * self.page_size))
+                got = len(view) // self.page_size
+                for k in range(got):
+                    first = (page_no + k - 1) * self.spp
+                    n = min(self.spp, self.heap_size - first)
+                    base = k * self.page_size + self.data_start
+                    yield first, view[base : base + n * slot], n
+                page_no += got
+                if got < want:
+                    break
+
+    def _page_dtype(self) -> np.dtype:
+        return np.dtype(
+            {
+                "names": ["slots"],
+                "formats": [(self.numpy_dtype(), (self.spp,))],
+                "offsets": [self.data_start],
+                "itemsize": self.page_size,
+            }
+        )
+
+    def _load_pages(self, first: int, count: int) -> np.ndarray:
+        """Páginas de datos first..first+count-1 (la 1 es la primera)."""
+        if self.use_mmap:
+            return np.frombuffer(
+                self._mapped(),
+                dtype=self._page_dtype(),
+                count=count,
+                offset=first * self.page_size,
+            )
+        self.pool.flush(self.filename)
+        return np.fromfile(
+            self.filename,
+            dtype=self._page_dtype(),
+            count=count,
+            offset=first * self.page_size,
+        )
+
+    def to_numpy(self) -> np.ndarray:
+        pages = self._load_pages(1, self._n_pages())
+        return pages["slots"].reshape(-1)[: self.heap_size]
+
+    def to_numpy_range(self, start: int, end: int) -> np.ndarray:
+        end = min(end, self.heap_size)
+        if start >= end:
+            return np.zeros(0, dtype=self.numpy_dtype())
+        first_page = 1 + start // self.spp
+        last_page = 1 + (end - 1) // self.spp
+        pages = self._load_pages(first_page, last_page - first_page + 1)
+        skip = start - (first_page - 1) * self.spp
+        return pages["slots"].reshape(-1)[skip : skip + end - start]
+
+    def take(self, positions) -> np.ndarray:
+        positions = np.asarray(positions, dtype=np.int64)
+        if not self.use_mmap or not len(positions):
+            return super().take(positions)
+        if positions.min() < 0 or positions.max() >= self.heap_size:
+            raise IndexError("Offset fuera de rango")
+        pages = self._load_pages(1, self._n_pages())
+        return pages["slots"][positions // self.spp, positions % self.spp]
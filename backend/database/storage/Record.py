@@ -16,12 +16,106 @@ import os
 # registro = Record(schema, values)
 
 
+# Tipos de campo dentro del plan de decodificación de un RecordCodec
+_SCALAR = 0  # int, float, bool, text (offset)
+_STRING = 1  # cadena fija 'Ns'
+_TUPLE = 2  # '2f', '3i', etc.
+_SOUND = 3  # (sound_offset, histogram_offset)
+
+
+class RecordCodec:
+    """Codec precompilado para un esquema.
+
+    Se construye una sola vez por esquema: guarda el ``struct.Struct`` del
+    registro y un plan con el tipo de cada campo y su posición dentro de la
+    tupla desempaquetada, así pack/unpack ya no vuelven a recorrer el esquema
+    ni a parsear tamaños de VARCHAR en cada fila.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.format = "".join(Record.get_format_char_static(fmt) for _, fmt in schema)
+        self.struct = struct.Struct(self.format)
+        self.size = self.struct.size
+
+        plan = []
+        pos = 0
+        for _, fmt in schema:
+            char = Record.get_format_char_static(fmt)
+            if fmt.upper() == "SOUND":
+                plan.append((_SOUND, pos, 2))
+                pos += 2
+            elif char.endswith("s"):
+                plan.append((_STRING, pos, int(char[:-1])))
+                pos += 1
+            elif char[:-1].isdigit():
+                n = int(char[:-1])
+                plan.append((_TUPLE, pos, n))
+                pos += n
+            else:
+                plan.append((_SCALAR, pos, 1))
+                pos += 1
+        self.plan = tuple(plan)
+        # si todos los campos son escalares la tupla de struct ya es la fila
+        self.flat = all(kind == _SCALAR for kind, _, _ in self.plan)
+
+    def encode(self, values) -> bytes:
+        if self.flat:
+            return self.struct.pack(*values)
+        processed = []
+        for (kind, _, n), (_, fmt), val in zip(self.plan, self.schema, values):
+            if kind == _STRING:
+                processed.append(val.encode("utf-8")[:n].ljust(n, b"\x00"))
+            elif kind == _SOUND:
+                processed.extend(val)
+            elif kind == _TUPLE:
+                if not (isinstance(val, (list, tuple)) and len(val) == n):
+                    raise ValueError(f"Se esperaban {n} elementos para '{fmt}'")
+                processed.extend(val)  # aplanar
+            else:
+                processed.append(val)
+        return self.struct.pack(*processed)
+
+    def decode(self, buf, offset: int = 0) -> list:
+        """Devuelve la lista de valores del registro que empieza en buf[offset]."""
+        raw = self.struct.unpack_from(buf, offset)
+        if self.flat:
+            return list(raw)
+        out = []
+        for kind, pos, n in self.plan:
+            if kind == _SCALAR:
+                out.append(raw[pos])
+            elif kind == _STRING:
+                out.append(raw[pos].rstrip(b"\x00").decode("utf-8", errors="replace"))
+            elif kind == _TUPLE:
+                out.append(raw[pos : pos + n])
+            else:
+                out.append((raw[pos], raw[pos + 1]))
+        return out
+
+    def unpack(self, buf, offset: int = 0) -> "Record":
+        return Record(self.schema, self.decode(buf, offset), self)
+
+
 class Record:
-    def __init__(self, schema, values):
+    # codecs compilados, uno por esquema (clave: tupla de (nombre, formato))
+    _codecs: dict = {}
+
+    def __init__(self, schema, values, codec: RecordCodec = None):
         self.schema = schema
         self.values = values
-        self.format = "".join(self.get_format_char(fmt) for _, fmt in schema)
-        self.size = struct.calcsize(self.format)
+        self.codec = codec if codec is not None else Record.get_codec(schema)
+        self.format = self.codec.format
+        self.size = self.codec.size
+
+    @staticmethod
+    def get_codec(schema) -> RecordCodec:
+        """Devuelve el codec compilado del esquema, creándolo la primera vez."""
+        key = tuple((name, fmt) for name, fmt in schema)
+        codec = Record._codecs.get(key)
+        if codec is None:
+            codec = Record._codecs[key] = RecordCodec(list(key))
+        return codec
 
     def get_format_char(self, fmt):
         return Record.get_format_char_static(fmt)
@@ -42,51 +136,15 @@ class Record:
             return fmt
 
     def pack(self) -> bytes:
-        processed = []
-        for (_, fmt), val in zip(self.schema, self.values):
-            #Logger.log_debug(f"Packing value '{val}' with format '{fmt}'")
-            #print(f"Packing value '{val}' with format '{fmt}'")
-            if fmt.upper() == "SOUND":
-                processed.extend(val)
-            elif "s" in self.get_format_char(fmt):  # cadena fija
-                size = int(self.get_format_char(fmt)[:-1])
-                processed.append(val.encode("utf-8")[:size].ljust(size, b"\x00"))
-            elif fmt[:-1].isdigit():  # 3i, 4f, etc.
-                if not (isinstance(val, (list, tuple)) and len(val) == int(fmt[:-1])):
-                    raise ValueError(f"Se esperaban {fmt[:-1]} elementos para '{fmt}'")
-                processed.extend(val)  # aplanar
-            else:
-                processed.append(val)
-        return struct.pack(self.format, *processed)
+        return self.codec.encode(self.values)
 
     @staticmethod
     def unpack(buf, schema):
-        fmt_str = "".join(Record.get_format_char_static(fmt) for _, fmt in schema)
-        vals = list(struct.unpack(fmt_str, buf))
-        out = []
-        for _, fmt in schema:
-            if fmt.upper() == "SOUND":
-                out.append((vals.pop(0), vals.pop(0)))
-            elif "s" in fmt:
-                size = int(fmt[:-1])
-                raw = vals.pop(0)
-                if isinstance(raw, bytes):
-                    out.append(raw.rstrip(b"\x00").decode("utf-8", errors="replace"))
-                else:
-                    out.append(str(raw))
-            elif fmt[:-1].isdigit():
-                n = int(fmt[:-1])
-                out.append(tuple(vals[:n]))
-                del vals[:n]
-
-            else:
-                out.append(vals.pop(0))
-        return Record(schema, out)
+        return Record.get_codec(schema).unpack(buf)
 
     @staticmethod
     def get_size(schema) -> int:
-        format_str = "".join(Record.get_format_char_static(fmt) for _, fmt in schema)
-        return struct.calcsize(format_str)
+        return Record.get_codec(schema).size
 
     def __str__(self) -> None:
         out_parts = []
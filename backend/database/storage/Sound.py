@@ -2,6 +2,8 @@ import struct
 import os
 import sys
 from global_utils import Utils
+from .BufferPool import BufferPool
+from .TextFile import read_entries
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Inicializar un Sound solo requiere el nombre, ya construye la ruta
 
@@ -12,7 +14,9 @@ class Sound:
     SENTINEL = -1  # Valor de n para indicar eliminación lógica
     def __init__(self, table_name: str, field_name: str):
         self.filename = Utils.build_path("tables",f"{table_name}.{field_name}.dat")
-        if not os.path.exists(self.filename):
+        try:
+            BufferPool.get().validate(self.filename)  # descarta frames viejos si cambió por fuera
+        except FileNotFoundError:
             raise FileNotFoundError(f"Archivo {self.filename} no existe. Llame a build_file primero.")
 
     @staticmethod
@@ -23,38 +27,80 @@ class Sound:
             os.makedirs(os.path.dirname(filename), exist_ok=True)
             with open(filename, "wb") as f:
                 pass
+            BufferPool.get().invalidate(filename)
 
     def insert(self, text: str) -> int:
         encoded = text.encode("utf-8")
-        n = len(encoded)
-        with open(self.filename, "ab") as f:
-            offset = f.tell()
-            f.write(struct.pack("i", n))  # escribe el prefijo n
-            f.write(encoded)
-        return offset
+        # prefijo n + contenido, agregados al final
+        return BufferPool.get().append(self.filename, struct.pack("i", len(encoded)) + encoded)
+
+    def insert_many(self, texts: list[str]) -> list[int]:
+        """Inserta varios valores con una sola escritura.
+        Devuelve los offsets en el mismo orden."""
+        offsets, chunks = [], []
+        pos = 0
+        for text in texts:
+            encoded = text.encode("utf-8")
+            offsets.append(pos)
+            chunks.append(struct.pack("i", len(encoded)))
+            chunks.append(encoded)
+            pos += self.INT_SIZE + len(encoded)
+        base = BufferPool.get().append(self.filename, b"".join(chunks))
+        return [base + off for off in offsets]
 
     def delete(self, offset: int) -> bool:
         try:
-            with open(self.filename, "r+b") as f:
-                f.seek(offset)
-                f.write(struct.pack("i", self.SENTINEL))  # marcar como eliminado
+            # marcar como eliminado
+            BufferPool.get().write(self.filename, offset, struct.pack("i", self.SENTINEL))
             return True
         except Exception:
             return False
 
     def read(self, offset: int) -> str | None:
         try:
-            with open(self.filename, "rb") as f:
-                if offset < 0 or offset >= os.fstat(f.fileno()).st_size:
-                    return None
-                f.seek(offset)
-                n_bytes = f.read(self.INT_SIZE)
-                if len(n_bytes) < self.INT_SIZE:
-                    return None
-                (n,) = struct.unpack("i", n_bytes)
-                if n == self.SENTINEL or n <= 0:
-                    return None
-                content = f.read(n)
-                return content.decode("utf-8", errors="ignore")
+            pool = BufferPool.get()
+            if offset < 0 or offset >= pool.size(self.filename):
+                return None
+            n_bytes = pool.read(self.filename, offset, self.INT_SIZE)
+            if len(n_bytes) < self.INT_SIZE:
+                return None
+            (n,) = struct.unpack("i", n_bytes)
+            if n == self.SENTINEL or n <= 0:
+                return None
+            content = pool.read(self.filename, offset + self.INT_SIZE, n)
+            return content.decode("utf-8", errors="ignore")
         except (IOError, struct.error):
             return None
+
+    def read_many(self, offsets) -> list[str | None]:
+        """Como read() para varios offsets, en el mismo orden, leyendo el
+        archivo ordenado y por tramos."""
+        offsets = list(offsets)
+        entries = read_entries(self.filename, offsets)
+        return [
+            entries[o].decode("utf-8", errors="ignore") if entries.get(o) else None
+            for o in offsets
+        ]
+
+    def compact(self, offsets) -> dict[int, int]:
+        """Reescribe el archivo con solo las entradas de ``offsets`` (las que
+        siguen referenciadas), en orden de archivo, y devuelve
+        {offset_viejo: offset_nuevo}. Las entradas borradas desaparecen."""
+        pool = BufferPool.get()
+        pool.flush(self.filename)
+        moved: dict[int, int] = {}
+        tmp = self.filename + ".tmp"
+        with open(self.filename, "rb") as src, open(tmp, "wb") as dst:
+            for offset in sorted({o for o in offsets if o >= 0}):
+                src.seek(offset)
+                head = src.read(self.INT_SIZE)
+                if len(head) < self.INT_SIZE:
+                    continue
+                (n,) = struct.unpack("i", head)
+                if n < 0:  # SENTINEL: ya borrada
+                    continue
+                moved[offset] = dst.tell()
+                dst.write(head + src.read(n))
+        os.replace(tmp, self.filename)
+        pool.invalidate(self.filename)
+        return moved
@@ -0,0 +1,169 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .BufferPool import BufferPool
+from .HeapFile import HeapFile
+from .TableStats import TableStats
+
+Stamp = Tuple[Tuple[int, int, int, int], ...]
+
+
+def _stamp(paths: List[str]) -> Optional[Stamp]:
+    """(inodo, tamaño, mtime, versión en el pool) de cada archivo, o None si
+    alguno no existe. La versión cubre las escrituras que el pool aún no
+    bajó a disco (modo write-back)."""
+    pool = BufferPool.get()
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        out.append((st.st_ino, st.st_size, st.st_mtime_ns, pool.version(path)))
+    return tuple(out)
+
+
+class TableRegistry:
+    """Registro de objetos de tabla e índice de larga vida.
+
+    • Un HeapFile por (tabla, modo mmap): el schema, el codec y el mapeo se
+      cargan una sola vez. En cada pedido solo se relee la cabecera
+      (heap_size, free_head) desde el buffer pool, por si otra instancia
+      escribió.
+    • Un objeto por índice (secuencial, hash, B+). Se reutiliza mientras
+      sus archivos no cambien; si cambiaron (inserciones, splits,
+      reconstrucción) se vuelve a abrir.
+    • Un TableStats por tabla analizada: inserts y deletes lo actualizan en
+      memoria y save_stats() lo guarda al cerrar la sentencia.
+    • invalidate(tabla) descarta todo lo de la tabla; lo llaman CREATE/DROP
+      TABLE. Además, si el schema.json cambió (tabla recreada por fuera) el
+      HeapFile se reabre solo.
+    """
+
+    _heaps: Dict[Tuple[str, bool], Tuple[Stamp, HeapFile]] = {}
+    _indexes: Dict[Tuple[str, str, str], Tuple[Stamp, object]] = {}
+    _stats: Dict[str, Tuple[int, TableStats]] = {}
+    _lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Tablas ------------------------------------------------------------
+    # ------------------------------------------------------------------
+    @classmethod
+    def heap(cls, table_path: str, use_mmap: bool = False) -> HeapFile:
+        key = (os.path.abspath(table_path), use_mmap)
+        stamp = _stamp([table_path + ".schema.json"])
+        with cls._lock:
+            entry = cls._heaps.get(key)
+            if entry is not None and stamp is not None and entry[0] == stamp:
+                heap = entry[1]
+                heap.refresh()
+                return heap
+            if entry is not None:
+                entry[1].close()
+            heap = HeapFile(table_path, use_mmap=use_mmap)
+            cls._heaps[key] = (stamp, heap)
+            return heap
+
+    @classmethod
+    def schema(cls, table_path: str) -> List[Tuple[str, str]]:
+        return cls.heap(table_path).schema
+
+    # ------------------------------------------------------------------
+    # Índices -----------------------------------------------------------
+    # ------------------------------------------------------------------
+    @classmethod
+    def index(
+        cls, table_path: str, field_name: str, kind: str, files: List[str], factory: Callable
+    ):
+        """Objeto de índice compartido; ``files`` son los archivos cuyo
+        cambio obliga a reabrirlo y ``factory`` lo construye."""
+        key = (os.path.abspath(table_path), field_name, kind)
+        stamp = _stamp(files)
+        with cls._lock:
+            entry = cls._indexes.get(key)
+            if entry is not None and stamp is not None and entry[0] == stamp:
+                return entry[1]
+            idx = factory()
+            cls._indexes[key] = (_stamp(files), idx)
+            return idx
+
+    @classmethod
+    def sequential_index(cls, table_path: str, field_name: str):
+        from indexing.SequentialIndex import SequentialIndex
+
+        base = f"{table_path}.{field_name}"
+        return cls.index(
+            table_path, field_name, "seq", [f"{base}.seq.idx"],
+            lambda: SequentialIndex(table_path, field_name),
+        )
+
+    @classmethod
+    def hash_index(cls, table_path: str, field_name: str):
+        from indexing.ExtendibleHashIndex import ExtendibleHashIndex
+
+        base = f"{table_path}.{field_name}"
+        return cls.index(
+            table_path, field_name, "hash", [f"{base}.hash.tree", f"{base}.hash.db"],
+            lambda: ExtendibleHashIndex(table_path, field_name),
+        )
+
+    @classmethod
+    def btree_index(cls, table_path: str, field_name: str):
+        from indexing.BPlusTreeIndex import BPlusTreeIndexWrapper
+
+        base = f"{table_path}.{field_name}"
+        return cls.index(
+            table_path, field_name, "btree", [f"{base}.btree.idx"],
+            lambda: BPlusTreeIndexWrapper(table_path, field_name),
+        )
+
+    # ------------------------------------------------------------------
+    # Estadísticas ------------------------------------------------------
+    # ------------------------------------------------------------------
+    @classmethod
+    def stats(cls, table_path: str) -> Optional[TableStats]:
+        """Estadísticas de la tabla, o None si nunca se analizó. Se relee el
+        archivo solo si cambió su versión en el pool (ANALYZE lo reemplaza,
+        o validate detectó un cambio por fuera); bajar páginas a disco no
+        cuenta como cambio."""
+        key = os.path.abspath(table_path)
+        filename = TableStats.path(table_path)
+        pool = BufferPool.get()
+        with cls._lock:
+            try:
+                pool.validate(filename)
+            except FileNotFoundError:
+                cls._stats.pop(key, None)
+                return None
+            version = pool.version(filename)
+            entry = cls._stats.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            stats = TableStats.load(table_path)
+            cls._stats[key] = (pool.version(filename), stats)
+            return stats
+
+    @classmethod
+    def save_stats(cls) -> None:
+        """Persiste las estadísticas con cambios pendientes (fin de sentencia)."""
+        pool = BufferPool.get()
+        with cls._lock:
+            for key, (_, stats) in list(cls._stats.items()):
+                if stats.dirty:
+                    stats.persist()
+                    cls._stats[key] = (pool.version(stats.filename), stats)
+
+    # ------------------------------------------------------------------
+    # Invalidación ------------------------------------------------------
+    # ------------------------------------------------------------------
+    @classmethod
+    def invalidate(cls, table_path: str) -> None:
+        """Olvida los objetos de la tabla y de sus índices (tras DDL)."""
+        path = os.path.abspath(table_path)
+        with cls._lock:
+            for key in [k for k in cls._heaps if k[0] == path]:
+                cls._heaps.pop(key)[1].close()
+            for key in [k for k in cls._indexes if k[0] == path]:
+                del cls._indexes[key]
+            cls._stats.pop(path, None)
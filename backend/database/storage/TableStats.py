@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import struct
+import time
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from .BloomFilter import column_key
+from .BufferPool import BufferPool
+from .Record import Record
+
+# --------------------------------------------------------
+#  Parámetros
+# --------------------------------------------------------
+HLL_BITS = 10  # 2^10 registros (~3% de error en la estimación)
+HISTOGRAM_BUCKETS = 20  # histograma equi-profundidad
+MCV_SIZE = 10  # valores más comunes por columna
+STALE_FRACTION = 0.2  # cambios (sobre las filas analizadas) para marcarlas viejas
+
+# Selectividades por defecto cuando no hay con qué estimar
+DEFAULT_EQ_SEL = 0.005
+DEFAULT_RANGE_SEL = 1 / 3
+
+
+def _hll_hash(key: bytes) -> int:
+    return struct.unpack("<Q", hashlib.blake2b(key, digest_size=8).digest())[0]
+
+
+def _hll_add(registers: bytearray, key: Optional[bytes]) -> None:
+    if key is None:
+        return
+    h = _hll_hash(key)
+    idx = h & ((1 << HLL_BITS) - 1)
+    rest = h >> HLL_BITS
+    rank = (64 - HLL_BITS) - rest.bit_length() + 1  # ceros a la izquierda + 1
+    if rank > registers[idx]:
+        registers[idx] = rank
+
+
+def _hll_estimate(registers: bytearray) -> int:
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    powers = np.ldexp(1.0, -np.frombuffer(registers, dtype=np.uint8).astype(np.int32))
+    estimate = alpha * m * m / powers.sum()
+    zeros = registers.count(0)
+    if estimate <= 2.5 * m and zeros:  # corrección para pocos valores
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+
+def _plain(value):
+    """Valor de NumPy → valor JSON (los VARCHAR como str)."""
+    value = value.item() if hasattr(value, "item") else value
+    if isinstance(value, bytes):
+        return value.rstrip(b"\x00").decode("utf-8", errors="replace")
+    return value
+
+
+def _supported(fmt: str) -> bool:
+    if fmt.upper() in ("TEXT", "SOUND"):
+        return False
+    char = Record.get_format_char_static(fmt)
+    return char in "bBhHiIlLqQfd" or (char.endswith("s") and char[:-1].isdigit())
+
+
+class TableStats:
+    """Estadísticas de una tabla (<tabla>.stats.json, junto al schema.json).
+
+    • ANALYZE las calcula de un recorrido: filas, y por columna mínimo,
+      máximo, valores distintos (HyperLogLog), los MCV_SIZE valores más
+      comunes con su frecuencia y un histograma equi-profundidad del resto.
+    • Las inserciones y borrados las actualizan de forma incremental: cuenta
+      de filas, registros HLL, mínimo/máximo y cantidad de cambios. MCV e
+      histograma solo se recalculan con ANALYZE (``stale`` avisa cuando los
+      cambios pasan STALE_FRACTION de lo analizado).
+    • Los cambios incrementales quedan en memoria (``dirty``) hasta que
+      persist() los guarda; el objeto vive en TableRegistry y se persiste
+      al cerrar la sentencia, no en cada fila.
+    • selectivity() estima la fracción de filas que cumple un predicado.
+    """
+
+    def __init__(self, filename: str, data: dict):
+        self.filename = filename
+        self.data = data
+        self.dirty = False
+        self._registers: Dict[str, bytearray] = {}  # HLL decodificados, por columna
+        self._changed: Set[str] = set()  # columnas con registros HLL sin guardar
+
+    # ------------------------------------------------------------------
+    # Archivo -----------------------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def path(table_path: str) -> str:
+        return table_path + ".stats.json"
+
+    @staticmethod
+    def load(table_path: str) -> Optional["TableStats"]:
+        filename = TableStats.path(table_path)
+        pool = BufferPool.get()
+        try:
+            pool.validate(filename)
+        except FileNotFoundError:
+            return None
+        return TableStats(filename, json.loads(pool.read(filename, 0, pool.size(filename))))
+
+    def save(self) -> None:
+        """Reescribe el archivo entero (ANALYZE), por fuera del pool."""
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.filename)
+        BufferPool.get().invalidate(self.filename)
+
+    def persist(self) -> None:
+        """Guarda los cambios incrementales a través del pool: con el
+        WriteAheadLog activo quedan en el log con la sentencia que los
+        produjo. El JSON se rellena con espacios hasta el largo anterior
+        (json.loads los ignora), así no hace falta truncar."""
+        for name in self._changed:
+            registers = self._registers[name]
+            col = self.data["columns"][name]
+            col["hll"] = registers.hex()
+            col["n_distinct"] = max(col["n_distinct"], _hll_estimate(registers))
+        self._changed.clear()
+        self.dirty = False
+        pool = BufferPool.get()
+        raw = json.dumps(self.data).encode("utf-8")
+        pool.write(self.filename, 0, raw.ljust(pool.size(self.filename), b" "))
+
+    # ------------------------------------------------------------------
+    # ANALYZE -----------------------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def analyze(table_path: str, schema: List, arr: np.ndarray, live: np.ndarray) -> "TableStats":
+        """Calcula y guarda las estadísticas a partir de la vista NumPy del
+        heap y la máscara de vivos."""
+        rows = int(live.sum())
+        columns: Dict[str, dict] = {}
+        for name, fmt in schema:
+            if not _supported(fmt):
+                continue
+            col = arr[name][live]
+            char = Record.get_format_char_static(fmt)
+            uniques, counts = np.unique(col, return_counts=True)
+
+            registers = bytearray(1 << HLL_BITS)
+            for value in uniques.tolist():
+                _hll_add(registers, column_key(char, value))
+
+            # MCV: los más frecuentes que se repiten
+            order = np.argsort(-counts, kind="stable")[:MCV_SIZE]
+            mcv = [
+                [_plain(uniques[i]), int(counts[i]) / rows]
+                for i in order
+                if counts[i] > 1
+            ]
+            # Histograma equi-profundidad de las filas que no son MCV
+            rest = col[~np.isin(col, uniques[order[: len(mcv)]])] if mcv else col
+            bounds = []
+            if len(rest):
+                rest = np.sort(rest)
+                picks = np.linspace(0, len(rest) - 1, HISTOGRAM_BUCKETS + 1).round().astype(int)
+                bounds = [_plain(rest[i]) for i in picks]
+            columns[name] = {
+                "type": fmt,
+                "min": _plain(uniques[0]) if len(uniques) else None,
+                "max": _plain(uniques[-1]) if len(uniques) else None,
+                "n_distinct": len(uniques),
+                "hll": registers.hex(),
+                "mcv": mcv,
+                "histogram": bounds,
+            }
+
+        stats = TableStats(
+            TableStats.path(table_path),
+            {
+                "row_count": rows,
+                "analyzed_rows": rows,
+                "modified": 0,
+                "analyzed_at": time.time(),
+                "columns": columns,
+            },
+        )
+        stats.save()
+        return stats
+
+    # ------------------------------------------------------------------
+    # Mantenimiento incremental ----------------------------------------
+    # ------------------------------------------------------------------
+    def record_insert(self, schema: List, rows: List[list]) -> None:
+        """Suma las filas insertadas (valores crudos del registro), en
+        memoria hasta el próximo persist()."""
+        names = [n for n, _ in schema]
+        fmts = dict(schema)
+        for name, col in self.data["columns"].items():
+            idx = names.index(name)
+            char = Record.get_format_char_static(fmts[name])
+            registers = self._registers.get(name)
+            if registers is None:
+                registers = self._registers[name] = bytearray.fromhex(col["hll"])
+            self._changed.add(name)
+            for values in rows:
+                value = values[idx]
+                _hll_add(registers, column_key(char, value))
+                plain = _plain(value)
+                if isinstance(plain, str):
+                    plain = _plain(plain.encode("utf-8")[: int(char[:-1])])
+                if col["min"] is None or plain < col["min"]:
+                    col["min"] = plain
+                if col["max"] is None or plain > col["max"]:
+                    col["max"] = plain
+        self.data["row_count"] += len(rows)
+        self.data["modified"] += len(rows)
+        self.dirty = True
+
+    def record_delete(self, count: int = 1) -> None:
+        self.data["row_count"] = max(0, self.data["row_count"] - count)
+        self.data["modified"] += count
+        self.dirty = True
+
+    # ------------------------------------------------------------------
+    # Consulta ----------------------------------------------------------
+    # ------------------------------------------------------------------
+    @property
+    def row_count(self) -> int:
+        return self.data["row_count"]
+
+    @property
+    def stale(self) -> bool:
+        return self.data["modified"] > STALE_FRACTION * max(1, self.data["analyzed_rows"])
+
+    def column(self, name: str) -> Optional[dict]:
+        return self.data["columns"].get(name)
+
+    def distinct(self, name: str) -> Optional[int]:
+        col = self.column(name)
+        return None if col is None else min(col["n_distinct"], max(1, self.row_count))
+
+    @staticmethod
+    def _comparable(value, sample) -> bool:
+        if isinstance(sample, str):
+            return isinstance(value, str)
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def _histogram_fraction(self, bounds: list, value, inclusive: bool) -> float:
+        """Fracción del histograma con valores < value (<= si inclusive)."""
+        if not bounds:
+            return DEFAULT_RANGE_SEL
+        if value < bounds[0] or (value == bounds[0] and not inclusive):
+            return 0.0
+        if value > bounds[-1] or (value == bounds[-1] and inclusive):
+            return 1.0
+        buckets = len(bounds) - 1
+        for i in range(buckets):
+            lo, hi = bounds[i], bounds[i + 1]
+            if lo <= value <= hi:
+                if isinstance(value, str) or hi == lo:
+                    within = 0.5
+                else:
+                    within = (value - lo) / (hi - lo)
+                return (i + within) / buckets
+        return DEFAULT_RANGE_SEL
+
+    def selectivity(self, name: str, op: str, value) -> float:
+        """Fracción estimada de filas con ``name <op> value``; op es uno de
+        "=", "!=", "<", "<=", ">", ">=" o "between" (value = (a, b))."""
+        col = self.column(name)
+        if col is None or col["min"] is None:
+            return DEFAULT_EQ_SEL if op == "=" else DEFAULT_RANGE_SEL
+        values = value if op == "between" else (value,)
+        if not all(self._comparable(v, col["min"]) for v in values):
+            return DEFAULT_EQ_SEL if op == "=" else DEFAULT_RANGE_SEL
+
+        mcv = col["mcv"]
+        mcv_total = sum(freq for _, freq in mcv)
+        rest_total = max(0.0, 1.0 - mcv_total)
+
+        if op in ("=", "!="):
+            eq = next((freq for v, freq in mcv if v == value), None)
+            if eq is None:
+                if value < col["min"] or value > col["max"]:
+                    eq = 0.0
+                else:
+                    others = max(1, self.distinct(name) - len(mcv))
+                    eq = rest_total / others
+            return eq if op == "=" else 1.0 - eq
+
+        if op == "between":
+            lo_v, hi_v = value
+            in_mcv = sum(freq for v, freq in mcv if lo_v <= v <= hi_v)
+            hist = self._histogram_fraction(col["histogram"], hi_v, True) - self._histogram_fraction(
+                col["histogram"], lo_v, False
+            )
+            return min(1.0, in_mcv + max(0.0, hist) * rest_total)
+
+        tests = {
+            "<": lambda v: v < value,
+            "<=": lambda v: v <= value,
+            ">": lambda v: v > value,
+            ">=": lambda v: v >= value,
+        }
+        if op not in tests:
+            return DEFAULT_RANGE_SEL
+        in_mcv = sum(freq for v, freq in mcv if tests[op](v))
+        below = self._histogram_fraction(col["histogram"], value, op in ("<=", ">"))
+        hist = below if op in ("<", "<=") else 1.0 - below
+        return min(1.0, in_mcv + hist * rest_total)
+
+    def summary(self) -> List[dict]:
+        """Una fila por columna, para mostrar el resultado de ANALYZE."""
+        return [
+            {
+                "column": name,
+                "rows": self.row_count,
+                "distinct": self.distinct(name),
+                "min": col["min"],
+                "max": col["max"],
+                "most_common": ", ".join(f"{v} ({freq:.1%})" for v, freq in col["mcv"][:3]),
+                "buckets": max(0, len(col["histogram"]) - 1),
+            }
+            for name, col in self.data["columns"].items()
+        ]
@@ -4,6 +4,56 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from global_utils import Utils
+from .BufferPool import BufferPool
+
+COALESCE_GAP = 64 * 1024  # offsets a menos de esto se leen en una sola pasada
+MAX_RUN = 4 * 1024 * 1024  # tope de bytes por lectura agrupada
+
+
+def read_entries(filename: str, offsets) -> dict:
+    """Contenido crudo de las entradas [n][n bytes] que empiezan en cada
+    offset: {offset: bytes}, o None si está borrada (n < 0) o fuera del
+    archivo.
+
+    Los offsets se ordenan y los cercanos se agrupan en una lectura grande
+    al buffer pool (más una segunda si la última entrada sigue de largo),
+    en vez de un seek + dos lecturas por entrada en orden arbitrario.
+    """
+    pool = BufferPool.get()
+    size = pool.size(filename)
+    wanted = sorted({o for o in offsets if o is not None and 0 <= o < size})
+    out = {}
+    i = 0
+    while i < len(wanted):
+        start = wanted[i]
+        j = i + 1
+        while (
+            j < len(wanted)
+            and wanted[j] - wanted[j - 1] <= COALESCE_GAP
+            and wanted[j] - start <= MAX_RUN
+        ):
+            j += 1
+        run = wanted[i:j]
+        window = pool.read(filename, start, run[-1] + TextFile.INT_SIZE - start)
+
+        lengths = {}
+        for off in run:
+            rel = off - start
+            if rel + TextFile.INT_SIZE <= len(window):
+                (lengths[off],) = struct.unpack_from("i", window, rel)
+        end = max((off + TextFile.INT_SIZE + n for off, n in lengths.items()), default=start)
+        if end > start + len(window):
+            window += pool.read(filename, start + len(window), end - start - len(window))
+
+        for off in run:
+            n = lengths.get(off)
+            if n is None or n < 0:
+                out[off] = None
+            else:
+                rel = off - start + TextFile.INT_SIZE
+                out[off] = bytes(window[rel : rel + n])
+        i = j
+    return out
 
 
 class TextFile:
@@ -12,46 +62,112 @@ class TextFile:
     INT_SIZE = 4
     SENTINEL = -1  # Valor de n para indicar eliminación lógica
 
+    def __new__(cls, table_name: str, field_name: str):
+        # Las columnas creadas con compresión se abren como CompressedTextFile
+        if cls is TextFile and os.path.exists(
+            Utils.build_path("tables", f"{table_name}.{field_name}.ztext")
+        ):
+            from .CompressedTextFile import CompressedTextFile
+
+            cls = CompressedTextFile
+        return super().__new__(cls)
+
     def __init__(self, table_name: str, field_name: str):
         self.filename = Utils.build_path("tables", f"{table_name}.{field_name}.text")
-        if not os.path.exists(self.filename):
+        try:
+            BufferPool.get().validate(self.filename)  # descarta frames viejos si cambió por fuera
+        except FileNotFoundError:
             raise FileNotFoundError(f"Archivo {self.filename} no existe. Llame a build_file primero.")
 
     @staticmethod
-    def build_file(table_name: str, field_name: str) -> None:
-        """Crea el archivo <table_name>.<field_name>.text vacío si no existe."""
+    def build_file(table_name: str, field_name: str, compression: str | None = None) -> None:
+        """Crea el archivo <table_name>.<field_name>.text vacío si no existe.
+
+        Con ``compression`` ("zlib", "lzma" o "zlib+dict") la columna se
+        guarda comprimida por bloques (ver CompressedTextFile).
+        """
+        from .CompressedTextFile import CompressedTextFile
+
+        if compression:
+            CompressedTextFile.build_file(table_name, field_name, compression)
+            return
+        for stale in CompressedTextFile.paths(table_name, field_name):
+            if os.path.exists(stale):  # columna recreada sin compresión
+                os.remove(stale)
         filename = Utils.build_path("tables", f"{table_name}.{field_name}.text")
         if not os.path.exists(filename):
             os.makedirs(os.path.dirname(filename), exist_ok=True)
             with open(filename, "wb") as f:
                 pass
+            BufferPool.get().invalidate(filename)
 
     def insert(self, text: str) -> int:
         encoded = text.encode("utf-8")
-        n = len(encoded)
-        with open(self.filename, "ab") as f:
-            offset = f.tell()
-            f.write(struct.pack("i", n))  # escribe el prefijo n
-            f.write(encoded)
-        return offset
+        # prefijo n + contenido, agregados al final
+        return BufferPool.get().append(self.filename, struct.pack("i", len(encoded)) + encoded)
+
+    def insert_many(self, texts: list[str]) -> list[int]:
+        """Inserta varios valores con una sola escritura.
+        Devuelve los offsets en el mismo orden."""
+        offsets, chunks = [], []
+        pos = 0
+        for text in texts:
+            encoded = text.encode("utf-8")
+            offsets.append(pos)
+            chunks.append(struct.pack("i", len(encoded)))
+            chunks.append(encoded)
+            pos += self.INT_SIZE + len(encoded)
+        base = BufferPool.get().append(self.filename, b"".join(chunks))
+        return [base + off for off in offsets]
 
     def delete(self, offset: int) -> bool:
         try:
-            with open(self.filename, "r+b") as f:
-                f.seek(offset)
-                f.write(struct.pack("i", self.SENTINEL))  # marcar como eliminado
+            # marcar como eliminado
+            BufferPool.get().write(self.filename, offset, struct.pack("i", self.SENTINEL))
             return True
         except Exception:
             return False
 
     def read(self, offset: int) -> str | None:
-        with open(self.filename, "rb") as f:
-            f.seek(offset)
-            n_bytes = f.read(self.INT_SIZE)
-            if len(n_bytes) < self.INT_SIZE:
-                return None
-            (n,) = struct.unpack("i", n_bytes)
-            if n == self.SENTINEL:
-                return None
-            content = f.read(n)
-            return content.decode("utf-8", errors="replace")
+        pool = BufferPool.get()
+        n_bytes = pool.read(self.filename, offset, self.INT_SIZE)
+        if len(n_bytes) < self.INT_SIZE:
+            return None
+        (n,) = struct.unpack("i", n_bytes)
+        if n == self.SENTINEL:
+            return None
+        content = pool.read(self.filename, offset + self.INT_SIZE, n)
+        return content.decode("utf-8", errors="replace")
+
+    def read_many(self, offsets) -> list[str | None]:
+        """Como read() para varios offsets, en el mismo orden, pero leyendo
+        el archivo ordenado y por tramos (ver read_entries)."""
+        offsets = list(offsets)
+        entries = read_entries(self.filename, offsets)
+        return [
+            None if entries.get(o) is None else entries[o].decode("utf-8", errors="replace")
+            for o in offsets
+        ]
+
+    def compact(self, offsets) -> dict[int, int]:
+        """Reescribe el archivo con solo las entradas de ``offsets`` (las que
+        siguen referenciadas), en orden de archivo, y devuelve
+        {offset_viejo: offset_nuevo}. Las entradas borradas desaparecen."""
+        pool = BufferPool.get()
+        pool.flush(self.filename)
+        moved: dict[int, int] = {}
+        tmp = self.filename + ".tmp"
+        with open(self.filename, "rb") as src, open(tmp, "wb") as dst:
+            for offset in sorted({o for o in offsets if o >= 0}):
+                src.seek(offset)
+                head = src.read(self.INT_SIZE)
+                if len(head) < self.INT_SIZE:
+                    continue
+                (n,) = struct.unpack("i", head)
+                if n < 0:  # SENTINEL: ya borrada
+                    continue
+                moved[offset] = dst.tell()
+                dst.write(head + src.read(n))
+        os.replace(tmp, self.filename)
+        pool.invalidate(self.filename)
+        return moved
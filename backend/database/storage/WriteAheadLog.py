@@ -0,0 +1,312 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from .BufferPool import BufferPool
+
+# --------------------------------------------------------
+#  Formato de los registros del log
+# --------------------------------------------------------
+# [crc32, tipo, largo ruta, offset, largo datos] + ruta + datos; el crc
+# cubre todo lo que sigue, así una cola escrita a medias se descarta.
+RECORD = struct.Struct("<IBHqI")
+KIND_WRITE = 1  # bytes escritos en (ruta, offset)
+KIND_DROP = 2  # la ruta se borró o reemplazó: lo anterior ya no aplica
+KIND_COMMIT = 3  # fin de sentencia
+
+DURABILITY_MODES = ("statement", "group", "off")
+LOG_BUFFER = 1024 * 1024  # bytes del log acumulados antes de escribirlos
+CHECKPOINT_BYTES = 64 * 1024 * 1024  # tamaño del log que dispara un checkpoint
+
+
+def _record(kind: int, path: str = "", offset: int = 0, data: bytes = b"") -> bytes:
+    raw_path = path.encode("utf-8")
+    body = RECORD.pack(0, kind, len(raw_path), offset, len(data))[4:] + raw_path + data
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+class WriteAheadLog:
+    """Log de rehacer (redo) físico para el buffer pool en modo write-back.
+
+    • Cada escritura que pasa por el pool (heap, bitmap, text/sound, índices
+      secuencial, hash —buckets y árbol— y B+, diccionario de TEXT
+      comprimido, estadísticas incrementales) se agrega al log antes de
+      ensuciar el frame;
+      las páginas se bajan a disco cuando se desalojan o en un checkpoint.
+    • Regla WAL: antes de escribir una página a disco el log se escribe (y
+      sincroniza, salvo durabilidad "off") hasta el último registro.
+    • commit() cierra la sentencia. Mientras no se cierra, sus páginas no se
+      desalojan (no-steal), así la recuperación solo rehace hasta el último
+      COMMIT y una sentencia a medias no deja el heap y los índices
+      desparejos.
+    • Durabilidad: "statement" (fsync por sentencia; las sentencias que
+      terminan juntas comparten el fsync), "group" (fsync a lo sumo cada
+      ``group_ms`` ms) u "off" (el log se escribe sin fsync, para cargas
+      masivas).
+    • El R-Tree (libspatialindex) y los archivos que se reconstruyen enteros
+      (CREATE, VACUUM, índices nuevos, ANALYZE) escriben por fuera del pool;
+      el log solo registra que la ruta se reemplazó.
+    """
+
+    _instance: Optional["WriteAheadLog"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, path: str, durability: str = "statement", group_ms: int = 10):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Durabilidad no soportada: {durability}")
+        self.path = path
+        self.durability = durability
+        self.group_ms = group_ms
+        self._fh = open(path, "ab")
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._lsn = self._fh.tell()  # bytes del log (escritos + en buffer)
+        self._written_lsn = self._lsn
+        self._synced_lsn = self._lsn
+        self._last_sync = time.monotonic()
+        self._paths: Set[str] = set()  # rutas con registros desde el último checkpoint
+        self._open = False  # hay registros desde el último COMMIT
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        self.commits = self.syncs = self.checkpoints = 0
+
+    # ------------------------------------------------------------------
+    # Activación --------------------------------------------------------
+    # ------------------------------------------------------------------
+    @classmethod
+    def get(cls) -> Optional["WriteAheadLog"]:
+        return cls._instance
+
+    @classmethod
+    def enable(cls, path: str, durability: str = "statement", group_ms: int = 10) -> "WriteAheadLog":
+        """Recupera el log que haya quedado, lo activa y pasa el pool a
+        write-back. Si ya estaba activo solo cambia la durabilidad."""
+        with cls._instance_lock:
+            if cls._instance is not None and cls._instance.path == path:
+                wal = cls._instance
+                with wal._lock:
+                    wal._sync()
+                    if durability not in DURABILITY_MODES:
+                        raise ValueError(f"Durabilidad no soportada: {durability}")
+                    wal.durability, wal.group_ms = durability, group_ms
+                return wal
+            if cls._instance is not None:
+                cls._disable()
+            cls.recover(path)
+            wal = cls._instance = cls(path, durability, group_ms)
+            pool = BufferPool.configure(write_back=True)
+            pool.wal = wal
+            return wal
+
+    @classmethod
+    def disable(cls) -> None:
+        """Checkpoint final, desactiva el log y vuelve a write-through."""
+        with cls._instance_lock:
+            cls._disable()
+
+    @classmethod
+    def _disable(cls) -> None:
+        wal = cls._instance
+        if wal is None:
+            return
+        wal.checkpoint()
+        pool = BufferPool.get()
+        pool.wal = None
+        BufferPool.configure(write_back=False)
+        if wal._timer is not None:
+            wal._timer.cancel()
+        wal._fh.close()
+        cls._instance = None
+
+    @classmethod
+    def commit(cls) -> None:
+        """Cierra la sentencia en curso (no hace nada si el log está apagado)."""
+        wal = cls._instance
+        if wal is not None:
+            wal._commit()
+
+    # ------------------------------------------------------------------
+    # Registro (lo llama el buffer pool) --------------------------------
+    # ------------------------------------------------------------------
+    def log_write(self, path: str, writes: List[Tuple[int, bytes]]) -> None:
+        with self._lock:
+            for offset, data in writes:
+                self._append(_record(KIND_WRITE, path, offset, data))
+            self._paths.add(path)
+            self._open = True
+
+    def log_drop(self, path: str) -> None:
+        """La ruta se reemplaza por fuera del pool: sus registros previos no
+        deben rehacerse sobre el archivo nuevo. Se sincroniza enseguida."""
+        with self._lock:
+            if path not in self._paths:
+                return
+            self._append(_record(KIND_DROP, path))
+            self._paths.discard(path)
+            self._sync()
+
+    def before_page_write(self) -> None:
+        """Regla WAL: el log llega a disco antes que las páginas."""
+        with self._lock:
+            if self.durability == "off":
+                self._write()
+            else:
+                self._sync()
+
+    # ------------------------------------------------------------------
+    # Commit y checkpoint -----------------------------------------------
+    # ------------------------------------------------------------------
+    def _commit(self) -> None:
+        with self._lock:
+            if not self._open:
+                return  # sentencia sin escrituras (o ya confirmada)
+            self._open = False
+            self._append(_record(KIND_COMMIT))
+            self.commits += 1
+            if self.durability == "statement":
+                self._sync()
+            elif self.durability == "group":
+                self._write()
+                if (time.monotonic() - self._last_sync) * 1000 >= self.group_ms:
+                    self._sync()
+                elif self._timer is None:
+                    self._timer = threading.Timer(self.group_ms / 1000, self._timer_sync)
+                    self._timer.daemon = True
+                    self._timer.start()
+            elif self._buffered >= LOG_BUFFER:
+                self._write()
+            needs_checkpoint = self._lsn >= CHECKPOINT_BYTES
+        BufferPool.get().end_statement()
+        if needs_checkpoint:
+            self.checkpoint()
+
+    def _timer_sync(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._sync()
+
+    def checkpoint(self) -> None:
+        """Baja todas las páginas sucias, sincroniza los archivos de datos y
+        vacía el log."""
+        pool = BufferPool.get()
+        with pool._lock, self._lock:
+            pool.flush()
+            for path in pool.take_written():
+                try:
+                    fd = os.open(path, os.O_RDWR)
+                except FileNotFoundError:
+                    continue
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            self._buffer, self._buffered = [], 0
+            self._fh.truncate(0)
+            self._fh.seek(0)
+            os.fsync(self._fh.fileno())
+            self._lsn = self._written_lsn = self._synced_lsn = 0
+            self._paths.clear()
+            self.checkpoints += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "durability": self.durability,
+                "group_ms": self.group_ms,
+                "log_bytes": self._lsn,
+                "commits": self.commits,
+                "syncs": self.syncs,
+                "checkpoints": self.checkpoints,
+            }
+
+    # ------------------------------------------------------------------
+    # Internos ----------------------------------------------------------
+    # ------------------------------------------------------------------
+    def _append(self, record: bytes) -> None:
+        self._buffer.append(record)
+        self._buffered += len(record)
+        self._lsn += len(record)
+
+    def _write(self) -> None:
+        if self._buffer:
+            self._fh.write(b"".join(self._buffer))
+            self._fh.flush()
+            self._buffer, self._buffered = [], 0
+            self._written_lsn = self._lsn
+
+    def _sync(self) -> None:
+        """Escribe y sincroniza el log; si otro commit ya sincronizó hasta
+        aquí no hace nada (group commit)."""
+        self._write()
+        if self._synced_lsn < self._written_lsn:
+            os.fsync(self._fh.fileno())
+            self._synced_lsn = self._written_lsn
+            self.syncs += 1
+        self._last_sync = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Recuperación ------------------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def read_committed(path: str) -> List[Tuple[str, int, bytes]]:
+        """Escrituras de las sentencias confirmadas, en orden. Lo que sigue al
+        último COMMIT (o a un registro roto) se descarta, igual que las
+        escrituras a rutas reemplazadas después (DROP)."""
+        with open(path, "rb") as f:
+            data = f.read()
+        committed: List[Tuple[str, int, bytes]] = []
+        pending: List[Tuple[str, int, bytes]] = []
+        pos = 0
+        while pos + RECORD.size <= len(data):
+            crc, kind, path_len, offset, data_len = RECORD.unpack_from(data, pos)
+            end = pos + RECORD.size + path_len + data_len
+            if end > len(data) or zlib.crc32(data[pos + 4 : end]) != crc:
+                break  # cola escrita a medias
+            start = pos + RECORD.size
+            rec_path = data[start : start + path_len].decode("utf-8")
+            if kind == KIND_WRITE:
+                pending.append((rec_path, offset, data[start + path_len : end]))
+            elif kind == KIND_DROP:
+                committed = [w for w in committed if w[0] != rec_path]
+                pending = [w for w in pending if w[0] != rec_path]
+            elif kind == KIND_COMMIT:
+                committed.extend(pending)
+                pending = []
+            pos = end
+        return committed
+
+    @staticmethod
+    def recover(path: str) -> int:
+        """Rehace sobre los archivos las escrituras confirmadas del log y lo
+        vacía. Devuelve cuántas se aplicaron."""
+        if not os.path.exists(path):
+            return 0
+        writes = WriteAheadLog.read_committed(path)
+        by_file: Dict[str, List[Tuple[int, bytes]]] = {}
+        for rec_path, offset, data in writes:
+            by_file.setdefault(rec_path, []).append((offset, data))
+
+        applied = 0
+        pool = BufferPool.get()
+        for rec_path, file_writes in by_file.items():
+            try:
+                fh = open(rec_path, "r+b")
+            except FileNotFoundError:
+                continue  # la tabla o el índice ya no existe
+            with fh:
+                for offset, data in file_writes:
+                    fh.seek(offset)
+                    fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            pool.invalidate(rec_path)
+            applied += len(file_writes)
+
+        with open(path, "r+b") as f:
+            f.truncate(0)
+            os.fsync(f.fileno())
+        return applied
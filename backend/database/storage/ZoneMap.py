@@ -0,0 +1,172 @@
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .BufferPool import BufferPool
+from .Record import Record
+
+# --------------------------------------------------------
+#  Formato
+# --------------------------------------------------------
+ZONE_SLOTS = 1024  # slots por bloque
+COUNT_FIELD = "_count"  # filas vivas del bloque
+
+_INT_CHARS = "bBhHiIlLqQ"
+_FLOAT_CHARS = "fd"
+
+
+def _zone_dtype(fmt: str) -> Optional[np.dtype]:
+    """dtype de min/max para un campo del esquema, o None si no se mapea
+    (TEXT y SOUND guardan offsets, POINT2D y BOOL no tienen rango útil)."""
+    if fmt.upper() in ("TEXT", "SOUND"):
+        return None
+    char = Record.get_format_char_static(fmt)
+    if char in _INT_CHARS:
+        return np.dtype("<i8")
+    if char in _FLOAT_CHARS:
+        return np.dtype("<f8")
+    if char.endswith("s") and char[:-1].isdigit():
+        return np.dtype(f"S{char[:-1]}")
+    return None
+
+
+class ZoneMap:
+    """Mapa de zonas de un heap: por cada bloque de ZONE_SLOTS slots guarda
+    las filas vivas y el mínimo y máximo de cada columna numérica o VARCHAR.
+
+    • <tabla>.zone: un registro por bloque (dtype de zone_dtype), en orden.
+    • Insertar ensancha el rango del bloque; borrar solo descuenta la fila
+      (el rango queda holgado, nunca incorrecto). Un bloque sin filas vivas
+      se reinicia con la próxima inserción. VACUUM lo reconstruye.
+    • Quien recorre la tabla descarta los bloques cuyo rango no puede
+      cumplir el predicado y lee solo el resto (ver ranges).
+    """
+
+    def __init__(self, filename: str, schema: List[Tuple[str, str]]):
+        self.filename = filename
+        self.columns = [
+            (i, name, Record.get_format_char_static(fmt) == "f")
+            for i, (name, fmt) in enumerate(schema)
+            if _zone_dtype(fmt) is not None
+        ]
+        self.dtype = self.zone_dtype(schema)
+        self.pool = BufferPool.get()
+        try:
+            self.pool.validate(self.filename)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo {self.filename} no existe. Llame a build_file primero.")
+
+    @staticmethod
+    def zone_dtype(schema: List[Tuple[str, str]]) -> np.dtype:
+        names, formats = [COUNT_FIELD], ["<i4"]
+        for name, fmt in schema:
+            dt = _zone_dtype(fmt)
+            if dt is not None:
+                names += [f"{name}.min", f"{name}.max"]
+                formats += [dt, dt]
+        return np.dtype({"names": names, "formats": formats})
+
+    # ------------------------------------------------------------------
+    # Creación del archivo ---------------------------------------------
+    # ------------------------------------------------------------------
+    @staticmethod
+    def build_file(
+        filename: str,
+        schema: List[Tuple[str, str]],
+        arr: Optional[np.ndarray] = None,
+        live: Optional[np.ndarray] = None,
+    ) -> None:
+        """Crea (o sobrescribe) el mapa. ``arr`` (vista NumPy del heap) y
+        ``live`` (máscara de vivos) lo llenan de una vez; sin ellos queda vacío."""
+        dtype = ZoneMap.zone_dtype(schema)
+        n = 0 if arr is None else len(arr)
+        zones = np.zeros((n + ZONE_SLOTS - 1) // ZONE_SLOTS, dtype=dtype)
+        for b in range(len(zones)):
+            block = slice(b * ZONE_SLOTS, (b + 1) * ZONE_SLOTS)
+            alive = live[block]
+            zones[COUNT_FIELD][b] = int(alive.sum())
+            if not alive.any():
+                continue
+            for name in dtype.names[1::2]:
+                field = name[: -len(".min")]
+                col = np.sort(arr[field][block][alive])  # min()/max() no aceptan S{n}
+                zones[name][b] = col[0]
+                zones[f"{field}.max"][b] = col[-1]
+        with open(filename, "wb") as f:
+            f.write(zones.tobytes())
+        BufferPool.get().invalidate(filename)
+
+    # ------------------------------------------------------------------
+    # Mantenimiento -----------------------------------------------------
+    # ------------------------------------------------------------------
+    def _read_blocks(self, first: int, last: int) -> np.ndarray:
+        size = self.dtype.itemsize
+        data = self.pool.read(self.filename, first * size, (last - first + 1) * size)
+        zones = np.zeros(last - first + 1, dtype=self.dtype)
+        have = len(data) // size
+        zones[:have] = np.frombuffer(data[: have * size], dtype=self.dtype)
+        return zones
+
+    def add(self, positions: Iterable[int], rows: Iterable[list], new_rows: bool = True) -> None:
+        """Ensancha los bloques de ``positions`` con los valores crudos de
+        ``rows``. ``new_rows`` es False cuando se reescribe una fila viva."""
+        pairs = list(zip(positions, rows))
+        if not pairs:
+            return
+        first = min(p for p, _ in pairs) // ZONE_SLOTS
+        last = max(p for p, _ in pairs) // ZONE_SLOTS
+        zones = self._read_blocks(first, last)
+        for pos, values in pairs:
+            z = zones[pos // ZONE_SLOTS - first]
+            empty = z[COUNT_FIELD] == 0
+            for idx, name, single in self.columns:
+                value = values[idx]
+                if isinstance(value, str):
+                    value = value.encode("utf-8")
+                elif single:
+                    value = float(np.float32(value))  # lo que queda guardado en el slot
+                lo, hi = f"{name}.min", f"{name}.max"
+                if empty or value < z[lo]:
+                    z[lo] = value
+                if empty or value > z[hi]:
+                    z[hi] = value
+            if new_rows or empty:
+                z[COUNT_FIELD] += 1
+        self.pool.write(self.filename, first * self.dtype.itemsize, zones.tobytes())
+
+    def remove(self, positions: Iterable[int]) -> None:
+        """Descuenta las filas borradas de sus bloques."""
+        positions = list(positions)
+        if not positions:
+            return
+        first = min(positions) // ZONE_SLOTS
+        last = max(positions) // ZONE_SLOTS
+        zones = self._read_blocks(first, last)
+        for pos in positions:
+            z = zones[pos // ZONE_SLOTS - first]
+            z[COUNT_FIELD] = max(0, z[COUNT_FIELD] - 1)
+        self.pool.write(self.filename, first * self.dtype.itemsize, zones.tobytes())
+
+    # ------------------------------------------------------------------
+    # Consulta ----------------------------------------------------------
+    # ------------------------------------------------------------------
+    def has_column(self, field: str) -> bool:
+        return any(name == field for _, name, _ in self.columns)
+
+    def blocks(self, heap_size: int) -> np.ndarray:
+        """Un registro por bloque que cubre los heap_size slots."""
+        n = (heap_size + ZONE_SLOTS - 1) // ZONE_SLOTS
+        return self._read_blocks(0, n - 1) if n else np.zeros(0, dtype=self.dtype)
+
+    @staticmethod
+    def ranges(keep: np.ndarray, heap_size: int) -> List[Tuple[int, int]]:
+        """Rangos [inicio, fin) de slots de los bloques marcados en ``keep``;
+        los bloques consecutivos se juntan en un solo rango."""
+        out: List[Tuple[int, int]] = []
+        for b in np.flatnonzero(keep).tolist():
+            start, end = b * ZONE_SLOTS, min((b + 1) * ZONE_SLOTS, heap_size)
+            if out and out[-1][1] == start:
+                out[-1] = (out[-1][0], end)
+            else:
+                out.append((start, end))
+        return out
@@ -0,0 +1,89 @@
+import os
+import sys
+import random
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+from yarasca import query_run
+from dbmanager import DBManager
+from storage.Record import Record
+from fancytypes.column_types import OperationType
+
+# Ejecución por lotes de columnas NumPy: comparaciones entre columnas, POINT,
+# BOOL y TEXT tienen que dar las mismas filas y los mismos valores que un
+# filtro en Python sobre los registros originales.
+
+N = 12000
+random.seed(5)
+
+
+def f32(x):
+    return float(np.float32(x))
+
+
+condiciones = [
+    ("a < b", lambda r: r[1] < f32(r[2])),
+    ("a = b", lambda r: r[1] == f32(r[2])),
+    ("b <= a", lambda r: f32(r[2]) <= r[1]),
+    ("name = nick", lambda r: r[3] == r[4]),
+    ("name > nick", lambda r: r[3] > r[4]),
+    ("pos = POINT2D(1.0, 2.0)", lambda r: r[5] == (1.0, 2.0)),
+    ("pos != POINT2D(1.0, 2.0)", lambda r: r[5] != (1.0, 2.0)),
+    ("a BETWEEN 3 AND 9", lambda r: 3 <= r[1] <= 9),
+    ("ok = TRUE", lambda r: r[6] is True),
+    ("NOT (a > 10 OR name = 'n3')", lambda r: not (r[1] > 10 or r[3] == "n3")),
+]
+
+
+def preparar_tabla(table_name: str, storage: str) -> dict:
+    query_run(f"DROP TABLE {table_name}")
+    assert query_run(
+        f"CREATE TABLE {table_name}(id INT PRIMARY KEY, a INT, b FLOAT, name VARCHAR(8), nick VARCHAR(8), "
+        f"pos POINT2D, ok BOOL, bio TEXT) USING {storage}"
+    ).success
+    schema = DBManager.get_table_schema(table_name)
+    rows = {
+        i: [i, random.randint(0, 50), float(random.randint(0, 50)), f"n{random.randint(0, 9)}", f"n{random.randint(0, 9)}",
+            (float(i % 5), float(i % 3)), bool(i % 2), f"text {i}"]
+        for i in range(N)
+    }
+    DBManager.insert_many(table_name, [Record(schema, list(v)) for v in rows.values()])
+    for i in range(0, N, 11):
+        DBManager.delete_record(table_name, i)
+        rows.pop(i)
+    return rows
+
+
+def test_condiciones(table_name: str, rows: dict):
+    print(f"\n--- TEST lotes de columnas ({table_name}) ---")
+    errores = 0
+    for _ in range(40):
+        elegidas = random.sample(condiciones, random.randint(1, 3))
+        query = f"SELECT id, b, name, pos, ok, bio FROM {table_name} WHERE " + " AND ".join(c for c, _ in elegidas)
+        result = query_run(query)
+        if not result.success:
+            errores += 1
+            print("FAIL", query, result.message)
+            continue
+        esperado = sorted(k for k, v in rows.items() if all(f(v) for _, f in elegidas))
+        if result.data["id"].tolist() != esperado:
+            errores += 1
+            print("MISMATCH", query, len(result.data), len(esperado))
+        for _, fila in result.data.head(3).iterrows():
+            v = rows[fila["id"]]
+            if (fila["b"], fila["name"], tuple(fila["pos"]), fila["ok"], fila["bio"]) != (f32(v[2]), v[3], v[5], v[6], v[7]):
+                errores += 1
+                print("VALOR", query, fila.tolist(), v)
+    assert errores == 0
+
+    # comparación entre columnas directa en DBManager
+    obtenido = DBManager().fetch_condition_offsets(table_name, f"§{table_name}.a", OperationType.LESS_THAN, f"§{table_name}.b", 0)
+    assert len(obtenido) == sum(1 for v in rows.values() if v[1] < f32(v[2]))
+    print("OK")
+
+
+if __name__ == "__main__":
+    for storage in ("HEAP", "PAGED"):
+        table_name = f"batch_{storage.lower()}"
+        rows = preparar_tabla(table_name, storage)
+        test_condiciones(table_name, rows)
+        query_run(f"DROP TABLE {table_name}")
@@ -0,0 +1,64 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+from yarasca import query_run
+from dbmanager import DBManager
+from storage.Record import Record
+from storage import HeapFile
+from fancytypes.column_types import OperationType
+
+# Filtros de Bloom por bloque: las igualdades devuelven lo mismo que la
+# columna completa, un valor inexistente casi no lee bloques, y la PK
+# detecta duplicados sin el mapa de PKs en memoria.
+
+N = 20000
+
+
+def test_igualdades(storage: str):
+    table_name = f"bloom_{storage.lower()}"
+    print(f"\n--- TEST filtros de Bloom ({storage}) ---")
+    query_run(f"DROP TABLE {table_name}")
+    assert query_run(f"CREATE TABLE {table_name}(id INT PRIMARY KEY, name VARCHAR(16), age INT, score FLOAT) USING {storage}").success
+    schema = DBManager.get_table_schema(table_name)
+    DBManager.insert_many(table_name, [Record(schema, [i, f"name{i}", i % 50, (i * 7919 % N) * 0.5]) for i in range(N)])
+    assert query_run(f"CREATE INDEX ON {table_name}(name) USING BLOOM").success
+    assert query_run(f"CREATE INDEX ON {table_name}(score) USING BLOOM").success
+    # filas insertadas después de crear los filtros
+    DBManager.insert_many(table_name, [Record(schema, [i, f"name{i}", i % 50, (i * 7919 % N) * 0.5]) for i in range(N, N + 1000)])
+    for i in range(0, N + 1000, 7):
+        DBManager.delete_record(table_name, i)
+
+    db = DBManager()
+    heap = DBManager.get_table_heap(table_name, use_mmap=True)
+    assert sorted(heap.blooms) == ["id", "name", "score"], sorted(heap.blooms)
+    columnas, live = heap.to_numpy(), heap.live_mask()
+    for field, value in [("name", "name1234"), ("name", "name20500"), ("name", "nope"), ("score", 617.0), ("score", 0.3), ("id", 20001)]:
+        obtenido = db.fetch_condition_offsets(table_name, f"§{table_name}.{field}", OperationType.EQUAL, value, 0)
+        esperado = set(np.flatnonzero(DBManager.column_mask(columnas[field], OperationType.EQUAL, value) & live).tolist())
+        assert obtenido == esperado, (field, value, len(obtenido), len(esperado))
+        leidos = sum(fin - inicio for inicio, fin in DBManager.block_ranges(heap, field, OperationType.EQUAL, value))
+        assert leidos <= heap.heap_size // 4, (field, value, leidos)
+        print(f"{field} = {value}: {len(obtenido)} filas, {leidos} slots leídos")
+
+    # PK sin el mapa en memoria: responde el filtro de la PK
+    HeapFile._PK_SLOTS.clear()
+    DBManager.insert_record(table_name, Record(schema, [50000, "x", 1, 1.0]))
+    try:
+        DBManager.insert_record(table_name, Record(schema, [20001, "x", 1, 1.0]))
+        raise AssertionError("no se detectó la PK duplicada")
+    except ValueError:
+        pass
+    DBManager.insert_record(table_name, Record(schema, [7, "x", 1, 1.0]))  # PK borrada antes
+
+    assert query_run(f"VACUUM {table_name}").success
+    assert len(db.fetch_condition_offsets(table_name, f"§{table_name}.name", OperationType.EQUAL, "name1234", 0)) == 1
+    assert query_run(f"DROP INDEX BLOOM ON {table_name}(score)").success
+    assert sorted(DBManager.get_table_heap(table_name).blooms) == ["id", "name"]
+    query_run(f"DROP TABLE {table_name}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    test_igualdades("HEAP")
+    test_igualdades("PAGED")
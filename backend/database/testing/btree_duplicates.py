@@ -0,0 +1,98 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from yarasca import query_run
+from dbmanager import DBManager
+from storage.Record import Record
+from indexing.BPlusTreeIndex import BPlusTreeIndex, BPlusTreeIndexWrapper
+from indexing.IndexRecord import IndexRecord
+
+# Claves duplicadas en el B+ tree: los borrados deben encontrar la entrada
+# (clave, offset) aunque esté en otra hoja de la cadena; si no, la entrada
+# queda apuntando a un slot que después reutiliza otra fila.
+
+table_name = "btree_dup"
+N = 10000
+KEYS = 250
+
+
+def preparar_tabla():
+    query_run(f"DROP TABLE {table_name}")
+    query_run(f"CREATE TABLE {table_name}(id INT PRIMARY KEY, age INT)")
+    schema = DBManager.get_table_schema(table_name)
+    DBManager.insert_many(table_name, [Record(schema, [i, i % KEYS]) for i in range(N)])
+    assert query_run(f"CREATE INDEX ON {table_name}(age) USING BPLUSTREE").success
+
+    rows = {i: i % KEYS for i in range(N)}
+    for i in range(0, N, 2):
+        DBManager.delete_record(table_name, i)
+        rows.pop(i)
+    # los slots liberados se reutilizan con otra clave
+    nuevos = [Record(schema, [N + i, 1000]) for i in range(N // 2)]
+    DBManager.insert_many(table_name, nuevos)
+    rows.update({r.values[0]: 1000 for r in nuevos})
+    assert query_run(f"ANALYZE {table_name}").success
+    return rows
+
+
+def test_arbol_directo():
+    print("\n--- TEST delete con duplicados (árbol) ---")
+    for ext in (".btree.idx", ".btree.aux"):
+        if os.path.exists(f"dup.test{ext}"):
+            os.remove(f"dup.test{ext}")
+    btree = BPlusTreeIndex(order=4, filename="dup.test.dat", auxname="dup.test.btree.idx", index_format="i")
+    for offset in range(200):
+        btree.insert(IndexRecord("i", offset % 3, offset))
+    for offset in range(0, 200, 2):
+        assert btree.delete(offset % 3, offset), f"no se encontró ({offset % 3}, {offset})"
+    for key in range(3):
+        esperado = sorted(o for o in range(1, 200, 2) if o % 3 == key)
+        assert sorted(btree.search(key)) == esperado, f"clave {key}"
+    assert not btree.delete(1, 0)
+    print("OK")
+    for path in ("dup.test.btree.idx", "dup.test.btree.aux", "dup.test.dat"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_entradas_del_indice(rows: dict[int, int]):
+    print("\n--- TEST el índice no guarda entradas viejas ---")
+    heap = DBManager.get_table_heap(table_name)
+    live = heap.live_mask()
+    entradas = list(BPlusTreeIndexWrapper(DBManager.table_path(table_name), "age").items())
+    offsets = [offset for _, offset in entradas]
+    assert all(live[offsets]), "hay entradas apuntando a slots borrados"
+    valores = heap.take(offsets)["age"].tolist()
+    viejas = sum(key != value for (key, _), value in zip(entradas, valores))
+    assert viejas == 0, f"{viejas} entradas con una clave distinta a la de la fila"
+    assert len(entradas) == len(rows), f"{len(entradas)} entradas para {len(rows)} filas"
+    print("OK")
+
+
+def comparar(query: str, esperado: list[int]) -> None:
+    result = query_run(query)
+    assert result.success, result.message
+    obtenido = sorted(result.data["id"].tolist())
+    assert obtenido == sorted(esperado), f"{query}: {len(obtenido)} filas, se esperaban {len(esperado)}"
+    print(f"OK  {query}  ({len(obtenido)} filas)")
+
+
+def test_consultas(rows: dict[int, int]):
+    print("\n--- TEST consultas por índice tras borrar y reutilizar slots ---")
+    plan = query_run(f"EXPLAIN SELECT id FROM {table_name} WHERE age = 10").data.to_string()
+    assert "BPLUSTREE" in plan, plan
+    comparar(f"SELECT id FROM {table_name} WHERE age = 10", [i for i, a in rows.items() if a == 10])
+    comparar(f"SELECT id FROM {table_name} WHERE age = 11", [i for i, a in rows.items() if a == 11])
+    comparar(f"SELECT id FROM {table_name} WHERE age = 1000", [i for i, a in rows.items() if a == 1000])
+    comparar(f"SELECT id FROM {table_name} WHERE age BETWEEN 10 AND 11", [i for i, a in rows.items() if 10 <= a <= 11])
+    comparar(f"SELECT id FROM {table_name} WHERE age >= 248 AND age < 1000", [i for i, a in rows.items() if 248 <= a < 1000])
+    comparar(f"SELECT id FROM {table_name} WHERE age <= 1", [i for i, a in rows.items() if a <= 1])
+    comparar(f"SELECT id FROM {table_name} WHERE age > 10 AND age < 13", [i for i, a in rows.items() if 10 < a < 13])
+
+
+if __name__ == "__main__":
+    test_arbol_directo()
+    rows = preparar_tabla()
+    test_entradas_del_indice(rows)
+    test_consultas(rows)
+    query_run(f"DROP TABLE {table_name}")
@@ -0,0 +1,128 @@
+import os
+import sys
+import random
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from storage.BufferPool import BufferPool, PAGE_SIZE
+from storage.Record import Record
+from yarasca import query_run
+from dbmanager import DBManager
+from storage import HeapFile
+
+# Pool de páginas en modo write-through y write-back: lo que se lee por el
+# pool y lo que queda en disco después de flush() tienen que coincidir con
+# una copia en memoria del archivo.
+
+path = os.path.join(DBManager.tables_dir, "pool.test")
+random.seed(11)
+
+
+def escrituras_al_azar(pool: BufferPool, copia: bytearray, n: int) -> None:
+    for _ in range(n):
+        offset = random.randrange(0, len(copia) - 100)
+        data = bytes(random.randrange(256) for _ in range(random.randint(1, 100)))
+        pool.write(path, offset, data)
+        copia[offset : offset + len(data)] = data
+
+
+def leer_disco() -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_write_back():
+    print("\n--- TEST BufferPool write-back con desalojo ---")
+    copia = bytearray(os.urandom(PAGE_SIZE * 40))
+    with open(path, "wb") as f:
+        f.write(copia)
+
+    pool = BufferPool.configure(memory_bytes=PAGE_SIZE * 8, write_back=True)
+    pool.invalidate(path)
+    pool.reset_stats()
+    escrituras_al_azar(pool, copia, 2000)
+    stats = pool.stats()
+    assert stats["dirty"] > 0 and stats["evictions"] > 0 and stats["writebacks"] > 0, stats
+    assert stats["frames"] <= 8, stats
+    assert pool.read(path, 0, len(copia)) == bytes(copia)
+
+    offset = pool.append(path, b"cola")
+    copia += b"cola"
+    assert offset == len(copia) - 4 and pool.size(path) == len(copia)
+
+    pool.flush(path)
+    assert pool.stats()["dirty"] == 0
+    assert leer_disco() == bytes(copia)
+    print("OK", stats)
+
+
+def test_write_through():
+    print("\n--- TEST BufferPool write-through ---")
+    copia = bytearray(leer_disco())
+    pool = BufferPool.configure(memory_bytes=PAGE_SIZE * 8, write_back=False)
+    escrituras_al_azar(pool, copia, 300)
+    assert pool.stats()["dirty"] == 0
+    assert leer_disco() == bytes(copia)
+    pool.reset_stats()
+    for _ in range(5):
+        pool.read(path, 0, PAGE_SIZE * 4)
+    assert pool.stats()["hits"] >= 16, pool.stats()
+    print("OK")
+
+
+def test_tabla_con_write_back():
+    print("\n--- TEST consultas sobre una tabla con el pool en write-back ---")
+    BufferPool.configure(memory_bytes=PAGE_SIZE * 64, write_back=True)
+    query_run("DROP TABLE pool_tabla")
+    assert query_run("CREATE TABLE pool_tabla(id INT PRIMARY KEY, name VARCHAR(16), age INT, bio TEXT)").success
+    assert query_run("CREATE INDEX ON pool_tabla(age) USING BPLUSTREE").success
+    schema = DBManager.get_table_schema("pool_tabla")
+    DBManager.insert_many("pool_tabla", [Record(schema, [i, f"n{i}", i % 20, f"bio {i}"]) for i in range(3000)])
+    for i in range(0, 3000, 5):
+        DBManager.delete_record("pool_tabla", i)
+    esperado = sorted(i for i in range(3000) if i % 5 and i % 20 == 7)
+    result = query_run("SELECT id, bio FROM pool_tabla WHERE age = 7")
+    assert sorted(result.data["id"].tolist()) == esperado
+    assert all(bio == f"bio {i}" for i, bio in result.data.values.tolist())
+
+    BufferPool.configure(write_back=False)  # baja todo a disco
+    assert BufferPool.get().stats()["dirty"] == 0
+    result = query_run("SELECT id FROM pool_tabla WHERE age = 7")
+    assert sorted(result.data["id"].tolist()) == esperado
+    query_run("DROP TABLE pool_tabla")
+    print("OK")
+
+
+def test_mapa_pk_con_flush():
+    print("\n--- TEST mapa PK → slot con el pool en write-back ---")
+    BufferPool.configure(memory_bytes=PAGE_SIZE * 8, write_back=True)
+    query_run("DROP TABLE pool_pk")
+    assert query_run("CREATE TABLE pool_pk(id INT PRIMARY KEY, name VARCHAR(16))").success
+    schema = DBManager.get_table_schema("pool_pk")
+    dat = os.path.abspath(DBManager.table_path("pool_pk") + ".dat")
+    mapa = None
+    for i in range(500):
+        DBManager.insert_record("pool_pk", Record(schema, [i, "x"]))
+        if i % 10 == 9:
+            BufferPool.get().flush()  # cambia el mtime del .dat, no su contenido
+            try:
+                DBManager.insert_record("pool_pk", Record(schema, [i - 5, "x"]))
+                raise AssertionError("no se detectó la PK duplicada")
+            except ValueError:
+                pass
+            mapa = mapa or HeapFile._PK_SLOTS[dat][1]  # lo arma el primer duplicado
+    assert HeapFile._PK_SLOTS[dat][1] is mapa and len(mapa) == 500  # nunca se rearmó
+
+    BufferPool.get().invalidate(dat)  # archivo reemplazado: el mapa se rearma
+    assert DBManager.delete_record("pool_pk", 7)
+    assert HeapFile._PK_SLOTS[dat][1] is not mapa and 7 not in HeapFile._PK_SLOTS[dat][1]
+    BufferPool.configure(write_back=False)
+    query_run("DROP TABLE pool_pk")
+    print("OK")
+
+
+if __name__ == "__main__":
+    test_write_back()
+    test_write_through()
+    os.remove(path)
+    BufferPool.get().invalidate(path)
+    test_tabla_con_write_back()
+    test_mapa_pk_con_flush()
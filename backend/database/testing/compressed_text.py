@@ -0,0 +1,78 @@
+import os
+import sys
+import random
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from yarasca import Parser, query_run
+from scanner import Scanner
+from dbmanager import DBManager
+from storage.Record import Record
+
+# Columnas TEXT comprimidas (zlib, lzma, zlib con diccionario): lo que se lee
+# tiene que ser el texto original, antes y después de VACUUM, y los bloques
+# comprimidos deben ocupar menos que el archivo plano.
+
+random.seed(1)
+palabras = "the market rallied as investors weighed central bank policy inflation data earnings tech shares".split()
+docs = [" ".join(random.choice(palabras) for _ in range(random.randint(0, 300))) for _ in range(800)]
+variantes = {
+    "ct_plano": "",
+    "ct_zlib": " COMPRESSED",
+    "ct_lzma": " COMPRESSED LZMA",
+    "ct_dict": " COMPRESSED ZLIB DICTIONARY",
+}
+
+
+def bytes_de_body(table_name: str) -> int:
+    base = DBManager.table_path(table_name) + ".body"
+    return sum(os.path.getsize(base + ext) for ext in (".text", ".ztext", ".ztext.map", ".ztext.dict") if os.path.exists(base + ext))
+
+
+def leer(table_name: str, where: str = "") -> list:
+    result = query_run(f"SELECT id, body FROM {table_name}{where}")
+    assert result.success, result.message
+    return sorted(map(tuple, result.data.values.tolist()))
+
+
+def test_variantes():
+    print("\n--- TEST TEXT comprimido ---")
+    tamanos = {}
+    for table_name, spec in variantes.items():
+        query_run(f"DROP TABLE {table_name}")
+        assert query_run(f"CREATE TABLE {table_name}(id INT PRIMARY KEY, body TEXT{spec}, age INT)").success
+        schema = DBManager.get_table_schema(table_name)
+        DBManager.insert_many(table_name, [Record(schema, [i, docs[i], i % 10]) for i in range(780)])
+        for i in range(780, 800):
+            assert query_run(f"INSERT INTO {table_name} (id, body, age) VALUES ({i}, '{docs[i]}', {i % 10})").success
+        for i in range(0, 800, 4):
+            DBManager.delete_record(table_name, i)
+
+        esperado = [(i, docs[i]) for i in range(800) if i % 4]
+        assert leer(table_name) == esperado, table_name
+        assert leer(table_name, " WHERE age = 3") == [(i, d) for i, d in esperado if i % 10 == 3], table_name
+        antes = bytes_de_body(table_name)
+        assert query_run(f"VACUUM {table_name}").success
+        assert leer(table_name) == esperado, f"{table_name} después de VACUUM"
+        tamanos[table_name] = (antes, bytes_de_body(table_name))
+        print(table_name, "bytes", tamanos[table_name][0], "->", tamanos[table_name][1])
+
+    plano = tamanos["ct_plano"][1]
+    for table_name in ("ct_zlib", "ct_lzma", "ct_dict"):
+        assert tamanos[table_name][1] < plano, (table_name, tamanos[table_name], plano)
+    print("OK")
+
+
+def test_errores():
+    print("\n--- TEST opciones de COMPRESSED inválidas ---")
+    for consulta in (
+        "CREATE TABLE ct_mal(id INT, body TEXT COMPRESSED LZMA DICTIONARY)",
+        "CREATE TABLE ct_mal(id INT, name VARCHAR(8) COMPRESSED)",
+    ):
+        assert Parser(Scanner(consulta)).parse_program() is None, consulta
+    print("OK")
+
+
+if __name__ == "__main__":
+    test_variantes()
+    test_errores()
+    for table_name in variantes:
+        query_run(f"DROP TABLE {table_name}")
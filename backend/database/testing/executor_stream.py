@@ -0,0 +1,72 @@
+import os
+import sys
+import random
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from yarasca import query_run, query_stream
+from dbmanager import DBManager
+from storage.Record import Record
+from executor import BATCH_ROWS, ColumnBatch
+
+# Ejecutor por operadores: query_stream entrega lotes a medida que se
+# itera y, concatenados, deben ser exactamente el resultado de query_run.
+# Con LIMIT solo se recorre lo necesario.
+
+table_name = "stream_test"
+N = 30000
+random.seed(3)
+
+
+def preparar_tabla():
+    query_run(f"DROP TABLE {table_name}")
+    assert query_run(f"CREATE TABLE {table_name}(id INT PRIMARY KEY, name VARCHAR(16), age INT, bio TEXT)").success
+    schema = DBManager.get_table_schema(table_name)
+    DBManager.insert_many(table_name, [Record(schema, [i, f"n{i % 50}", random.randint(0, 80), f"bio {i}"]) for i in range(N)])
+    for i in range(0, N, 9):
+        DBManager.delete_record(table_name, i)
+    assert query_run(f"CREATE INDEX ON {table_name}(age) USING BPLUSTREE").success
+
+
+def test_stream_igual_a_run():
+    print("\n--- TEST query_stream vs query_run ---")
+    consultas = [
+        f"SELECT id, bio FROM {table_name} WHERE name = 'n3'",
+        f"SELECT * FROM {table_name} WHERE age = 3 OR name = 'n7'",
+        f"SELECT id, age FROM {table_name} WHERE id > 20000 ORDER BY age DESC LIMIT 5",
+        f"SELECT id, name FROM {table_name} WHERE NOT age < 40 ORDER BY name",
+        f"SELECT * FROM {table_name} LIMIT 3",
+        f"SELECT * FROM {table_name}",
+    ]
+    for consulta in consultas:
+        result = query_stream(consulta)
+        assert result.success, result.message
+        lotes = list(result.stream)
+        assert all(isinstance(lote, ColumnBatch) and len(lote) <= BATCH_ROWS for lote in lotes)
+        filas = [fila for lote in lotes for fila in lote.rows()]
+        completo = query_run(consulta).data
+        assert completo.values.tolist() == filas, consulta
+        print(f"OK  {consulta}  ({len(filas)} filas, {len(lotes)} lotes)")
+
+
+def test_primer_lote():
+    print("\n--- TEST el primer lote llega antes de leer toda la tabla ---")
+    result = query_stream(f"SELECT id, bio FROM {table_name}")
+    primero = next(iter(result.stream))
+    assert 0 < len(primero) <= BATCH_ROWS
+    limit = query_stream(f"SELECT id FROM {table_name} WHERE age > 10 LIMIT 7")
+    assert sum(len(lote) for lote in limit.stream) == 7
+    print("OK")
+
+
+def test_errores():
+    print("\n--- TEST errores en modo stream ---")
+    assert not query_stream("SELECT id FROM no_existe").success
+    assert not query_stream(f"SELECT no_existe FROM {table_name}").success
+    print("OK")
+
+
+if __name__ == "__main__":
+    preparar_tabla()
+    test_stream_igual_a_run()
+    test_primer_lote()
+    test_errores()
+    query_run(f"DROP TABLE {table_name}")
@@ -0,0 +1,136 @@
+import os
+import sys
+import random
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+from yarasca import query_run
+from dbmanager import DBManager
+from planner import Planner
+from storage.Record import Record
+from storage.TableRegistry import TableRegistry
+from storage.ExternalSort import ExternalSort, top_n
+from indexing.IndexRecord import IndexRecord
+
+# ORDER BY por los tres caminos (hojas del B+ tree, heap top-N y ordenamiento
+# externo) contra el orden esperado calculado en Python. El índice tiene
+# además entradas viejas (clave distinta a la de la fila de su slot), como
+# las que dejaba el delete antes de seguir la cadena de hojas.
+
+table_name = "order_by"
+N = 6000
+random.seed(7)
+
+
+def f32(x):
+    return float(np.float32(x))
+
+
+def preparar_tabla():
+    query_run(f"DROP TABLE {table_name}")
+    query_run(f"CREATE TABLE {table_name}(id INT PRIMARY KEY, name VARCHAR(16), age INT, score FLOAT)")
+    schema = DBManager.get_table_schema(table_name)
+    records = [Record(schema, [i, f"n{random.randint(0, 999)}", i % 60, random.random() * 100]) for i in range(N)]
+    DBManager.insert_many(table_name, records)
+    assert query_run(f"CREATE INDEX ON {table_name}(age) USING BPLUSTREE").success
+
+    rows = {r.values[0]: r.values for r in records}
+    for i in range(0, N, 3):
+        DBManager.delete_record(table_name, i)
+        rows.pop(i)
+    nuevos = [Record(schema, [N + i, f"m{i}", 1000, random.random() * 100]) for i in range(N // 3)]
+    offsets = DBManager.insert_many(table_name, nuevos)
+    rows.update({r.values[0]: r.values for r in nuevos})
+
+    # entradas viejas sobre slots reutilizados por las filas con age = 1000
+    index = TableRegistry.btree_index(DBManager.table_path(table_name), "age")
+    for k, offset in enumerate(offsets[:200]):
+        index.insert_record(IndexRecord("i", 20 + k % 10, offset))
+    return rows
+
+
+def comparar(query: str, rows: dict, column: str, where, descending: bool, limit) -> int:
+    result = query_run(query)
+    if not result.success:
+        print(f"FAIL {query}: {result.message}")
+        return 1
+    pos = {"id": 0, "name": 1, "age": 2, "score": 3}[column]
+    key = (lambda v: f32(v[pos])) if column == "score" else (lambda v: v[pos])
+    esperado = sorted((key(v) for v in rows.values() if where(v)), reverse=descending)[:limit]
+    obtenido = result.data[column].tolist()
+    if column == "score":
+        obtenido = [f32(x) for x in obtenido]
+    filas_ok = all(key(rows[i]) == k for i, k in zip(result.data["id"].tolist(), obtenido))
+    if obtenido != esperado or not filas_ok:
+        print(f"MISMATCH {query}: {obtenido[:5]} vs {esperado[:5]}")
+        return 1
+    return 0
+
+
+def test_consultas(rows: dict):
+    print("\n--- TEST ORDER BY por índice, top-N y ordenamiento externo ---")
+    walk_cost = Planner.INDEX_WALK_COST
+    errores = 0
+    for metodo, cost in (("index", 0.0), ("sort", float("inf"))):
+        Planner.INDEX_WALK_COST = cost
+        for column in ("age", "score", "name"):
+            for desc in (False, True):
+                for where_sql, where in (("", lambda v: True), (" WHERE age > 22", lambda v: v[2] > 22)):
+                    for limit in (None, 3, 50):
+                        query = f"SELECT id, {column} FROM {table_name}{where_sql} ORDER BY {column}{' DESC' if desc else ''}"
+                        if limit:
+                            query += f" LIMIT {limit}"
+                        errores += comparar(query, rows, column, where, desc, limit)
+        print(f"{metodo}: {errores} errores")
+    Planner.INDEX_WALK_COST = walk_cost
+    assert errores == 0
+
+
+def paso_sort(query: str) -> str:
+    plan = query_run(f"EXPLAIN {query}").data
+    return plan.loc[plan["operation"] == "Sort", "access"].iloc[0]
+
+
+def test_explain():
+    print("\n--- TEST EXPLAIN del paso Sort ---")
+    walk_cost = Planner.INDEX_WALK_COST
+    Planner.INDEX_WALK_COST = 0.0
+    assert paso_sort(f"SELECT id FROM {table_name} ORDER BY age LIMIT 3").startswith("B+ tree leaf order")
+    Planner.INDEX_WALK_COST = float("inf")
+    assert paso_sort(f"SELECT id FROM {table_name} ORDER BY age LIMIT 3").startswith("top-N heap")
+    assert paso_sort(f"SELECT id FROM {table_name} ORDER BY age") == "external merge sort"
+    Planner.INDEX_WALK_COST = walk_cost
+    print("OK")
+
+
+def test_ordenamiento_externo():
+    print("\n--- TEST ExternalSort con corridas en disco ---")
+    keys = np.array([random.randint(0, 500) for _ in range(20000)], dtype=np.int32)
+    offsets = np.arange(len(keys), dtype=np.int64)
+    for descending in (False, True):
+        sorter = ExternalSort(descending=descending, memory=4096, tmp_dir=DBManager.tables_dir)
+        for lo in range(0, len(keys), 1000):
+            sorter.add(keys[lo : lo + 1000], offsets[lo : lo + 1000])
+        assert len(sorter.runs) > 1, "no se volcó ninguna corrida"
+        runs = list(sorter.runs)
+        obtenido = list(sorter.offsets())
+        esperado = sorted(offsets.tolist(), key=lambda o: (int(keys[o]), o), reverse=descending)
+        assert obtenido == esperado
+        assert not any(os.path.exists(p) for p in runs), "quedaron corridas en disco"
+
+        textos = [f"t{k:04d}" for k in keys.tolist()]
+        sorter = ExternalSort(descending=descending, memory=4096, tmp_dir=DBManager.tables_dir)
+        for lo in range(0, len(textos), 1000):
+            sorter.add(textos[lo : lo + 1000], offsets[lo : lo + 1000])
+        assert list(sorter.offsets()) == esperado
+
+        chunks = ((keys[lo : lo + 1000], offsets[lo : lo + 1000]) for lo in range(0, len(keys), 1000))
+        assert top_n(chunks, 25, descending) == esperado[:25]
+    print("OK")
+
+
+if __name__ == "__main__":
+    rows = preparar_tabla()
+    test_consultas(rows)
+    test_explain()
+    test_ordenamiento_externo()
+    query_run(f"DROP TABLE {table_name}")
@@ -0,0 +1,58 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import create_table, create_btree_idx, drop_table, check_table_exists, _table_path
+from storage.Record import Record
+from storage.HeapFile import HeapFile
+from storage.PagedFile import PagedHeapFile, PAGE_SIZE
+from dbmanager import DBManager
+
+# La misma carga sobre una tabla HEAP y una PAGED tiene que verse igual por
+# todas las vías de lectura (registros, offsets, NumPy, búsquedas, mmap).
+
+schema = [("id", "i"), ("name", "8s"), ("age", "i"), ("t", "text")]
+
+
+def cargar(table_name: str, storage: str) -> None:
+    if check_table_exists(table_name):
+        drop_table(table_name)
+    create_table(table_name, schema, "id", storage)
+    DBManager.insert_many(table_name, [Record(schema, [i, f"n{i}", i % 50, f"t{i}"]) for i in range(500)])
+    for i in range(500, 520):
+        DBManager.insert_record(table_name, Record(schema, [i, f"n{i}", i % 50, f"t{i}"]))
+    create_btree_idx(table_name, "id")
+    for k in (3, 17, 39, 100, 250, 519):
+        DBManager.delete_record(table_name, k)
+    # reutiliza un slot libre
+    DBManager.insert_record(table_name, Record(schema, [1000, "back", 1, "tb"]))
+
+
+def lecturas(table_name: str) -> list:
+    resultado = []
+    for use_mmap in (False, True):
+        heap = HeapFile(_table_path(table_name), use_mmap=use_mmap)
+        live = heap.live_mask()
+        resultado.append([r.values for r in heap.get_all_records()])
+        resultado.append(sorted(heap.get_all_offsets()))
+        resultado.append(sorted(heap.to_numpy()["id"][live].tolist()))
+        resultado.append([r.values for r in heap.search_by_field("age", 7)])
+        resultado.append(heap.fetch_record_by_offset(heap.search_offsets_by_field("id", 1000)[0]).values)
+    resultado.append(DBManager.search_btree_idx(table_name, "id", 1000))
+    return resultado
+
+
+def test_heap_vs_paged():
+    print("\n--- TEST tabla HEAP vs PAGED ---")
+    cargar("p_heap", "heap")
+    cargar("p_paged", "paged")
+    heap = HeapFile(_table_path("p_paged"))
+    assert isinstance(heap, PagedHeapFile), type(heap).__name__
+    assert os.path.getsize(_table_path("p_paged") + ".dat") % PAGE_SIZE == 0
+    assert lecturas("p_heap") == lecturas("p_paged")
+    print("OK")
+    drop_table("p_heap")
+    drop_table("p_paged")
+
+
+if __name__ == "__main__":
+    test_heap_vs_paged()
@@ -7,6 +7,7 @@ import pandas as pd
 import time
 from database import check_table_exists, drop_table, create_table, insert_record, build_spimi_index, search_text
 from storage.Record import Record
+from dbmanager import DBManager
 
 class SuppressPrints:
     def __enter__(self):
@@ -19,6 +20,7 @@ class SuppressPrints:
 csv_path = os.path.join(os.path.dirname(__file__), "news_large.csv")
 table_name = "news_text"
 output_path = os.path.join(os.path.dirname(__file__), "performance_results_text.csv")
+BULK_INSERT = True  # False = insert row by row (old behaviour)
 
 def load_to_db(df: pd.DataFrame) -> float:
     schema = [
@@ -29,10 +31,12 @@ def load_to_db(df: pd.DataFrame) -> float:
         drop_table(table_name)
     create_table(table_name, schema, "id")
     start = time.time()
-    for _, row in df.iterrows():
-        values = [int(row["id"]), str(row["title"])]
-        rec = Record(schema, values)
-        insert_record(table_name, rec)
+    records = [Record(schema, [int(row["id"]), str(row["title"])]) for _, row in df.iterrows()]
+    if BULK_INSERT:
+        DBManager.insert_many(table_name, records)
+    else:
+        for rec in records:
+            insert_record(table_name, rec)
     build_spimi_index(table_name)
     end = time.time()
     return end - start
@@ -0,0 +1,95 @@
+import os
+import sys
+import random
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from yarasca import query_run
+from dbmanager import DBManager
+from storage.Record import Record
+
+# Planificador de WHERE: combinaciones al azar de condiciones (con índices
+# B+, hash y secuencial, OR, NOT y LIMIT) contra un filtro en Python, antes
+# y después de ANALYZE; y la forma de los planes de EXPLAIN.
+
+N = 8000
+random.seed(1)
+
+condiciones = [
+    ("age > 70", lambda r: r[2] > 70),
+    ("age >= 70", lambda r: r[2] >= 70),
+    ("age < 5", lambda r: r[2] < 5),
+    ("age <= 5", lambda r: r[2] <= 5),
+    ("name = 'n5'", lambda r: r[1] == "n5"),
+    ("id = 77", lambda r: r[0] == 77),
+    ("score BETWEEN 10 AND 11", lambda r: 10 <= r[3] <= 11),
+    ("score > 99.5", lambda r: r[3] > 99.5),
+    ("id < 3000", lambda r: r[0] < 3000),
+    ("age != 3", lambda r: r[2] != 3),
+    ("5 < age", lambda r: 5 < r[2]),
+    ("(id = 5 OR age < 2)", lambda r: r[0] == 5 or r[2] < 2),
+    ("NOT (age < 70 OR name = 'n4')", lambda r: not (r[2] < 70 or r[1] == "n4")),
+    ("(name = 'n9' OR score > 98)", lambda r: r[1] == "n9" or r[3] > 98),
+    ("NOT age > 10", lambda r: not r[2] > 10),
+]
+
+
+def preparar_tabla(table_name: str, storage: str) -> dict:
+    query_run(f"DROP TABLE {table_name}")
+    assert query_run(f"CREATE TABLE {table_name}(id INT PRIMARY KEY, name VARCHAR(16), age INT, score FLOAT) USING {storage}").success
+    schema = DBManager.get_table_schema(table_name)
+    records = [Record(schema, [i, f"n{i % 97}", random.randint(0, 80), random.random() * 100]) for i in range(N)]
+    rows = {r.values[0]: r.values for r in records}
+    DBManager.insert_many(table_name, records)
+    for i in range(0, N, 7):
+        DBManager.delete_record(table_name, i)
+        rows.pop(i)
+    for index in ("age) USING BPLUSTREE", "name) USING HASHFILE", "score) USING SEQUENTIAL"):
+        assert query_run(f"CREATE INDEX ON {table_name}({index}").success
+    return rows
+
+
+def test_condiciones(table_name: str, rows: dict):
+    print(f"\n--- TEST WHERE al azar ({table_name}) ---")
+    errores = 0
+    for fase in ("sin estadísticas", "con estadísticas"):
+        if fase == "con estadísticas":
+            assert query_run(f"ANALYZE {table_name}").success
+        for _ in range(60):
+            elegidas = random.sample(condiciones, random.randint(1, 4))
+            where = " AND ".join(c for c, _ in elegidas)
+            limit = random.choice([None, None, 5])
+            query = f"SELECT id FROM {table_name} WHERE {where}" + (f" LIMIT {limit}" if limit else "")
+            result = query_run(query)
+            esperado = {k for k, v in rows.items() if all(f(v) for _, f in elegidas)}
+            if not result.success:
+                errores += 1
+                print("FAIL", query, result.message)
+                continue
+            obtenido = result.data["id"].tolist()
+            ok = set(obtenido) <= esperado and len(obtenido) == min(len(esperado), limit or len(esperado))
+            if not ok or len(set(obtenido)) != len(obtenido):
+                errores += 1
+                print("MISMATCH", query, len(obtenido), len(esperado))
+        print(f"{fase}: {errores} errores")
+    assert errores == 0
+
+
+def test_explain(table_name: str):
+    print(f"\n--- TEST EXPLAIN ({table_name}) ---")
+    plan = query_run(f"EXPLAIN SELECT id FROM {table_name} WHERE name = 'n5' AND age > 20 AND id < 9000 LIMIT 4").data
+    operaciones = plan["operation"].tolist()
+    assert operaciones[0] == "Index Scan (EXTENDIBLEHASH)", plan.to_string()
+    assert {"Filter", "Limit", "Project"} <= set(operaciones), plan.to_string()
+    plan = query_run(f"EXPLAIN SELECT * FROM {table_name}").data
+    assert plan["operation"].tolist()[0] == "Seq Scan", plan.to_string()
+    plan = query_run(f"EXPLAIN SELECT id FROM {table_name} WHERE age > 70 AND score < 50 OR name = 'n3'").data
+    assert plan["est_rows"].iloc[0] > 0, plan.to_string()
+    print("OK")
+
+
+if __name__ == "__main__":
+    for storage in ("HEAP", "PAGED"):
+        table_name = f"planner_{storage.lower()}"
+        rows = preparar_tabla(table_name, storage)
+        test_condiciones(table_name, rows)
+        test_explain(table_name)
+        query_run(f"DROP TABLE {table_name}")
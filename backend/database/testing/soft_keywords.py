@@ -0,0 +1,41 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from yarasca import query_run
+
+# Las palabras de USING / COMPRESSED / VACUUM / ANALYZE / EXPLAIN siguen
+# sirviendo como nombres de tablas y columnas.
+
+consultas = [
+    "CREATE TABLE heap(id INT PRIMARY KEY, analyze INT, zlib TEXT COMPRESSED, bloom VARCHAR(8), paged FLOAT) USING PAGED",
+    "INSERT INTO heap (id, analyze, zlib, bloom, paged) VALUES (1, 10, 'hola', 'x', 1.5)",
+    "INSERT INTO heap (id, analyze, zlib, bloom, paged) VALUES (2, 20, 'mundo', 'y', 2.5)",
+    "CREATE INDEX ON heap(analyze) USING BLOOM",
+    "CREATE INDEX ON heap(bloom) USING BPLUSTREE",
+    "CREATE TABLE explain(explain INT, vacuum TEXT COMPRESSED LZMA, dictionary TEXT COMPRESSED ZLIB DICTIONARY)",
+    "INSERT INTO explain (explain, vacuum, dictionary) VALUES (3, 'a', 'b')",
+    "VACUUM heap",
+    "ANALYZE explain",
+    "EXPLAIN SELECT explain FROM explain WHERE explain = 3",
+]
+
+
+def test_palabras_como_nombres():
+    print("\n--- TEST palabras clave como identificadores ---")
+    for consulta in consultas:
+        result = query_run(consulta)
+        assert result is not None and result.success, f"{consulta}: {result and result.message}"
+
+    result = query_run("SELECT analyze, zlib FROM heap WHERE analyze >= 10 AND bloom = 'y' ORDER BY paged DESC")
+    assert result.data.values.tolist() == [[20, "mundo"]], result.data
+    result = query_run("SELECT vacuum, dictionary FROM explain WHERE explain = 3")
+    assert result.data.values.tolist() == [["a", "b"]], result.data
+    print("OK")
+
+
+if __name__ == "__main__":
+    query_run("DROP TABLE heap")
+    query_run("DROP TABLE explain")
+    test_palabras_como_nombres()
+    query_run("DROP TABLE heap")
+    query_run("DROP TABLE explain")
@@ -0,0 +1,89 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+from yarasca import query_run
+from dbmanager import DBManager
+from storage.Record import Record
+from fancytypes.column_types import OperationType
+from storage.TableStats import TableStats
+
+# ANALYZE: las selectividades estimadas deben acercarse a las reales, y el
+# catálogo debe seguir los inserts y deletes hasta el próximo ANALYZE.
+
+table_name = "stats_test"
+N = 20000
+TOLERANCIA = 0.03  # diferencia absoluta aceptada en la fracción de filas
+
+condiciones = [
+    ("city", OperationType.EQUAL, "lima"),
+    ("city", OperationType.EQUAL, "c7"),
+    ("city", OperationType.EQUAL, "zzz"),
+    ("age", OperationType.LESS_THAN, 30),
+    ("age", OperationType.BETWEEN, (40, 50)),
+    ("score", OperationType.GREATER_THAN, 60.0),
+    ("id", OperationType.EQUAL, 77),
+    ("id", OperationType.LESS__EQUAL, 5000),
+    ("id", OperationType.NOT_EQUAL, 5),
+]
+
+
+def preparar_tabla():
+    query_run(f"DROP TABLE {table_name}")
+    assert query_run(f"CREATE TABLE {table_name}(id INT PRIMARY KEY, city VARCHAR(12), age INT, score FLOAT, bio TEXT)").success
+    schema = DBManager.get_table_schema(table_name)
+    rng = np.random.default_rng(1)
+    cities = ["lima"] * 50 + ["cusco"] * 20 + [f"c{i}" for i in range(30)]
+    DBManager.insert_many(table_name, [
+        Record(schema, [i, cities[i % 100], int(rng.integers(18, 80)), float(rng.normal(50, 10)), "b"]) for i in range(N)
+    ])
+    return schema
+
+
+def test_estimaciones():
+    print("\n--- TEST selectividad estimada vs real ---")
+    assert DBManager.estimate_selectivity(table_name, "age", OperationType.LESS_THAN, 30) is None
+    result = query_run(f"ANALYZE {table_name}")
+    assert result.success, result.message
+    assert set(result.data["column"]) >= {"id", "city", "age", "score"}
+
+    heap = DBManager.get_table_heap(table_name, use_mmap=True)
+    columnas, live = heap.to_numpy(), heap.live_mask()
+    for field, op, value in condiciones:
+        estimada = DBManager.estimate_selectivity(table_name, field, op, value)
+        real = (DBManager.column_mask(columnas[field], op, value) & live).sum() / live.sum()
+        assert abs(estimada - real) <= TOLERANCIA, (field, op.name, value, estimada, real)
+        print(f"{field} {op.name} {value}: estimada {estimada:.4f} real {real:.4f}")
+    print("OK")
+
+
+def test_mantenimiento(schema):
+    print("\n--- TEST catálogo tras inserts y deletes ---")
+    for i in range(100):
+        DBManager.delete_record(table_name, i)
+    DBManager.insert_many(table_name, [Record(schema, [100000 + i, "nueva", 5, 1.0, "x"]) for i in range(5000)])
+    stats = DBManager.get_table_stats(table_name)
+    assert stats.row_count == N - 100 + 5000, stats.row_count
+    assert stats.column("id")["max"] == 100000 + 4999
+    assert stats.column("age")["min"] == 5
+    assert stats.stale  # 5100 filas cambiadas sobre 20000 analizadas
+
+    # los cambios se acumulan en el objeto cacheado y se guardan al cerrar la sentencia
+    table_path = DBManager.table_path(table_name)
+    DBManager.update_table_stats(table_path, schema, deleted=3)
+    assert DBManager.get_table_stats(table_name) is stats and stats.dirty
+    assert TableStats.load(table_path).row_count == stats.row_count + 3
+    DBManager.end_statement()
+    assert not stats.dirty and TableStats.load(table_path).row_count == stats.row_count
+    assert DBManager.get_table_stats(table_name) is stats
+    assert query_run(f"ANALYZE {table_name}").success
+    assert not DBManager.get_table_stats(table_name).stale
+    assert not query_run("ANALYZE no_existe").success
+    print("OK")
+
+
+if __name__ == "__main__":
+    schema = preparar_tabla()
+    test_estimaciones()
+    test_mantenimiento(schema)
+    query_run(f"DROP TABLE {table_name}")
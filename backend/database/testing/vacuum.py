@@ -0,0 +1,74 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from yarasca import query_run
+from dbmanager import DBManager
+from storage.Record import Record
+
+# VACUUM compacta el heap y el archivo de TEXT y reconstruye los índices:
+# las consultas (por cada tipo de índice) deben devolver lo mismo antes y
+# después, y la tabla debe seguir aceptando inserts y deletes.
+
+N = 1000
+
+
+def tamano(table_name: str, ext: str) -> int:
+    return os.path.getsize(DBManager.table_path(table_name) + ext)
+
+
+def filas(query: str) -> list:
+    result = query_run(query)
+    assert result.success, result.message
+    return sorted(map(tuple, result.data.values.tolist()))
+
+
+def test_vacuum(storage: str):
+    table_name = f"vacuum_{storage.lower()}"
+    print(f"\n--- TEST VACUUM ({storage}) ---")
+    query_run(f"DROP TABLE {table_name}")
+    assert query_run(
+        f"CREATE TABLE {table_name}(id INT PRIMARY KEY, name VARCHAR(16), age INT, pos POINT2D, bio TEXT) USING {storage}"
+    ).success
+    schema = DBManager.get_table_schema(table_name)
+    bios = ["bio " * (i % 5) + str(i) for i in range(N)]
+    DBManager.insert_many(table_name, [Record(schema, [i, f"n{i % 37}", i % 50, (float(i % 13), float(i % 7)), bios[i]]) for i in range(N)])
+    for index in ("age) USING BPLUSTREE", "name) USING HASHFILE", "id) USING SEQUENTIAL", "pos) USING RTREE"):
+        assert query_run(f"CREATE INDEX ON {table_name}({index}").success
+    for i in range(N):
+        if i % 50 > 10:
+            DBManager.delete_record(table_name, i)
+    vivos = [i for i in range(N) if i % 50 <= 10]
+
+    consultas = [
+        f"SELECT id, name, bio FROM {table_name} WHERE age = 7",
+        f"SELECT id, bio FROM {table_name} WHERE name = 'n5'",
+        f"SELECT id FROM {table_name} WHERE id BETWEEN 100 AND 200",
+        f"SELECT id, name FROM {table_name} WHERE age < 3",
+        f"SELECT id, bio FROM {table_name}",
+    ]
+    antes = [filas(q) for q in consultas]
+    bytes_antes = (tamano(table_name, ".dat"), tamano(table_name, ".bio.text"))
+
+    result = query_run(f"VACUUM {table_name}")
+    assert result.success, result.message
+    despues = [filas(q) for q in consultas]
+    for consulta, a, d in zip(consultas, antes, despues):
+        assert a == d, f"{consulta}: {len(a)} filas antes, {len(d)} después"
+    assert despues[-1] == [(i, bios[i]) for i in vivos]
+
+    heap = DBManager.get_table_heap(table_name)
+    assert heap.heap_size == len(vivos), (heap.heap_size, len(vivos))
+    bytes_despues = (tamano(table_name, ".dat"), tamano(table_name, ".bio.text"))
+    assert all(d < a for a, d in zip(bytes_antes, bytes_despues)), (bytes_antes, bytes_despues)
+
+    DBManager.insert_many(table_name, [Record(schema, [N + 1, "nuevo", 7, (1.0, 1.0), "fresco"])])
+    assert filas(f"SELECT id, bio FROM {table_name} WHERE age = 7 AND name = 'nuevo'") == [(N + 1, "fresco")]
+    assert DBManager.delete_record(table_name, N + 1)
+    assert filas(f"SELECT id FROM {table_name} WHERE id = {N + 1}") == []
+    query_run(f"DROP TABLE {table_name}")
+    print("OK", bytes_antes, "->", bytes_despues)
+
+
+if __name__ == "__main__":
+    test_vacuum("HEAP")
+    test_vacuum("PAGED")
@@ -0,0 +1,98 @@
+import os
+import sys
+import subprocess
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Write-ahead log: un proceso escribe con el pool en write-back y se cae
+# (os._exit) sin bajar las páginas a disco; el siguiente proceso rehace lo
+# confirmado en el log. Las sentencias confirmadas deben estar completas
+# (heap, índices con su directorio hash, diccionario del TEXT comprimido y
+# estadísticas) y la escritura sin COMMIT no debe aparecer.
+#
+# Uso: python wal_recovery.py   (lanza las dos fases en procesos aparte)
+
+table_name = "wal_test"
+N = 500
+
+
+def fase_escritura():
+    from yarasca import query_run
+    from dbmanager import DBManager
+    from storage.Record import Record
+    from storage.BufferPool import BufferPool
+    from storage.TableRegistry import TableRegistry
+    from indexing.IndexRecord import IndexRecord
+
+    query_run(f"DROP TABLE {table_name}")
+    assert query_run(
+        f"CREATE TABLE {table_name}(id INT PRIMARY KEY, name VARCHAR(16), age INT, bio TEXT, "
+        f"notes TEXT COMPRESSED ZLIB DICTIONARY)"
+    ).success
+    assert query_run(f"CREATE INDEX ON {table_name}(age) USING BPLUSTREE").success
+    assert query_run(f"CREATE INDEX ON {table_name}(name) USING HASHFILE").success
+    assert query_run(f"CREATE INDEX ON {table_name}(id) USING HASHFILE").success
+    assert query_run(f"ANALYZE {table_name}").success
+    DBManager.configure_durability("statement")
+    schema = DBManager.get_table_schema(table_name)
+    DBManager.insert_many(table_name, [Record(schema, [i, f"n{i % 7}", i % 10, "t" * (i % 9), f"nota {i}"]) for i in range(N)])
+    for i in range(0, N, 3):
+        DBManager.delete_record(table_name, i)
+    # escrituras sin COMMIT: se pierden con la caída (las del hash parten
+    # buckets, así que también cambian el directorio)
+    DBManager.get_table_heap(table_name).insert_record(Record(schema, [9999, "fantasma", 1, "x", "y"]))
+    hash_id = TableRegistry.hash_index(DBManager.table_path(table_name), "id")
+    for i in range(N, 3 * N):
+        hash_id.insert_record(IndexRecord("i", i, 0))
+    assert BufferPool.get().stats()["dirty"] > 0
+    assert os.path.getsize(DBManager.wal_path()) > 0
+    os._exit(0)
+
+
+def fase_recuperacion():
+    from yarasca import query_run
+    from dbmanager import DBManager
+    from storage.TableRegistry import TableRegistry
+
+    DBManager()  # rehace el log
+    assert os.path.getsize(DBManager.wal_path()) == 0
+    vivos = [i for i in range(N) if i % 3]
+
+    def ids(query: str) -> list[int]:
+        result = query_run(query)
+        assert result.success, result.message
+        return sorted(result.data["id"].tolist())
+
+    assert ids(f"SELECT id FROM {table_name}") == vivos
+    assert ids(f"SELECT id FROM {table_name} WHERE age = 4") == [i for i in vivos if i % 10 == 4]
+    assert ids(f"SELECT id FROM {table_name} WHERE name = 'n3'") == [i for i in vivos if i % 7 == 3]
+    assert ids(f"SELECT id FROM {table_name} WHERE id = 9999") == []
+    result = query_run(f"SELECT id, bio FROM {table_name} WHERE age = 4")
+    assert all(bio == "t" * (i % 9) for i, bio in result.data.values.tolist())
+    result = query_run(f"SELECT id, notes FROM {table_name}")
+    assert all(nota == f"nota {i}" for i, nota in result.data.values.tolist())
+
+    # el directorio del hash sobre id se partió muchas veces durante la carga
+    hash_id = TableRegistry.hash_index(DBManager.table_path(table_name), "id")
+    assert all(len(hash_id.search_record(i)) == (1 if i % 3 else 0) for i in range(N))
+    assert all(hash_id.search_record(i) == [] for i in range(N, 3 * N))
+    assert hash_id.search_record(9999) == []
+    assert DBManager.get_table_stats(table_name).row_count == len(vivos)
+    query_run(f"DROP TABLE {table_name}")
+
+
+def test_recuperacion():
+    print("\n--- TEST WAL: caída y recuperación ---")
+    script = os.path.abspath(__file__)
+    for fase in ("escritura", "recuperacion"):
+        proc = subprocess.run([sys.executable, script, fase], capture_output=True, text=True)
+        assert proc.returncode == 0, f"fase {fase}:\n{proc.stdout}\n{proc.stderr}"
+    print("OK")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "escritura":
+        fase_escritura()
+    elif len(sys.argv) > 1 and sys.argv[1] == "recuperacion":
+        fase_recuperacion()
+    else:
+        test_recuperacion()
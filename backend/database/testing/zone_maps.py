@@ -0,0 +1,56 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import numpy as np
+from yarasca import query_run
+from dbmanager import DBManager
+from storage.Record import Record
+from fancytypes.column_types import OperationType
+
+# Zone maps: el recorrido con poda de bloques debe devolver lo mismo que
+# evaluar la condición sobre toda la columna, y sobre una columna ordenada
+# (id, score) debe leer solo una parte del heap.
+
+N = 20000
+condiciones = [
+    ("id", OperationType.GREATER_THAN, 19000),
+    ("id", OperationType.BETWEEN, (500, 800)),
+    ("id", OperationType.EQUAL, 1234),
+    ("id", OperationType.NOT_EQUAL, 3),
+    ("name", OperationType.EQUAL, "n5"),
+    ("name", OperationType.LESS_THAN, "n2"),
+    ("age", OperationType.LESS_THAN, 3),
+    ("score", OperationType.GREATER__EQUAL, 9000.0),
+]
+
+
+def test_poda(storage: str):
+    table_name = f"zone_{storage.lower()}"
+    print(f"\n--- TEST zone maps ({storage}) ---")
+    query_run(f"DROP TABLE {table_name}")
+    assert query_run(f"CREATE TABLE {table_name}(id INT PRIMARY KEY, name VARCHAR(16), age INT, score FLOAT) USING {storage}").success
+    schema = DBManager.get_table_schema(table_name)
+    DBManager.insert_many(table_name, [Record(schema, [i, f"n{i % 37}", i % 50, i * 0.5]) for i in range(N)])
+    for i in range(0, N, 7):
+        DBManager.delete_record(table_name, i)
+
+    db = DBManager()
+    heap = DBManager.get_table_heap(table_name, use_mmap=True)
+    columnas, live = heap.to_numpy(), heap.live_mask()
+    for field, op, value in condiciones:
+        obtenido = db.fetch_condition_offsets(table_name, f"§{table_name}.{field}", op, value, 0)
+        esperado = set(np.flatnonzero(DBManager.column_mask(columnas[field], op, value) & live).tolist())
+        assert obtenido == esperado, (field, op.name, value, len(obtenido), len(esperado))
+        rangos = DBManager.block_ranges(heap, field, op, value)
+        leidos = sum(fin - inicio for inicio, fin in rangos)
+        assert all(any(inicio <= o < fin for inicio, fin in rangos) for o in esperado), (field, op.name)
+        if field in ("id", "score") and op != OperationType.NOT_EQUAL:
+            assert leidos < heap.heap_size // 4, (field, op.name, leidos)
+        print(f"{field} {op.name} {value}: {len(obtenido)} filas, {leidos} slots leídos")
+    query_run(f"DROP TABLE {table_name}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    test_poda("HEAP")
+    test_poda("PAGED")
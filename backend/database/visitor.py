@@ -1,4 +1,5 @@
-from contextlib import contextmanager
+import io
+from contextlib import contextmanager, redirect_stdout
 
 from fancytypes.column_types import (
     ColumnType,
@@ -8,6 +9,8 @@ from fancytypes.column_types import (
 )
 
 from dbmanager import DBManager
+from executor import Project, select_pipeline, where_source
+from planner import Planner
 
 from statement import (
     AndCondition,
@@ -23,6 +26,9 @@ from statement import (
     InsertStatement,
     DropIndexStatement,
     DropTableStatement,
+    VacuumStatement,
+    AnalyzeStatement,
+    ExplainStatement,
     IntExpression,
     FloatExpression,
     StringExpression,
@@ -100,9 +106,10 @@ class Visitor:
 class RunVisitor:
     """Base visitor class for executing statements"""
 
-    def __init__(self):
+    def __init__(self, stream: bool = False):
         self.current_table: str = ""
         self.k = 10  # default
+        self.stream = stream  # SELECT hands back its pipeline instead of a DataFrame
 
     def generic_visit(self, node):
         if isinstance(node, Statement):
@@ -136,6 +143,7 @@ class RunVisitor:
         lastResult: QueryResult = None
         for st in program.statement_list:
             lastResult = st.accept(self)
+            DBManager.end_statement()  # each statement is one log transaction
 
             Logger.log_info(f"Program parsed successfully with final message: {lastResult.message}")
 
@@ -151,7 +159,7 @@ class RunVisitor:
                 return QueryResult(False, f"Table '{st.table_name}' already exists.")
 
         try:
-            DBManager().create_table(st.table_name, st.columns)
+            DBManager().create_table(st.table_name, st.columns, st.storage)
             return QueryResult(True, f"Table '{st.table_name}' created successfully.")
         except Exception as e:
             Logger.log_error(str(e))
@@ -166,6 +174,26 @@ class RunVisitor:
             Logger.log_error(str(e))
             return QueryResult(False, f"There was an error while droppping the table: {str(e)}")
 
+    def visit_vacuumstatement(self, st: VacuumStatement):
+        try:
+            live, reclaimed = DBManager().vacuum_table(st.table_name)
+            message = f"Table '{st.table_name}' vacuumed: {live} live records, {reclaimed} slots reclaimed."
+            Logger.log_info(message)
+            return QueryResult(True, message)
+        except Exception as e:
+            Logger.log_error(str(e))
+            return QueryResult(False, f"There was an error while vacuuming the table: {str(e)}")
+
+    def visit_analyzestatement(self, st: AnalyzeStatement):
+        try:
+            stats = DBManager().analyze_table(st.table_name)
+            message = f"Table '{st.table_name}' analyzed: {stats.row_count} rows."
+            Logger.log_info(message)
+            return QueryResult(True, message, pd.DataFrame(stats.summary()))
+        except Exception as e:
+            Logger.log_error(str(e))
+            return QueryResult(False, f"There was an error while analyzing the table: {str(e)}")
+
     def visit_createindexstatement(self, st: CreateIndexStatement):
         try:
             DBManager().create_index(st.table_name, st.column_name, st.index_type)
@@ -209,14 +237,13 @@ class RunVisitor:
                 Logger.log_debug(f"SET K TO {st.limit}")
                 self.k = st.limit  # awful
             self.current_table = st.from_table
-            offsets: set[int] = (
-                DBManager().fetch_all_offsets(st.from_table) if not st.where_statement else st.where_statement.accept(self)
-            )
-            columns = None if st.select_all else st.select_columns
-            results: pd.DataFrame = DBManager().records_projection(st.from_table, offsets, columns, as_df=True)
+            # rows are pulled through Scan/IndexScan → Filter → Sort → Limit → Project
+            pipeline: Project = select_pipeline(st, self)
+            if self.stream:
+                Logger.log_info(f"Streaming records from table '{st.from_table}'.")
+                return QueryResult(True, f"Streaming records from table '{st.from_table}'.", stream=pipeline)
+            results: pd.DataFrame = pipeline.to_frame()
             Logger.log_debug("PASSED PROJECTION")
-            if st.limit is not None:
-                results = results[: st.limit]
 
             Logger.log_info(f"Selected {len(results)} records from table '{st.from_table}'.")
             return QueryResult(
@@ -228,10 +255,35 @@ class RunVisitor:
             Logger.log_error(str(e))
             return QueryResult(False, f"There was an error while selecting records: {str(e)}")
 
+    def visit_explainstatement(self, st: ExplainStatement):
+        try:
+            select = st.select_statement
+            DBManager.verify_table_exists(select.from_table)
+            self.current_table = select.from_table
+            planner = Planner(select.from_table)
+            or_condition = select.where_statement.or_condition if select.where_statement else None
+            steps: list[dict] = planner.explain(or_condition, self, PrintVisitor.render)
+            if select.order_by_column is not None:
+                candidates = None if or_condition is None else planner.estimate(or_condition, self)
+                steps.append(planner.sort_step(select.order_by_column, select.ascending, select.limit, candidates))
+            if select.limit is not None:
+                early = "stops early" if select.order_by_column is None else ""
+                steps.append(Planner.step("Limit", str(select.limit), early, None, None))
+            columns = "*" if select.select_all else ", ".join(select.select_columns)
+            steps.append(Planner.step("Project", columns, "fetched rows", None, None))
+
+            plan = pd.DataFrame(steps)
+            plan.insert(0, "step", range(1, len(steps) + 1))
+            return QueryResult(True, f"Query plan for table '{select.from_table}'.", plan)
+        except Exception as e:
+            Logger.log_error(str(e))
+            return QueryResult(False, f"There was an error while explaining the query: {str(e)}")
+
     # region RunVisitor Conditions
 
     def visit_wherestatement(self, st: WhereStatement) -> set[int]:
-        return st.or_condition.accept(self)
+        # the whole condition tree is planned and evaluated at once
+        return where_source(Planner(self.current_table), st.or_condition, self).offsets()
 
     def visit_knnstatement(self, st: KnnStatement):
         return DBManager().do_audio_knn(st.table_name, st.column_name, st.query_path, st.k)
@@ -247,11 +299,8 @@ class RunVisitor:
         return left
 
     def visit_andcondition(self, condition: AndCondition):
-        left = condition.not_condition.accept(self)
-        if condition.and_condition:
-            right = condition.and_condition.accept(self)
-            return left & right
-        return left
+        # the most selective conjunct drives, the rest only filter its rows
+        return where_source(Planner(self.current_table), OrCondition(condition), self).offsets()
 
     def visit_notcondition(self, condition: NotCondition):
         inner = condition.primary_condition.accept(self)
@@ -309,6 +358,14 @@ class PrintVisitor(Visitor):
         indent = " " * (self.indent_level * self.indent_size)
         print(f"{indent}{text}", end=end)
 
+    @staticmethod
+    def render(node) -> str:
+        """Source text of a node (used by EXPLAIN)."""
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            node.accept(PrintVisitor())
+        return buffer.getvalue().strip()
+
     def visit_intexpression(self, expr: IntExpression):
         self.print_line(f"{expr.value}", "")
 
@@ -344,12 +401,21 @@ class PrintVisitor(Visitor):
                 column_def = f"{column.column_name} {column.column_type}{' PRIMARY KEY' if column.is_pk else ''}"
                 if column.column_type == ColumnType.VARCHAR:
                     column_def += f"({column.varchar_length})"
+                if column.compression:
+                    codec, _, extra = column.compression.partition("+")
+                    column_def += f" COMPRESSED {codec.upper()}{' DICTIONARY' if extra else ''}"
                 self.print_line(f"{column_def}{',' if column != st.columns[-1] else ''}")
-        self.print_line(");")
+        self.print_line(f"){' USING ' + st.storage.upper() if st.storage != 'heap' else ''};")
 
     def visit_droptablestatement(self, statement: DropTableStatement):
         self.print_line(f"DROP TABLE {statement.table_name}")
 
+    def visit_vacuumstatement(self, st: VacuumStatement):
+        self.print_line(f"VACUUM {st.table_name};")
+
+    def visit_analyzestatement(self, st: AnalyzeStatement):
+        self.print_line(f"ANALYZE {st.table_name};")
+
     def visit_createindexstatement(self, st: CreateIndexStatement):
         if st.index_type not in [IndexType.SPIMI, IndexType.SPIMIAUDIO]:
             self.print_line(f"CREATE INDEX ON {st.table_name}({st.column_name}) USING {st.index_type};")
@@ -374,10 +440,16 @@ class PrintVisitor(Visitor):
         )
         if st.where_statement:
             st.where_statement.accept(self)
+        if st.order_by_column is not None:
+            self.print_line(f" ORDER BY {st.order_by_column}{'' if st.ascending else ' DESC'}", "")
         if st.limit is not None:
             self.print_line(f" LIMIT {st.limit}", "")
         self.print_line(";")
 
+    def visit_explainstatement(self, st: ExplainStatement):
+        self.print_line("EXPLAIN ", "")
+        st.select_statement.accept(self)
+
     def visit_knnstatement(self, st: KnnStatement):
         self.print_line(
             f"KNN({st.k}) SOUND('{st.query_path}') IN {st.table_name}.{st.column_name};",
@@ -16,6 +16,9 @@ from statement import (
     Program,
     CreateTableStatement,
     DropTableStatement,
+    VacuumStatement,
+    AnalyzeStatement,
+    ExplainStatement,
     CreateIndexStatement,
     DropIndexStatement,
     CreateColumnDefinition,
@@ -70,6 +73,22 @@ def operation_token_to_type(token_type: TokenType) -> OperationType:
 
 
 class Parser:
+    # keywords that only mean something inside their own clause (USING ...,
+    # COMPRESSED ..., statement start); anywhere a name is expected they are
+    # read as identifiers, so tables and columns can still use these words
+    SOFT_KEYWORDS = frozenset({
+        TokenType.BLOOM,
+        TokenType.HEAP,
+        TokenType.PAGED,
+        TokenType.VACUUM,
+        TokenType.ANALYZE,
+        TokenType.EXPLAIN,
+        TokenType.COMPRESSED,
+        TokenType.ZLIB,
+        TokenType.LZMA,
+        TokenType.DICTIONARY,
+    })
+
     def __init__(self, scanner: Scanner):
         self.scanner = scanner
         self.prev: Token = None
@@ -86,6 +105,15 @@ class Parser:
             return True
         return False
 
+    def check_identifier(self) -> bool:
+        return self.check(TokenType.USER_IDENTIFIER) or (not self.is_at_end() and self.curr.token_type in self.SOFT_KEYWORDS)
+
+    def match_identifier(self) -> bool:
+        if self.check_identifier():
+            self.advance()
+            return True
+        return False
+
     def is_at_end(self) -> bool:
         return self.curr.token_type == TokenType.END
 
@@ -106,8 +134,9 @@ class Parser:
         column_type: ColumnType
         varchar_length: int = 0
         is_pk: bool = False
+        compression: str | None = None
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected column name, found {self.curr.text}")
 
         column_name = self.prev.text
@@ -126,6 +155,16 @@ class Parser:
             column_type = ColumnType.POINT3D  # TODO: integrate rtree
         elif self.match(TokenType.TEXT):
             column_type = ColumnType.TEXT
+            if self.match(TokenType.COMPRESSED):
+                compression = "zlib"
+                if self.match(TokenType.LZMA):
+                    compression = "lzma"
+                else:
+                    self.match(TokenType.ZLIB)
+                if self.match(TokenType.DICTIONARY):
+                    if compression != "zlib":
+                        raise SyntaxError("DICTIONARY is only supported with ZLIB compression")
+                    compression = "zlib+dict"
         elif self.match(TokenType.SOUND):
             column_type = ColumnType.SOUND
         elif self.match(TokenType.VARCHAR):
@@ -149,7 +188,7 @@ class Parser:
 
         # TODO: allow for index usage in CREATE TABLE
 
-        return CreateColumnDefinition(column_name, column_type, varchar_length, is_pk)
+        return CreateColumnDefinition(column_name, column_type, varchar_length, is_pk, compression)
 
     def parse_column_definition_list(self) -> list[CreateColumnDefinition]:
         Logger.log_parser("Parsing column definition list")
@@ -179,7 +218,7 @@ class Parser:
             if_not_exists = True
 
         table_name = None
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after CREATE TABLE, found {self.curr.text}")
         table_name = self.prev.text
 
@@ -188,20 +227,45 @@ class Parser:
         columns: list[CreateColumnDefinition] = self.parse_column_definition_list()
         if not self.match(TokenType.RIGHT_PARENTHESIS):
             raise SyntaxError(f"Expected ')' after column definitions, found {self.curr.text}")
-        return CreateTableStatement(table_name, columns, if_not_exists)
+
+        storage = "heap"
+        if self.match(TokenType.USING):
+            if self.match(TokenType.PAGED):
+                storage = "paged"
+            elif not self.match(TokenType.HEAP):
+                raise SyntaxError(f"Expected storage type (HEAP, PAGED) after USING, found {self.curr.text}")
+        return CreateTableStatement(table_name, columns, if_not_exists, storage)
 
     def parse_drop_table_statement(self) -> DropTableStatement:
         Logger.log_parser("Parsing DROP TABLE statement")
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after DROP TABLE, found {self.curr.text}")
         table_name = self.prev.text
         return DropTableStatement(table_name)
 
+    def parse_vacuum_statement(self) -> VacuumStatement:
+        Logger.log_parser("Parsing VACUUM statement")
+        if not self.match_identifier():
+            raise SyntaxError(f"Expected table name after VACUUM, found {self.curr.text}")
+        return VacuumStatement(self.prev.text)
+
+    def parse_analyze_statement(self) -> AnalyzeStatement:
+        Logger.log_parser("Parsing ANALYZE statement")
+        if not self.match_identifier():
+            raise SyntaxError(f"Expected table name after ANALYZE, found {self.curr.text}")
+        return AnalyzeStatement(self.prev.text)
+
+    def parse_explain_statement(self) -> ExplainStatement:
+        Logger.log_parser("Parsing EXPLAIN statement")
+        if not self.match(TokenType.SELECT):
+            raise SyntaxError(f"Expected SELECT after EXPLAIN, found {self.curr.text}")
+        return ExplainStatement(self.parse_select_statement())
+
     def parse_create_index_statement(self) -> CreateIndexStatement:
         Logger.log_parser("Parsing CREATE INDEX statement")
 
         # current index implementation doesnt support index name, so we omit it
-        # if not self.match(TokenType.USER_IDENTIFIER):
+        # if not self.match_identifier():
         #     raise SyntaxError(f"Expected index name after CREATE INDEX, found {self.curr.text}")
         # index_name = self.prev.text
         # TODO: change index creation functions to accept and use index name
@@ -209,14 +273,14 @@ class Parser:
         if not self.match(TokenType.ON):
             raise SyntaxError(f"Expected ON after index name, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after ON, found {self.curr.text}")
         table_name = self.prev.text
 
         if not self.match(TokenType.LEFT_PARENTHESIS):
             raise SyntaxError(f"Expected '(' after table name, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected column name after '(', found {self.curr.text}")
         column_name = self.prev.text
 
@@ -236,8 +300,10 @@ class Parser:
             index_type = IndexType.SEQUENTIAL
         elif self.match(TokenType.SPIMIAUDIO):
             index_type = IndexType.SPIMIAUDIO
+        elif self.match(TokenType.BLOOM):
+            index_type = IndexType.BLOOM
         else:
-            raise SyntaxError(f"Expected index type (BPLUSTREE, EXTENDIBLEHASH, RTREE, SEQUENTIAL), found {self.curr.text}")
+            raise SyntaxError(f"Expected index type (BPLUSTREE, EXTENDIBLEHASH, RTREE, SEQUENTIAL, BLOOM), found {self.curr.text}")
         return CreateIndexStatement("index_name", table_name, column_name, index_type)
 
     def parse_create_spimi_statement(self) -> CreateIndexStatement:
@@ -246,7 +312,7 @@ class Parser:
         if not self.match(TokenType.ON):
             raise SyntaxError(f"Expected ON after SPIMI, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after ON, found {self.curr.text}")
         table_name = self.prev.text
         return CreateIndexStatement("index_name", table_name, "column_name", index_type)
@@ -262,20 +328,22 @@ class Parser:
             index_type = IndexType.RTREE
         elif self.match(TokenType.SEQUENTIAL):
             index_type = IndexType.SEQUENTIAL
+        elif self.match(TokenType.BLOOM):
+            index_type = IndexType.BLOOM
         else:
-            raise SyntaxError(f"Expected index type (BPLUSTREE, EXTENDIBLEHASH, RTREE, SEQUENTIAL), found {self.curr.text}")
+            raise SyntaxError(f"Expected index type (BPLUSTREE, EXTENDIBLEHASH, RTREE, SEQUENTIAL, BLOOM), found {self.curr.text}")
 
         if not self.match(TokenType.ON):
             raise SyntaxError(f"Expected ON after index type, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after ON, found {self.curr.text}")
         table_name = self.prev.text
 
         if not self.match(TokenType.LEFT_PARENTHESIS):
             raise SyntaxError(f"Expected '(' after table name, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected column name after '(', found {self.curr.text}")
         column_name = self.prev.text
 
@@ -287,7 +355,7 @@ class Parser:
     def parse_insert_statement_columns(self) -> list[str]:
         columns: list[str] = []
         while not self.check(TokenType.RIGHT_PARENTHESIS):
-            if not self.match(TokenType.USER_IDENTIFIER):
+            if not self.match_identifier():
                 raise SyntaxError(f"Expected column name, found {self.curr.text}")
             columns.append(self.prev.text)
 
@@ -361,7 +429,7 @@ class Parser:
         if not self.match(TokenType.INTO):
             raise SyntaxError(f"Expected INTO after INSERT, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after INTO, found {self.curr.text}")
         table_name = self.prev.text
 
@@ -401,12 +469,12 @@ class Parser:
         elif self.match(TokenType.POINT3D):
             return self.parse_point_3d_expression()
         # then, column references
-        elif self.match(TokenType.USER_IDENTIFIER):
+        elif self.match_identifier():
             column_name = self.prev.text
             table_name = None
             if self.match(TokenType.DOT):
                 table_name = column_name
-                if not self.match(TokenType.USER_IDENTIFIER):
+                if not self.match_identifier():
                     raise SyntaxError(f"Expected table name after '.', found {self.curr.text}")
                 column_name = self.prev.text
             Logger.log_parser(f"Column expression: {column_name}, table: {table_name}")
@@ -490,12 +558,12 @@ class Parser:
         while not self.check(TokenType.FROM):
             table_name, column_name = None, None
 
-            if not self.match(TokenType.USER_IDENTIFIER):
+            if not self.match_identifier():
                 raise SyntaxError(f"Expected column name, found {self.curr.text}")
             column_name = self.prev.text
 
             if self.match(TokenType.DOT):
-                if not self.match(TokenType.USER_IDENTIFIER):
+                if not self.match_identifier():
                     raise SyntaxError(f"Expected table name after '.', found {self.curr.text}")
                 table_name = column_name
                 column_name = self.prev.text
@@ -524,13 +592,13 @@ class Parser:
         # * or list of columns
         if self.match(TokenType.ASTERISK):
             select_all = True
-        elif self.check(TokenType.USER_IDENTIFIER):
+        elif self.check_identifier():
             select_columns = self.parse_select_list()
 
         if not self.match(TokenType.FROM):
             raise SyntaxError(f"Expected FROM after selected columns, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after FROM, found {self.curr.text}")
         from_table = self.prev.text
 
@@ -542,12 +610,14 @@ class Parser:
         if self.match(TokenType.ORDER):
             if not self.match(TokenType.BY):
                 raise SyntaxError(f"Expected BY after ORDER, found {self.curr.text}")
-            if not self.match(TokenType.USER_IDENTIFIER):
+            if not self.match_identifier():
                 raise SyntaxError(f"Expected column name after ORDER BY, found {self.curr.text}")
             order_by_column = self.prev.text
             ascending = True
             if self.match(TokenType.DESC):
                 ascending = False
+            else:
+                self.match(TokenType.ASC)
 
         if self.match(TokenType.LIMIT):
             if not self.match(TokenType.INT_CONSTANT):
@@ -593,14 +663,14 @@ class Parser:
         if not self.match(TokenType.IN):
             raise SyntaxError(f"Expected IN after KNN SOUND, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after IN, found {self.curr.text}")
         table_name = self.prev.text
 
         if not self.match(TokenType.DOT):
             raise SyntaxError(f"Expected '.' after table name, found {self.curr.text}")
 
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected column name after table name, found {self.curr.text}")
         column_name = self.prev.text
 
@@ -621,7 +691,7 @@ class Parser:
 
         if not self.match(TokenType.IN):
             raise SyntaxError(f"Expected IN after TEXTSEARCH, found {self.curr.text}")
-        if not self.match(TokenType.USER_IDENTIFIER):
+        if not self.match_identifier():
             raise SyntaxError(f"Expected table name after IN, found {self.curr.text}")
         table_name = self.prev.text
 
@@ -652,6 +722,12 @@ class Parser:
             return self.parse_update_statement()
         elif self.match(TokenType.DELETE):
             return self.parse_delete_statement()
+        elif self.match(TokenType.VACUUM):
+            return self.parse_vacuum_statement()
+        elif self.match(TokenType.ANALYZE):
+            return self.parse_analyze_statement()
+        elif self.match(TokenType.EXPLAIN):
+            return self.parse_explain_statement()
 
         elif self.match(TokenType.KNN):
             return self.parse_knn_statement()  # TODO: implement KNN statement
@@ -710,6 +786,15 @@ def query_run(query:str):
     result: QueryResult = runVisitor.visit_program(program)
     return result
 
+def query_stream(query: str):
+    # a SELECT comes back unevaluated in `result.stream`: rows are produced while it is iterated
+    runVisitor = RunVisitor(stream=True)
+    scanner = Scanner(query)
+    parser = Parser(scanner)
+    program = parser.parse_program()
+    result: QueryResult = runVisitor.visit_program(program)
+    return result
+
 if __name__ == "__main__":
     basic_creation_insertion_selection_test = [
         "CREATE TABLE IF NOT EXISTS student(id INT PRIMARY KEY, name VARCHAR(128), age INT, grade FLOAT)",
@@ -29,6 +29,7 @@ export interface QueryResult {
   columns: Column[];
   rows: Record<string, any>[];
   message: string;
+  error?: string;  // solo si la consulta falló (sin filas)
   count_rows: number;
   time_execution: number;
 }